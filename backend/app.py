@@ -1,4 +1,7 @@
 import os
+import time
+_boot_started = time.perf_counter()
+
 from flask import request
 from flask_cors import CORS
 from backend.config import app, db
@@ -14,9 +17,13 @@ app.register_blueprint(user_bp, url_prefix="/api")
 app.register_blueprint(chat_bp, url_prefix="/api")
 app.register_blueprint(admin_bp, url_prefix="/api/admin")
 
+print(f"⏱️ Startup: import aplikasi & routes {time.perf_counter() - _boot_started:.2f}s")
+
 if __name__ == "__main__":
+    phase_started = time.perf_counter()
     with app.app_context():
         db.create_all()
+    print(f"⏱️ Startup: db.create_all {time.perf_counter() - phase_started:.2f}s")
 
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port)
@@ -43,3 +43,107 @@ UPLOADS_DIR = os.path.join(BASE_DIR, "uploads")
 os.makedirs(MODEL_DIR, exist_ok=True)
 os.makedirs(os.path.join(UPLOADS_DIR, "datasets"), exist_ok=True)
 os.makedirs(os.path.join(UPLOADS_DIR, "pdfs"), exist_ok=True)
+
+# ===========================
+# INFERENCE BATCHING (/api/chat)
+# ===========================
+CHAT_BATCH_MAX_SIZE = int(os.environ.get("CHAT_BATCH_MAX_SIZE", 32))
+CHAT_BATCH_MAX_WAIT_MS = float(os.environ.get("CHAT_BATCH_MAX_WAIT_MS", 5))
+
+# ===========================
+# NUMPY INFERENCE ENGINE
+# ===========================
+# Mode bobot main_model.npz: float32 | float16 | int8
+MAIN_MODEL_WEIGHT_MODE = os.environ.get("MAIN_MODEL_WEIGHT_MODE", "float32")
+
+# ===========================
+# BACKEND MODEL UTAMA
+# ===========================
+# lstm   : BiLSTM (training menit, inferensi ~ms)
+# linear : n-gram ter-hash + regresi logistik (training detik, inferensi < 1 ms)
+# Bandingkan dulu: python -m backend.utils.main_backends compare dataset.csv
+MAIN_MODEL_BACKEND = os.environ.get("MAIN_MODEL_BACKEND", "lstm")
+MAIN_LINEAR_C = float(os.environ.get("MAIN_LINEAR_C", 30.0))
+# probabilitas softmax ratusan kelas lebih tersebar daripada LSTM → ambang sendiri
+MAIN_LINEAR_THRESHOLD = float(os.environ.get("MAIN_LINEAR_THRESHOLD", 0.15))
+
+# ===========================
+# LOOKUP PERTANYAAN DATASET (SEBELUM MODEL UTAMA)
+# ===========================
+QUESTION_LOOKUP_ENABLED = os.environ.get("QUESTION_LOOKUP_ENABLED", "1") == "1"
+# Jaccard minimum (shingle 4 karakter) untuk jawaban "dataset-near"; saat build dinaikkan
+# otomatis di atas kemiripan pasangan dataset berjawaban beda
+QUESTION_LOOKUP_NEAR_THRESHOLD = float(os.environ.get("QUESTION_LOOKUP_NEAR_THRESHOLD", 0.8))
+QUESTION_LOOKUP_NUM_PERM = int(os.environ.get("QUESTION_LOOKUP_NUM_PERM", 64))
+QUESTION_LOOKUP_BANDS = int(os.environ.get("QUESTION_LOOKUP_BANDS", 16))
+QUESTION_LOOKUP_LOG_EVERY = int(os.environ.get("QUESTION_LOOKUP_LOG_EVERY", 500))  # 0 = tanpa log
+
+# ===========================
+# FAST BOOT
+# ===========================
+# 1 = artefak model dimuat paralel di background (cek /api/health/ready)
+FAST_BOOT = os.environ.get("FAST_BOOT", "1") == "1"
+
+# ===========================
+# MODEL REGISTRY
+# ===========================
+# Jumlah versi model lama yang disimpan untuk rollback
+MODEL_KEEP_VERSIONS = int(os.environ.get("MODEL_KEEP_VERSIONS", 5))
+# 0 = tolak artefak pickle versi lama (tokenizer/label/TF-IDF .pkl); versi baru
+# memakai format mmap. Konversi: python -m backend.utils.mmap_artifacts convert
+MODEL_ALLOW_PICKLE = os.environ.get("MODEL_ALLOW_PICKLE", "1") == "1"
+
+# ===========================
+# FALLBACK PERATURAN (BM25)
+# ===========================
+FALLBACK_TOP_K = int(os.environ.get("FALLBACK_TOP_K", 3))
+FALLBACK_CONTEXT = int(os.environ.get("FALLBACK_CONTEXT", 1))  # jumlah kalimat tetangga
+
+# ===========================
+# ANSWER CACHE
+# ===========================
+ANSWER_CACHE_SIZE = int(os.environ.get("ANSWER_CACHE_SIZE", 2048))
+ANSWER_CACHE_TTL = int(os.environ.get("ANSWER_CACHE_TTL", 3600))  # detik
+# Path file SQLite untuk cache bersama antar worker (kosong = hanya per proses)
+ANSWER_CACHE_SHARED_PATH = os.environ.get("ANSWER_CACHE_SHARED_PATH", "")
+# Batas jumlah baris tabel cache bersama (0 = tanpa batas)
+ANSWER_CACHE_SHARED_MAX_ROWS = int(os.environ.get("ANSWER_CACHE_SHARED_MAX_ROWS", 20000))
+
+# ===========================
+# WRITE-BEHIND CHAT HISTORY
+# ===========================
+# 1 = ChatHistory/TopicStats ditulis di background per batch
+CHAT_WRITE_BEHIND = os.environ.get("CHAT_WRITE_BEHIND", "1") == "1"
+CHAT_WRITER_QUEUE_SIZE = int(os.environ.get("CHAT_WRITER_QUEUE_SIZE", 10000))
+CHAT_WRITER_BATCH_SIZE = int(os.environ.get("CHAT_WRITER_BATCH_SIZE", 200))
+CHAT_WRITER_FLUSH_INTERVAL = float(os.environ.get("CHAT_WRITER_FLUSH_INTERVAL", 1.0))  # detik
+CHAT_WRITER_JOURNAL = os.environ.get(
+    "CHAT_WRITER_JOURNAL", os.path.join(BASE_DIR, "journal", "chat_history.jsonl")
+)
+
+# ===========================
+# ROLLUP STATISTIK DASHBOARD
+# ===========================
+ROLLUP_INTERVAL = float(os.environ.get("ROLLUP_INTERVAL", 30))  # detik antar compaction
+# id yang belum terlihat (transaksi belum commit) ditunggu selama ini sebelum
+# dianggap rollback / terhapus dan dilewati watermark
+ROLLUP_LAG = float(os.environ.get("ROLLUP_LAG", 60))  # detik
+ROLLUP_BATCH_SIZE = int(os.environ.get("ROLLUP_BATCH_SIZE", 5000))
+
+# ===========================
+# CACHE RESPONSE ADMIN
+# ===========================
+ADMIN_CACHE_ENABLED = os.environ.get("ADMIN_CACHE_ENABLED", "1") == "1"
+ADMIN_CACHE_TTL_DASHBOARD = float(os.environ.get("ADMIN_CACHE_TTL_DASHBOARD", 15))  # detik
+ADMIN_CACHE_TTL_LISTS = float(os.environ.get("ADMIN_CACHE_TTL_LISTS", 60))  # users / dataset / uploads
+
+# ===========================
+# INGEST PERATURAN (PDF / WORD)
+# ===========================
+PERATURAN_INSERT_BATCH = int(os.environ.get("PERATURAN_INSERT_BATCH", 1000))
+# 1 = tetap tulis "N. kalimat" ke uploads/texts sebagai artefak debug
+PERATURAN_DEBUG_TXT = os.environ.get("PERATURAN_DEBUG_TXT", "0") == "1"
+# ukuran passage RegulationChunker (karakter): teks bebas ditutup setelah target,
+# ayat yang melebihi target dipecah per huruf, tidak ada passage melebihi max
+PERATURAN_PASSAGE_TARGET_CHARS = int(os.environ.get("PERATURAN_PASSAGE_TARGET_CHARS", 600))
+PERATURAN_PASSAGE_MAX_CHARS = int(os.environ.get("PERATURAN_PASSAGE_MAX_CHARS", 1500))
@@ -0,0 +1,59 @@
+from backend.config import db, app
+from backend.db.models import Dataset, dataset_hash
+from sqlalchemy import inspect, select, text, update
+
+# ==============================================================
+# 🔹 MIGRASI dataset → kolom content_hash
+# ==============================================================
+# Sinkronisasi diferensial (backend/utils/dataset_sync.py) mencocokkan
+# baris lewat content_hash. Database lama perlu:
+#   1. kolom content_hash + index ix_dataset_content_hash
+#   2. hash diisi untuk baris yang sudah ada
+# Tanpa backfill, baris lama akan terhitung "diubah" pada sinkronisasi
+# pertama (tetap benar, hanya laporannya lebih besar).
+#
+# Aman dijalankan berulang kali.
+#   python -m backend.db.migrate_dataset_hash
+
+BATCH_SIZE = 1000
+
+
+def migrate_dataset_hash():
+    with app.app_context():
+        engine = db.engine
+        inspector = inspect(engine)
+        if "dataset" not in inspector.get_table_names():
+            db.create_all()
+            print("✅ Tabel dataset dibuat baru (sudah memakai content_hash)")
+            return
+
+        columns = {c["name"] for c in inspector.get_columns("dataset")}
+        indexes = {ix["name"] for ix in inspector.get_indexes("dataset")}
+        with engine.begin() as conn:
+            if "content_hash" not in columns:
+                conn.execute(text("ALTER TABLE dataset ADD COLUMN content_hash VARCHAR(40) NULL"))
+                print("🔧 Kolom content_hash ditambahkan")
+            if "ix_dataset_content_hash" not in indexes:
+                conn.execute(text("CREATE INDEX ix_dataset_content_hash ON dataset (content_hash)"))
+                print("🔧 Index ix_dataset_content_hash dibuat")
+
+        filled = 0
+        while True:
+            rows = db.session.execute(
+                select(Dataset.id, Dataset.pertanyaan, Dataset.jawaban)
+                .where(Dataset.content_hash.is_(None))
+                .limit(BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            db.session.execute(update(Dataset), [
+                {"id": r.id, "content_hash": dataset_hash(r.pertanyaan, r.jawaban)} for r in rows
+            ])
+            db.session.commit()
+            filled += len(rows)
+
+        print(f"✅ Migrasi content_hash selesai ({filled} baris diisi)")
+
+
+if __name__ == "__main__":
+    migrate_dataset_hash()
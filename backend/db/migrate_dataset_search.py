@@ -0,0 +1,38 @@
+from backend.config import db, app
+from sqlalchemy import inspect, text
+
+# ==============================================================
+# 🔹 MIGRASI INDEX PENCARIAN & SORT TABEL dataset
+# ==============================================================
+# Database lama dibuat sebelum index berikut ada di models.py:
+#   - ix_dataset_updated_at       → sort/keyset berdasarkan updated_at
+#   - ft_dataset_text (MySQL)     → FULLTEXT (pertanyaan, jawaban)
+# Dialek lain memakai token index in-app (backend/utils/dataset_search.py).
+#
+# Aman dijalankan berulang kali.
+#   python -m backend.db.migrate_dataset_search
+
+
+def migrate_dataset_search():
+    with app.app_context():
+        engine = db.engine
+        inspector = inspect(engine)
+        if "dataset" not in inspector.get_table_names():
+            db.create_all()
+            print("✅ Tabel dataset dibuat baru (index sudah termasuk)")
+            return
+
+        indexes = {ix["name"] for ix in inspector.get_indexes("dataset")}
+        with engine.begin() as conn:
+            if "ix_dataset_updated_at" not in indexes:
+                conn.execute(text("CREATE INDEX ix_dataset_updated_at ON dataset (updated_at)"))
+                print("🔧 Index ix_dataset_updated_at dibuat")
+            if engine.dialect.name == "mysql" and "ft_dataset_text" not in indexes:
+                conn.execute(text("CREATE FULLTEXT INDEX ft_dataset_text ON dataset (pertanyaan, jawaban)"))
+                print("🔧 FULLTEXT index ft_dataset_text dibuat")
+
+        print("✅ Migrasi index dataset selesai")
+
+
+if __name__ == "__main__":
+    migrate_dataset_search()
@@ -0,0 +1,57 @@
+import hashlib
+from datetime import datetime
+
+from backend.config import db, app
+from backend.db.models import Peraturan, PeraturanDocument
+from sqlalchemy import inspect, select, text
+
+# ==============================================================
+# 🔹 MIGRASI peraturan → korpus per dokumen
+# ==============================================================
+# Upload peraturan kini hanya mengganti baris milik dokumennya sendiri
+# (WHERE filename = ...) dan dilewati jika hash isinya sama. Database
+# lama perlu:
+#   1. tabel peraturan_documents
+#   2. index ix_peraturan_filename
+#   3. satu baris peraturan_documents per filename yang sudah ada
+#      (hash dihitung dari isi kalimat karena file aslinya tidak diketahui)
+#
+# Aman dijalankan berulang kali.
+#   python -m backend.db.migrate_peraturan_documents
+
+
+def migrate_peraturan_documents():
+    with app.app_context():
+        db.create_all()  # membuat peraturan_documents jika belum ada
+        engine = db.engine
+        indexes = {ix["name"] for ix in inspect(engine).get_indexes("peraturan")}
+        if "ix_peraturan_filename" not in indexes:
+            with engine.begin() as conn:
+                conn.execute(text("CREATE INDEX ix_peraturan_filename ON peraturan (filename)"))
+            print("🔧 Index ix_peraturan_filename dibuat")
+
+        known = set(db.session.execute(select(PeraturanDocument.filename)).scalars())
+        filenames = [
+            f for f in db.session.execute(select(Peraturan.filename).distinct()).scalars()
+            if f is not None and f not in known
+        ]
+        now = datetime.utcnow()
+        for filename in filenames:
+            sentences = db.session.execute(
+                select(Peraturan.sentence)
+                .where(Peraturan.filename == filename)
+                .order_by(Peraturan.sentence_number, Peraturan.id)
+            ).scalars().all()
+            db.session.add(PeraturanDocument(
+                filename=filename,
+                content_hash=hashlib.sha256("\n".join(sentences).encode("utf-8")).hexdigest(),
+                sentence_count=len(sentences),
+                uploaded_at=now,
+                updated_at=now,
+            ))
+        db.session.commit()
+        print(f"✅ Migrasi korpus peraturan selesai ({len(filenames)} dokumen didaftarkan)")
+
+
+if __name__ == "__main__":
+    migrate_peraturan_documents()
@@ -0,0 +1,51 @@
+from backend.config import db, app
+from sqlalchemy import inspect, text
+
+# ==============================================================
+# 🔹 MIGRASI peraturan → passage terstruktur
+# ==============================================================
+# Ingest PDF/Word kini menyimpan passage hasil RegulationChunker
+# (backend/utils/regulation_chunker.py), bukan kalimat hasil regex.
+# Database lama perlu:
+#   1. kolom peraturan.passage_id / label / start_offset / end_offset
+#   2. kolom peraturan_documents.text_blob (teks acuan offset)
+# Baris lama tetap berupa kalimat (kolom baru NULL) sampai dokumennya
+# di-upload ulang dengan ?force=1.
+#
+# Aman dijalankan berulang kali.
+#   python -m backend.db.migrate_peraturan_passages
+
+PERATURAN_COLUMNS = {
+    "passage_id": "VARCHAR(160) NULL",
+    "label": "VARCHAR(255) NULL",
+    "start_offset": "INTEGER NULL",
+    "end_offset": "INTEGER NULL",
+}
+
+
+def migrate_peraturan_passages():
+    with app.app_context():
+        db.create_all()  # tabel baru sudah memakai kolom passage
+        engine = db.engine
+        inspector = inspect(engine)
+        blob_type = "LONGBLOB" if engine.dialect.name == "mysql" else "BLOB"
+
+        added = []
+        with engine.begin() as conn:
+            columns = {c["name"] for c in inspector.get_columns("peraturan")}
+            for name, ddl in PERATURAN_COLUMNS.items():
+                if name not in columns:
+                    conn.execute(text(f"ALTER TABLE peraturan ADD COLUMN {name} {ddl}"))
+                    added.append(f"peraturan.{name}")
+            columns = {c["name"] for c in inspector.get_columns("peraturan_documents")}
+            if "text_blob" not in columns:
+                conn.execute(text(f"ALTER TABLE peraturan_documents ADD COLUMN text_blob {blob_type} NULL"))
+                added.append("peraturan_documents.text_blob")
+
+        for name in added:
+            print(f"🔧 Kolom {name} ditambahkan")
+        print(f"✅ Migrasi passage peraturan selesai ({len(added)} kolom baru)")
+
+
+if __name__ == "__main__":
+    migrate_peraturan_passages()
@@ -0,0 +1,85 @@
+from backend.config import db, app
+from backend.db.models import TopicStats, topic_hash
+from sqlalchemy import inspect, text, update, delete
+
+# ==============================================================
+# 🔹 MIGRASI topic_stats → kolom topic_hash + unique index
+# ==============================================================
+# db.create_all() tidak mengubah tabel yang sudah ada, jadi database lama
+# perlu dimigrasi sekali:
+#   1. tambah kolom topic_hash (nullable dulu)
+#   2. isi hash untuk semua baris; topik duplikat (beda huruf besar/kecil
+#      atau spasi) digabung: mention_count dijumlah, last_updated terbaru
+#   3. buat unique index ix_topic_stats_topic_hash
+#   4. (MySQL) jadikan kolom NOT NULL
+#
+# Aman dijalankan berulang kali.
+#   python -m backend.db.migrate_topic_stats
+
+INDEX_NAME = "ix_topic_stats_topic_hash"
+BATCH_SIZE = 1000
+
+
+def migrate_topic_stats():
+    with app.app_context():
+        engine = db.engine
+        dialect = engine.dialect.name
+        inspector = inspect(engine)
+
+        if "topic_stats" not in inspector.get_table_names():
+            db.create_all()
+            print("✅ Tabel topic_stats dibuat baru (sudah memakai topic_hash)")
+            return
+
+        columns = {c["name"] for c in inspector.get_columns("topic_stats")}
+        if "topic_hash" not in columns:
+            with engine.begin() as conn:
+                conn.execute(text("ALTER TABLE topic_stats ADD COLUMN topic_hash VARCHAR(40) NULL"))
+            print("🔧 Kolom topic_hash ditambahkan")
+
+        # --- backfill + gabungkan duplikat ---
+        rows = db.session.execute(
+            db.select(TopicStats.id, TopicStats.topic_name, TopicStats.mention_count, TopicStats.last_updated)
+            .order_by(TopicStats.id)
+        ).all()
+
+        keep = {}        # hash → dict baris yang dipertahankan (id terkecil)
+        drop_ids = []
+        for row in rows:
+            key = topic_hash(row.topic_name)
+            kept = keep.get(key)
+            if kept is None:
+                keep[key] = {
+                    "id": row.id,
+                    "topic_hash": key,
+                    "mention_count": row.mention_count or 0,
+                    "last_updated": row.last_updated,
+                }
+                continue
+            kept["mention_count"] += row.mention_count or 0
+            if row.last_updated and (kept["last_updated"] is None or row.last_updated > kept["last_updated"]):
+                kept["last_updated"] = row.last_updated
+            drop_ids.append(row.id)
+
+        updates = list(keep.values())
+        for i in range(0, len(drop_ids), BATCH_SIZE):
+            db.session.execute(delete(TopicStats).where(TopicStats.id.in_(drop_ids[i:i + BATCH_SIZE])))
+        for i in range(0, len(updates), BATCH_SIZE):
+            db.session.execute(update(TopicStats), updates[i:i + BATCH_SIZE])
+        db.session.commit()
+        print(f"✅ {len(updates)} topik diberi hash, {len(drop_ids)} duplikat digabung")
+
+        # --- unique index + NOT NULL ---
+        indexes = {ix["name"] for ix in inspect(engine).get_indexes("topic_stats")}
+        with engine.begin() as conn:
+            if INDEX_NAME not in indexes:
+                conn.execute(text(f"CREATE UNIQUE INDEX {INDEX_NAME} ON topic_stats (topic_hash)"))
+                print(f"🔧 Unique index {INDEX_NAME} dibuat")
+            if dialect == "mysql":
+                conn.execute(text("ALTER TABLE topic_stats MODIFY topic_hash VARCHAR(40) NOT NULL"))
+
+        print("✅ Migrasi topic_stats selesai")
+
+
+if __name__ == "__main__":
+    migrate_topic_stats()
@@ -0,0 +1,80 @@
+import hashlib
+import os
+import shutil
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+from backend.config import db, app, UPLOADS_DIR
+from backend.db.models import UploadedFile
+from backend.utils.upload_store import store_path
+
+# ==============================================================
+# 🔹 MIGRASI folder upload lama → content-addressed store
+# ==============================================================
+# File yang dulu disimpan di uploads/datasets, uploads/pdfs, dan
+# uploads/words (nama dari klien) disalin ke uploads/store/<sha> dan
+# dicatat di uploaded_files dengan status "imported", supaya tetap
+# muncul di listing admin. File asli tidak dihapus.
+#
+# Tabel uploaded_files lama mendapat kolom table_hash (sidik isi tabel
+# dataset, dipakai upload_store.is_current).
+#
+# Aman dijalankan berulang kali (file yang hash + nama aslinya sudah
+# tercatat dilewati).
+#   python -m backend.db.migrate_upload_store
+
+LEGACY_DIRS = {"datasets": "dataset", "pdfs": "pdf", "words": "word"}
+
+
+def _sha256(path, chunk_size=1024 * 1024):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def migrate_upload_store():
+    with app.app_context():
+        db.create_all()  # membuat uploaded_files jika belum ada
+        columns = {c["name"] for c in inspect(db.engine).get_columns("uploaded_files")}
+        if "table_hash" not in columns:
+            with db.engine.begin() as conn:
+                conn.execute(text("ALTER TABLE uploaded_files ADD COLUMN table_hash VARCHAR(64) NULL"))
+            print("🔧 Kolom uploaded_files.table_hash ditambahkan")
+        known = {(r.sha256, r.original_name) for r in UploadedFile.query.all()}
+        imported = 0
+        for folder, kind in LEGACY_DIRS.items():
+            directory = os.path.join(UPLOADS_DIR, folder)
+            if not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                path = os.path.join(directory, name)
+                if not os.path.isfile(path):
+                    continue
+                sha = _sha256(path)
+                if (sha, name) in known:
+                    continue
+                target = store_path(sha, os.path.splitext(name)[1].lower())
+                if not os.path.exists(target):
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    shutil.copy2(path, target)
+                stat = os.stat(path)
+                db.session.add(UploadedFile(
+                    kind=kind,
+                    sha256=sha,
+                    original_name=name,
+                    stored_path=os.path.relpath(target, UPLOADS_DIR),
+                    size=stat.st_size,
+                    status="imported",
+                    created_at=datetime.utcfromtimestamp(stat.st_mtime),
+                ))
+                known.add((sha, name))
+                imported += 1
+        db.session.commit()
+        print(f"✅ Migrasi upload store selesai ({imported} file dicatat)")
+
+
+if __name__ == "__main__":
+    migrate_upload_store()
@@ -1,5 +1,9 @@
 from backend.config import db
 from datetime import datetime
+import hashlib
+from sqlalchemy import DDL, event
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import deferred
 
 # ======================
 # TABEL USER
@@ -29,7 +33,7 @@ class LoginHistory(db.Model):
 class ChatSession(db.Model):
     __tablename__ = "chat_sessions"
     id = db.Column(db.Integer, primary_key=True)
-    npm = db.Column(db.String(20), db.ForeignKey("users.npm"), nullable=False)
+    npm = db.Column(db.String(20), db.ForeignKey("users.npm"), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     messages = db.relationship("ChatMessage", backref="session", lazy=True, cascade="all, delete-orphan")
 
@@ -40,7 +44,7 @@ class ChatSession(db.Model):
 class ChatMessage(db.Model):
     __tablename__ = "chat_messages"
     id = db.Column(db.Integer, primary_key=True)
-    session_id = db.Column(db.Integer, db.ForeignKey("chat_sessions.id"), nullable=False)
+    session_id = db.Column(db.Integer, db.ForeignKey("chat_sessions.id"), nullable=False, index=True)
     sender = db.Column(db.String(10))  # "user" atau "bot"
     message = db.Column(db.Text, nullable=False)  # ganti text -> message biar sama dengan route
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
@@ -68,9 +72,58 @@ class TopicStats(db.Model):
     __tablename__ = "topic_stats"
     id = db.Column(db.Integer, primary_key=True)
     topic_name = db.Column(db.String(255), nullable=False)
+    topic_hash = db.Column(db.String(40), nullable=False, unique=True, index=True)  # sha1 topik ternormalisasi
     mention_count = db.Column(db.Integer, default=1)
     last_updated = db.Column(db.DateTime, default=datetime.utcnow)
 
+
+def topic_hash(topic_name):
+    """Kunci unik topik: lowercase + spasi dirapikan, lalu di-hash (sha1)."""
+    key = " ".join(topic_name.lower().split())
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def dataset_hash(pertanyaan, jawaban):
+    """Hash isi satu pasangan Q&A, dipakai sinkronisasi dataset diferensial."""
+    return hashlib.sha1(f"{pertanyaan}\x1f{jawaban}".encode("utf-8")).hexdigest()
+
+# ======================
+# TABEL ROLLUP STATISTIK (dashboard admin)
+# ======================
+# Diisi oleh backend/utils/rollups.py secara inkremental
+class StatsDaily(db.Model):
+    __tablename__ = "stats_daily"
+    day = db.Column(db.Date, primary_key=True)
+    questions = db.Column(db.Integer, nullable=False, default=0)   # ChatMessage sender=user
+    logins = db.Column(db.Integer, nullable=False, default=0)
+    answers = db.Column(db.Integer, nullable=False, default=0)     # ChatHistory
+    confidence_sum = db.Column(db.Float, nullable=False, default=0.0)
+    confidence_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class StatsHourly(db.Model):
+    __tablename__ = "stats_hourly"
+    hour = db.Column(db.DateTime, primary_key=True)  # dibulatkan ke awal jam (UTC)
+    questions = db.Column(db.Integer, nullable=False, default=0)
+    logins = db.Column(db.Integer, nullable=False, default=0)
+    answers = db.Column(db.Integer, nullable=False, default=0)
+    confidence_sum = db.Column(db.Float, nullable=False, default=0.0)
+    confidence_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class StatsSourceDaily(db.Model):
+    __tablename__ = "stats_source_daily"
+    day = db.Column(db.Date, primary_key=True)
+    source = db.Column(db.String(50), primary_key=True)
+    answers = db.Column(db.Integer, nullable=False, default=0)
+
+
+class RollupWatermark(db.Model):
+    __tablename__ = "rollup_watermark"
+    name = db.Column(db.String(50), primary_key=True)  # tabel sumber
+    last_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 # ======================
 # TABEL DATASET & PERATURAN
 # ======================
@@ -79,7 +132,16 @@ class Dataset(db.Model):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     pertanyaan = db.Column(db.Text, nullable=False)
     jawaban = db.Column(db.Text, nullable=False)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    content_hash = db.Column(db.String(40), nullable=True, index=True)  # sha1 (pertanyaan, jawaban)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+# FULLTEXT untuk pencarian dataset di MySQL (dialek lain memakai token index in-app)
+event.listen(
+    Dataset.__table__,
+    "after_create",
+    DDL("CREATE FULLTEXT INDEX ft_dataset_text ON dataset (pertanyaan, jawaban)").execute_if(dialect="mysql"),
+)
 
 
 class Peraturan(db.Model):
@@ -87,5 +149,45 @@ class Peraturan(db.Model):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     sentence_number = db.Column(db.Integer, nullable=True)
     sentence = db.Column(db.Text, nullable=False)  
-    filename = db.Column(db.String(255), nullable=True)  
-    uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    filename = db.Column(db.String(255), nullable=True, index=True)  # dokumen sumber
+    uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # passage hasil RegulationChunker (NULL untuk baris kalimat lama)
+    passage_id = db.Column(db.String(160), nullable=True)    # mis. "bab-ii/pasal-12/ayat-1"
+    label = db.Column(db.String(255), nullable=True)         # mis. "Pasal 12 ayat (1)"
+    start_offset = db.Column(db.Integer, nullable=True)      # offset byte ke PeraturanDocument.text_blob
+    end_offset = db.Column(db.Integer, nullable=True)
+
+
+class PeraturanDocument(db.Model):
+    """Satu baris per dokumen peraturan di korpus (kunci: filename + hash isi file)."""
+    __tablename__ = "peraturan_documents"
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    filename = db.Column(db.String(255), nullable=False, unique=True)
+    content_hash = db.Column(db.String(64), nullable=False)  # sha256 file asli
+    sentence_count = db.Column(db.Integer, nullable=False, default=0)
+    uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # teks hasil ekstraksi (UTF-8) yang menjadi acuan offset passage; deferred →
+    # tidak ikut terbaca oleh query daftar dokumen
+    text_blob = deferred(db.Column(db.LargeBinary().with_variant(mysql.LONGBLOB(), "mysql"), nullable=True))
+
+
+class UploadedFile(db.Model):
+    """Manifest upload (dataset / pdf / word) di content-addressed store."""
+    __tablename__ = "uploaded_files"
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    kind = db.Column(db.String(20), nullable=False)  # dataset | pdf | word
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    original_name = db.Column(db.String(255), nullable=False)
+    stored_path = db.Column(db.String(500), nullable=False)  # relatif terhadap UPLOADS_DIR
+    size = db.Column(db.BigInteger, nullable=False, default=0)
+    page_count = db.Column(db.Integer, nullable=True)
+    row_count = db.Column(db.Integer, nullable=True)  # baris CSV / kalimat peraturan
+    table_hash = db.Column(db.String(64), nullable=True)  # dataset: sidik isi tabel setelah upload selesai
+    status = db.Column(db.String(20), nullable=False, default="received")  # received | processing | done | skipped | failed
+    error = db.Column(db.Text, nullable=True)
+    timings = db.Column(db.JSON, nullable=True)  # detik per tahap
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (db.Index("ix_uploaded_files_kind_created", "kind", "created_at"),)
\ No newline at end of file
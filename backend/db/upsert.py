@@ -0,0 +1,46 @@
+from sqlalchemy import func
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from backend.config import db
+
+# ==============================================================
+# 🔹 UPSERT LINTAS DIALEK
+# ==============================================================
+# Satu statement INSERT untuk banyak baris; baris yang kuncinya sudah ada
+# langsung di-update oleh database (atomik, tanpa SELECT dulu):
+#   MySQL              → INSERT ... ON DUPLICATE KEY UPDATE
+#   SQLite / Postgres  → INSERT ... ON CONFLICT (...) DO UPDATE
+#
+# increment : kolom yang dijumlahkan  (col = col + nilai baru)
+# replace   : kolom yang ditimpa      (col = nilai baru)
+# maximum   : kolom yang diambil nilai terbesarnya
+
+
+def upsert(model, rows, key_columns, increment=(), replace=(), maximum=()):
+    """Jalankan upsert untuk list dict `rows` pada session aktif (tanpa commit)."""
+    if not rows:
+        return
+    table = getattr(model, "__table__", model)
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == "mysql":
+        stmt = mysql.insert(table)
+        stmt = stmt.on_duplicate_key_update(**_updates(table, stmt.inserted, increment, replace, maximum, dialect))
+    elif dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite if dialect == "sqlite" else postgresql).insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_=_updates(table, stmt.excluded, increment, replace, maximum, dialect),
+        )
+    else:
+        raise NotImplementedError(f"❌ Upsert belum didukung untuk dialek '{dialect}'")
+
+    db.session.execute(stmt, rows)
+
+
+def _updates(table, new, increment, replace, maximum, dialect):
+    greatest = func.max if dialect == "sqlite" else func.greatest
+    updates = {c: table.c[c] + new[c] for c in increment}
+    updates.update({c: new[c] for c in replace})
+    updates.update({c: greatest(table.c[c], new[c]) for c in maximum})
+    return updates
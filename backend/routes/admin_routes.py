@@ -1,22 +1,39 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_cors import cross_origin
-from backend.config import db, UPLOADS_DIR
+from backend.config import db, ADMIN_CACHE_ENABLED, ADMIN_CACHE_TTL_DASHBOARD, ADMIN_CACHE_TTL_LISTS
 from backend.db.models import (
     User, ChatHistory, TopicStats,
     LoginHistory, ChatSession, ChatMessage,
-    Dataset, Peraturan
+    Dataset, Peraturan, PeraturanDocument, topic_hash
 )
 from sqlalchemy import func, desc
 from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
-from backend.utils.load_data import load_dataset_to_db, load_peraturan_to_db
+from backend.utils.load_data import load_dataset_to_db, load_peraturan_file
 import traceback
-from backend.utils.pdf_parser import save_pdf_to_txt, save_word_to_txt
-from backend.utils.retrain_model import retrain_main_from_db, retrain_all
+from backend.utils.retrain_jobs import RetrainConflict, retrain_jobs
+from backend.utils.retrain_model import update_fallback_documents
+from backend.utils import upload_store
+from backend.utils.pdf_parser import pdf_page_count
+from backend.utils import rollups
+from backend.utils import dataset_search
+from backend.utils.response_cache import ResponseCache
+from backend.utils import model_registry as registry
 import os
+import json
+import time
+import multiprocessing as mp
 
 admin_bp = Blueprint("admin_bp", __name__, url_prefix="/api/admin")
 
+# Cache response endpoint baca (dashboard, users, dataset, uploads)
+admin_cache = ResponseCache(enabled=ADMIN_CACHE_ENABLED)
+
+# Compactor rollup dashboard (tidak dijalankan di proses anak retrain)
+rollup_compactor = rollups.RollupCompactor()
+if mp.parent_process() is None:
+    rollup_compactor.start()
+
 
 # ================================
 # 🔐 LOGIN ADMIN
@@ -41,70 +58,45 @@ def admin_login():
 # 📊 DASHBOARD
 # ======================
 @admin_bp.route("/dashboard_stats", methods=["GET"])
+@admin_cache.cached("dashboard", ttl=ADMIN_CACHE_TTL_DASHBOARD)
 def dashboard_stats():
     try:
         today = datetime.utcnow().date()
 
         total_users = User.query.filter_by(role="user").count()
 
-        total_questions_today = ChatMessage.query.filter(
-            ChatMessage.sender == "user",
-            func.date(ChatMessage.timestamp) == today
-        ).count()
-
-        total_logins_today = LoginHistory.query.filter(
-            func.date(LoginHistory.login_time) == today
-        ).count()
-
-        avg_confidence = (
-            db.session.query(func.avg(ChatHistory.confidence))
-            .filter(func.date(ChatHistory.created_at) == today)
-            .scalar() or 0
-        )
-
+        # Kartu & grafik dibaca dari tabel rollup (O(hari), bukan O(pesan))
         one_week_ago = today - timedelta(days=6)
         start_of_week = datetime.combine(one_week_ago, datetime.min.time())
-        end_of_today = datetime.combine(today, datetime.max.time())
+        week = rollups.daily_rows(one_week_ago, today)
+        today_row = next((row for row in week if row.day == today), None)
 
-        # Grafik chat activity
-        chat_activity = (
-            db.session.query(
-                func.date(ChatMessage.timestamp).label("tanggal"),
-                func.count(ChatMessage.id).label("jumlah")
-            )
-            .filter(
-                ChatMessage.sender == "user",
-                ChatMessage.timestamp >= start_of_week,
-                ChatMessage.timestamp <= end_of_today
-            )
-            .group_by(func.date(ChatMessage.timestamp))
-            .order_by(func.date(ChatMessage.timestamp))
-            .all()
+        total_questions_today = today_row.questions if today_row else 0
+        total_logins_today = today_row.logins if today_row else 0
+        avg_confidence = (
+            today_row.confidence_sum / today_row.confidence_count
+            if today_row and today_row.confidence_count else 0
         )
 
+        # Grafik chat & login activity (hanya hari yang ada aktivitasnya)
         chat_data = [
-            {"tanggal": str(row.tanggal), "jumlah": row.jumlah}
-            for row in chat_activity
+            {"tanggal": str(row.day), "jumlah": row.questions}
+            for row in week if row.questions
         ]
-
-        # Grafik login activity
-        login_activity = (
-            db.session.query(
-                func.date(LoginHistory.login_time).label("tanggal"),
-                func.count(LoginHistory.id).label("jumlah")
-            )
-            .filter(
-                LoginHistory.login_time >= start_of_week,
-                LoginHistory.login_time <= end_of_today
-            )
-            .group_by(func.date(LoginHistory.login_time))
-            .order_by(func.date(LoginHistory.login_time))
-            .all()
-        )
-
         login_data = [
-            {"tanggal": str(row.tanggal), "jumlah": row.jumlah}
-            for row in login_activity
+            {"tanggal": str(row.day), "jumlah": row.logins}
+            for row in week if row.logins
+        ]
+
+        # Aktivitas per jam hari ini & sumber jawaban seminggu terakhir
+        start_of_today = datetime.combine(today, datetime.min.time())
+        hourly_data = [
+            {"jam": row.hour.strftime("%H:00"), "pertanyaan": row.questions, "login": row.logins}
+            for row in rollups.hourly_rows(start_of_today, start_of_today + timedelta(hours=23))
+        ]
+        source_data = [
+            {"sumber": source, "jumlah": n}
+            for source, n in sorted(rollups.source_totals(one_week_ago, today).items(), key=lambda x: -x[1])
         ]
 
         # Top 5 topics
@@ -162,6 +154,8 @@ def dashboard_stats():
                 "chat_activity": chat_data,
                 "login_activity": login_data,
                 "top_topics": top_topic_data,
+                "hourly_activity": hourly_data,
+                "answer_sources": source_data,
             },
             "recent_conversations": recent_chat_data,
         })
@@ -175,6 +169,7 @@ def dashboard_stats():
 # 👥 MANAJEMEN USER
 # ================================
 @admin_bp.route("/users", methods=["GET", "POST"])
+@admin_cache.cached("users", ttl=ADMIN_CACHE_TTL_LISTS)
 def users_list_add():
     if request.method == "GET":
         users = User.query.filter_by(role="user").all()
@@ -204,6 +199,7 @@ def users_list_add():
         )
         db.session.add(new_user)
         db.session.commit()
+        admin_cache.invalidate("users", "dashboard")
 
         return jsonify({"message": f"User {name} berhasil ditambahkan"}), 201
 
@@ -223,6 +219,7 @@ def user_update_delete(npm):
             user.password = generate_password_hash(data["password"])
 
         db.session.commit()
+        admin_cache.invalidate("users", "dashboard")
         return jsonify({"message": f"User {npm} berhasil diperbarui"})
 
     if request.method == "DELETE":
@@ -234,10 +231,11 @@ def user_update_delete(npm):
             ChatHistory.query.filter_by(npm=user.npm).delete()
             db.session.delete(s)
 
-        TopicStats.query.filter_by(topic_name=user.name).delete()
+        TopicStats.query.filter_by(topic_hash=topic_hash(user.name)).delete()
 
         db.session.delete(user)
         db.session.commit()
+        admin_cache.invalidate("users", "dashboard")
 
         return jsonify({"message": f"User {npm} berhasil dihapus beserta seluruh riwayatnya"})
 
@@ -251,44 +249,103 @@ def upload_dataset():
         return jsonify({"error": "Tidak ada file yang diunggah"}), 400
 
     file = request.files["file"]
-    dataset_dir = os.path.join(UPLOADS_DIR, "datasets")
-    os.makedirs(dataset_dir, exist_ok=True)
+    record = upload_store.save_upload(file, "dataset")
+    admin_cache.invalidate("uploads")
 
-    save_path = os.path.join(dataset_dir, file.filename)
-    file.save(save_path)
+    mode = "replace" if request.form.get("mode") == "replace" else "sync"
+    if mode == "sync" and request.form.get("force") != "1" and upload_store.is_current(record):
+        upload_store.mark(record, "skipped")
+        return jsonify({
+            "message": f"Dataset '{record.original_name}' sama dengan dataset aktif, tidak diproses ulang",
+            "status": "unchanged",
+            "inserted_rows": 0,
+            "skipped_rows": 0,
+            "upload": upload_store.serialize(record),
+        })
 
     try:
-        inserted, skipped = load_dataset_to_db(save_path)
-        msg = f"Dataset '{file.filename}' berhasil diunggah dan disimpan ke database"
+        upload_store.mark(record, "processing")
+        started = time.perf_counter()
+        report, skipped = load_dataset_to_db(upload_store.absolute_path(record), remove_file=False, mode=mode)
+        total = time.perf_counter() - started
+        upload_store.mark(
+            record, "done", row_count=report["csv"]["rows"], table_hash=upload_store.dataset_table_hash(),
+            timings={"parse": total - report["db_seconds"], "ingest": report["db_seconds"]},
+        )
+        admin_cache.invalidate("dataset", "uploads")
+        msg = (
+            f"Dataset '{record.original_name}' berhasil disinkronkan: {report['added']} ditambah, "
+            f"{report['changed']} diubah, {report['removed']} dihapus"
+        )
         if skipped:
             msg += f" (note: {skipped} baris dilewati karena format tidak sesuai)"
         return jsonify({
             "message": msg,
-            "inserted_rows": inserted,
-            "skipped_rows": skipped
+            "inserted_rows": report["added"],
+            "skipped_rows": skipped,
+            "diff": report,
+            "upload": upload_store.serialize(record),
         })
     except Exception as e:
         # print full traceback to server log for debugging
         print("❌ Error di upload_dataset:")
         traceback.print_exc()
+        db.session.rollback()
+        upload_store.mark(record, "failed", error=str(e))
+        admin_cache.invalidate("uploads")
         return jsonify({"error": str(e)}), 500
 
 
 # ================================
 # 📄 LIST & DELETE DATASET
 # ================================
+# GET /dataset?limit=50&cursor=...&q=...&sort=id|updated_at&order=desc|asc
+#   → {"data": [...], "next_cursor": ...}
+# GET /dataset?export=ndjson|json → seluruh hasil di-stream per batch
 @admin_bp.route("/dataset", methods=["GET"])
+@admin_cache.cached("dataset", ttl=ADMIN_CACHE_TTL_LISTS)
 def get_dataset():
-    data = Dataset.query.order_by(Dataset.id.desc()).all()
-    return jsonify([
-        {
-            "id": d.id,
-            "pertanyaan": d.pertanyaan,
-            "jawaban": d.jawaban,
-            "updated_at": d.updated_at.strftime("%Y-%m-%d %H:%M:%S")
-        }
-        for d in data
-    ])
+    q = request.args.get("q", "").strip()
+    sort = request.args.get("sort", "id")
+    descending = request.args.get("order", "desc") != "asc"
+    if sort not in dataset_search.SORT_COLUMNS:
+        return jsonify({"error": f"sort harus salah satu dari: {', '.join(dataset_search.SORT_COLUMNS)}"}), 400
+
+    export = request.args.get("export")
+    if export in ("ndjson", "json"):
+        return _export_dataset(export, q, sort, descending)
+
+    limit = max(1, min(request.args.get("limit", 50, type=int), 500))
+    try:
+        rows, next_cursor = dataset_search.fetch_page(
+            q=q, sort=sort, descending=descending,
+            cursor=request.args.get("cursor"), limit=limit,
+        )
+    except dataset_search.InvalidCursor as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "data": [dataset_search.serialize(d) for d in rows],
+        "next_cursor": next_cursor,
+    })
+
+
+def _export_dataset(fmt, q, sort, descending):
+    def generate():
+        rows = dataset_search.iter_rows(q=q, sort=sort, descending=descending)
+        if fmt == "ndjson":
+            for d in rows:
+                yield json.dumps(dataset_search.serialize(d), ensure_ascii=False) + "\n"
+            return
+        yield "["
+        for i, d in enumerate(rows):
+            yield ("," if i else "") + json.dumps(dataset_search.serialize(d), ensure_ascii=False)
+        yield "]"
+
+    mimetype = "application/x-ndjson" if fmt == "ndjson" else "application/json"
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f"attachment; filename=dataset.{fmt}"
+    return response
 
 
 @admin_bp.route("/dataset/<int:id>", methods=["DELETE"])
@@ -299,6 +356,7 @@ def delete_dataset(id):
 
     db.session.delete(data)
     db.session.commit()
+    admin_cache.invalidate("dataset")
 
     return jsonify({"message": f"Dataset ID {id} berhasil dihapus"})
 
@@ -312,16 +370,11 @@ def upload_pdf():
         return jsonify({"error": "Tidak ada file yang diunggah"}), 400
 
     file = request.files["file"]
-    pdf_dir = os.path.join(UPLOADS_DIR, "pdfs")
-    os.makedirs(pdf_dir, exist_ok=True)
-
-    pdf_path = os.path.join(pdf_dir, file.filename)
-    file.save(pdf_path)
+    record = upload_store.save_upload(file, "pdf")
+    admin_cache.invalidate("uploads")
 
     try:
-        save_pdf_to_txt(pdf_path)
-        load_peraturan_to_db()
-        return jsonify({"message": f"PDF '{file.filename}' berhasil diproses dan disimpan ke database"})
+        return jsonify(_ingest_peraturan_upload(record, "PDF"))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -340,84 +393,192 @@ def upload_word():
     if not (file.filename.lower().endswith('.docx') or file.filename.lower().endswith('.doc')):
         return jsonify({"error": "Hanya file .docx atau .doc yang diizinkan"}), 400
     
-    word_dir = os.path.join(UPLOADS_DIR, "words")
-    os.makedirs(word_dir, exist_ok=True)
-
-    word_path = os.path.join(word_dir, file.filename)
-    file.save(word_path)
+    record = upload_store.save_upload(file, "word")
+    admin_cache.invalidate("uploads")
 
     try:
-        save_word_to_txt(word_path)
-        load_peraturan_to_db()
-        return jsonify({"message": f"File Word '{file.filename}' berhasil diproses dan disimpan ke database"})
+        return jsonify(_ingest_peraturan_upload(record, "File Word"))
     except Exception as e:
         print("❌ Error di upload_word:")
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
 
+def _ingest_peraturan_upload(record, label):
+    """
+    Ingest satu dokumen (baris UploadedFile) ke korpus + perbarui index
+    fallback untuk dokumen itu saja. Status & timing dicatat di manifest upload.
+    """
+    name = record.original_name
+    if request.form.get("force") != "1" and upload_store.is_current(record):
+        upload_store.mark(record, "skipped")
+        admin_cache.invalidate("uploads")
+        return {
+            "filename": name,
+            "status": "unchanged",
+            "message": f"{label} '{name}' sudah ada di korpus, tidak diproses ulang",
+            "upload": upload_store.serialize(record),
+        }
+
+    path = upload_store.absolute_path(record)
+    try:
+        upload_store.mark(record, "processing")
+        started = time.perf_counter()
+        pages = pdf_page_count(path) if record.kind == "pdf" else None
+        report = load_peraturan_file(path, filename=name, content_hash=record.sha256,
+                                     force=request.form.get("force") == "1")
+        ingested = time.perf_counter()
+        if report["status"] != "unchanged":
+            report["version"] = update_fallback_documents([name])["version"]
+        upload_store.mark(
+            record, "done" if report["status"] != "unchanged" else "skipped",
+            page_count=pages, row_count=report["sentences"],
+            timings={"parse_ingest": ingested - started, "index": time.perf_counter() - ingested},
+        )
+    except Exception as e:
+        db.session.rollback()
+        upload_store.mark(record, "failed", error=str(e))
+        raise
+    finally:
+        admin_cache.invalidate("uploads")
+
+    report["message"] = f"{label} '{name}' berhasil diproses dan disimpan ke database"
+    report["upload"] = upload_store.serialize(record)
+    return report
+
+
+# ================================
+# 📚 DOKUMEN KORPUS PERATURAN
+# ================================
+@admin_bp.route("/peraturan/documents", methods=["GET"])
+def list_peraturan_documents():
+    docs = PeraturanDocument.query.order_by(PeraturanDocument.filename).all()
+    return jsonify([{
+        "filename": d.filename,
+        "content_hash": d.content_hash,
+        "sentences": d.sentence_count,
+        "uploaded_at": d.uploaded_at.strftime("%Y-%m-%d %H:%M:%S") if d.uploaded_at else None,
+        "updated_at": d.updated_at.strftime("%Y-%m-%d %H:%M:%S") if d.updated_at else None,
+    } for d in docs])
+
+
+@admin_bp.route("/peraturan/documents/<path:filename>", methods=["DELETE"])
+def delete_peraturan_document(filename):
+    doc = PeraturanDocument.query.filter_by(filename=filename).first()
+    removed = Peraturan.query.filter_by(filename=filename).delete(synchronize_session=False)
+    if doc is None and not removed:
+        return jsonify({"error": "Dokumen tidak ditemukan"}), 404
+    if doc is not None:
+        db.session.delete(doc)
+    db.session.commit()
+
+    index = update_fallback_documents([filename])
+    return jsonify({
+        "message": f"Dokumen '{filename}' dihapus dari korpus",
+        "sentences": removed,
+        "version": index["version"],
+    })
+
+
 # ================================
-# 📁 LIST UPLOADED FILES (datasets / pdfs)
+# 📁 LIST UPLOADED FILES (datasets / peraturan)
 # ================================
+# Dibaca dari manifest uploaded_files (satu query ber-index), bukan scan folder
 @admin_bp.route("/uploads/datasets", methods=["GET"])
+@admin_cache.cached("uploads", ttl=ADMIN_CACHE_TTL_LISTS)
 def list_uploaded_datasets():
-    try:
-        dataset_dir = os.path.join(UPLOADS_DIR, "datasets")
-        files = []
-        if os.path.isdir(dataset_dir):
-            for f in sorted(os.listdir(dataset_dir), key=lambda x: os.path.getmtime(os.path.join(dataset_dir, x)), reverse=True):
-                if not f.lower().endswith('.csv'):
-                    continue
-                fp = os.path.join(dataset_dir, f)
-                try:
-                    stat = os.stat(fp)
-                    files.append({
-                        "filename": f,
-                        "uploaded_at": datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S"),
-                        "size": stat.st_size
-                    })
-                except Exception:
-                    continue
-        return jsonify(files)
-    except Exception as e:
-        print("❌ Error listing dataset uploads:", e)
-        return jsonify({"error": str(e)}), 500
+    return jsonify([upload_store.serialize(r) for r in upload_store.list_uploads(["dataset"])])
 
 
 @admin_bp.route("/uploads/pdfs", methods=["GET"])
+@admin_cache.cached("uploads", ttl=ADMIN_CACHE_TTL_LISTS)
 def list_uploaded_pdfs():
-    try:
-        pdf_dir = os.path.join(UPLOADS_DIR, "pdfs")
-        files = []
-        if os.path.isdir(pdf_dir):
-            for f in sorted(os.listdir(pdf_dir), key=lambda x: os.path.getmtime(os.path.join(pdf_dir, x)), reverse=True):
-                if not f.lower().endswith('.pdf'):
-                    continue
-                fp = os.path.join(pdf_dir, f)
-                try:
-                    stat = os.stat(fp)
-                    files.append({
-                        "filename": f,
-                        "uploaded_at": datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S"),
-                        "size": stat.st_size
-                    })
-                except Exception:
-                    continue
-        return jsonify(files)
-    except Exception as e:
-        print("❌ Error listing pdf uploads:", e)
-        return jsonify({"error": str(e)}), 500
+    return jsonify([upload_store.serialize(r) for r in upload_store.list_uploads(["pdf", "word"])])
 
 # ================================
-# 🧠 RETRAIN MODEL LSTM + FALLBACK
+# 🧠 RETRAIN MODEL LSTM + FALLBACK (ASYNC JOB)
 # ================================
 @admin_bp.route("/retrain", methods=["POST"])
 def retrain():
+    data = request.get_json(silent=True) or {}
     try:
-        # retrain both main model and fallback
-        retrain_all()
-        return jsonify({"message": "Model berhasil dilatih ulang"})
-    except Exception as e:
-        print("❌ Error di retrain:")
-        traceback.print_exc()
-        return jsonify({"error": str(e)}), 500
+        epochs = int(data.get("epochs", 30))
+    except (TypeError, ValueError):
+        return jsonify({"error": "epochs harus berupa angka"}), 400
+    if epochs < 1:
+        return jsonify({"error": "epochs minimal 1"}), 400
+    backend = data.get("backend")
+    if backend not in (None, "lstm", "linear"):
+        return jsonify({"error": "backend harus 'lstm' atau 'linear'"}), 400
+
+    try:
+        job, coalesced = retrain_jobs.submit(epochs=epochs, backend=backend)
+    except RetrainConflict as e:
+        return jsonify({"error": str(e), "job_id": e.job["job_id"], "job": e.job}), 409
+    msg = "Retrain digabung dengan job yang sudah antre" if coalesced else "Retrain dimulai di background"
+    return jsonify({"message": msg, "job_id": job["job_id"], "coalesced": coalesced, "job": job}), 202
+
+
+@admin_bp.route("/retrain/jobs", methods=["GET"])
+def retrain_job_list():
+    return jsonify(retrain_jobs.list())
+
+
+@admin_bp.route("/retrain/<string:job_id>", methods=["GET"])
+def retrain_status(job_id):
+    job = retrain_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job retrain tidak ditemukan"}), 404
+    return jsonify(job)
+
+
+@admin_bp.route("/retrain/<string:job_id>/cancel", methods=["POST"])
+def retrain_cancel(job_id):
+    job = retrain_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Job retrain tidak ditemukan"}), 404
+    return jsonify({"message": f"Permintaan pembatalan job {job_id} diterima", "job": job})
+
+
+# ================================
+# 📦 VERSI MODEL & ROLLBACK
+# ================================
+@admin_bp.route("/models", methods=["GET"])
+def list_model_versions():
+    versions = []
+    for v in registry.list_versions():
+        manifest = registry.read_manifest(v) or {"version": v}
+        versions.append(manifest)
+    return jsonify({"current": registry.current_version(), "versions": versions})
+
+
+@admin_bp.route("/models/rollback", methods=["POST"])
+def rollback_model():
+    data = request.json or {}
+    version = data.get("version")
+    current = registry.current_version()
+
+    if not version:
+        # tanpa parameter: kembali ke versi sebelum versi aktif
+        versions = registry.list_versions()
+        older = [v for v in versions if current and v < current]
+        if not older:
+            return jsonify({"error": "Tidak ada versi sebelumnya untuk rollback"}), 400
+        version = older[0]
+
+    try:
+        registry.set_current(version)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+
+    return jsonify({"message": f"Model dikembalikan ke versi {version}", "previous": current, "current": version})
+
+
+# ================================
+# 🗄️ STATISTIK CACHE ADMIN
+# ================================
+@admin_bp.route("/cache/stats", methods=["GET"])
+def admin_cache_stats():
+    return jsonify(admin_cache.stats())
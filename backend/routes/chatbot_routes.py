@@ -1,44 +1,154 @@
 from flask import Blueprint, request, jsonify
 from flask_cors import cross_origin
 import numpy as np
-import pickle, os
+import multiprocessing as mp
+import time
 from datetime import datetime
-from sqlalchemy import func
 from sklearn.metrics.pairwise import cosine_similarity
 
-from backend.config import MODEL_DIR, db
-from backend.db.models import ChatHistory, TopicStats
-
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing.sequence import pad_sequences
+from backend.config import (
+    db,
+    CHAT_BATCH_MAX_SIZE, CHAT_BATCH_MAX_WAIT_MS, FAST_BOOT, FALLBACK_TOP_K, FALLBACK_CONTEXT,
+    ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL, ANSWER_CACHE_SHARED_PATH, ANSWER_CACHE_SHARED_MAX_ROWS,
+    CHAT_WRITE_BEHIND, CHAT_WRITER_QUEUE_SIZE, CHAT_WRITER_BATCH_SIZE,
+    CHAT_WRITER_FLUSH_INTERVAL, CHAT_WRITER_JOURNAL,
+    QUESTION_LOOKUP_ENABLED, QUESTION_LOOKUP_LOG_EVERY,
+)
+from backend.db.models import ChatSession, ChatMessage
+from backend.utils.chat_writer import ChatWriter, chat_record, persist_chat_records, stage_chat_records
+from backend.utils.answer_cache import AnswerCache, normalize_question
+from backend.utils.inference_batcher import InferenceBatcher
+from backend.utils.model_loader import ModelState
+from backend.utils.question_lookup import LookupStats
 
 chat_bp = Blueprint("chat_bp", __name__)
 
 # ===============================
-# LOAD MAIN MODEL (LSTM)
+# LOAD MODEL (LSTM / LINEAR + BM25 FALLBACK)
 # ===============================
-MAIN_MODEL_PATH = os.path.join(MODEL_DIR, "main_model.h5")
-TOKEN_MAIN = os.path.join(MODEL_DIR, "tokenizer_main.pkl")
-LABEL_MAIN = os.path.join(MODEL_DIR, "label_main.pkl")
+# FAST_BOOT: artefak dimuat paralel di background, server langsung bisa bind.
+# Tanpa FAST_BOOT: dimuat sinkron saat import seperti sebelumnya.
+# Watcher menukar model secara otomatis setelah retrain/rollback.
+# Proses anak retrain job (multiprocessing spawn) ikut meng-import modul ini,
+# tetapi tidak perlu memuat model serving.
+model_state = ModelState()
 
-main_model = load_model(MAIN_MODEL_PATH) if os.path.exists(MAIN_MODEL_PATH) else None
-tokenizer_main = pickle.load(open(TOKEN_MAIN, "rb")) if os.path.exists(TOKEN_MAIN) else None
-le_main = pickle.load(open(LABEL_MAIN, "rb")) if os.path.exists(LABEL_MAIN) else None
+# Cache jawaban: entri ditandai fingerprint model, dan dikosongkan setiap swap
+answer_cache = AnswerCache(
+    max_entries=ANSWER_CACHE_SIZE,
+    ttl=ANSWER_CACHE_TTL,
+    shared_path=ANSWER_CACHE_SHARED_PATH,
+    shared_max_rows=ANSWER_CACHE_SHARED_MAX_ROWS,
+)
+model_state.add_listener(lambda state: answer_cache.invalidate(keep_version=state.fingerprint))
+lookup_stats = LookupStats(log_every=QUESTION_LOOKUP_LOG_EVERY)
 
-# ===============================
-# LOAD SEMANTIC FALLBACK (TF-IDF)
-# ===============================
-VEC_PATH = os.path.join(MODEL_DIR, "fallback_vectorizer.pkl")
-MAT_PATH = os.path.join(MODEL_DIR, "fallback_matrix.pkl")
-TEXT_PATH = os.path.join(MODEL_DIR, "fallback_texts.pkl")
-
-vectorizer = pickle.load(open(VEC_PATH, "rb")) if os.path.exists(VEC_PATH) else None
-matrix = pickle.load(open(MAT_PATH, "rb")) if os.path.exists(MAT_PATH) else None
-fallback_texts = pickle.load(open(TEXT_PATH, "rb")) if os.path.exists(TEXT_PATH) else None
+if mp.parent_process() is None:
+    if FAST_BOOT:
+        model_state.start_background()
+    else:
+        model_state.load()
+    model_state.start_watcher()
 
 THRESHOLD = 0.3  # 🔹 Diturunkan dari 0.6 agar LSTM lebih sering digunakan
 
 
+# ======================================================
+# BATCH INFERENCE (MODEL UTAMA + FALLBACK)
+# ======================================================
+def predict_batch(questions):
+    """
+    Jawab sekumpulan pertanyaan sekaligus.
+    Mengembalikan list dict {answer, source, confidence, references} sesuai urutan input.
+    """
+    bundle = model_state.bundle
+    if bundle is None or not bundle.has_main:
+        return [_result("⚠️ Model utama belum tersedia.", "none", 0.0) for _ in questions]
+
+    # =====================================
+    # 1) UTAMA → backend model utama (satu kali predict untuk seluruh batch)
+    # =====================================
+    pred = bundle.main.predict(questions)
+    threshold = THRESHOLD if bundle.main.threshold is None else bundle.main.threshold
+
+    confidences = pred.max(axis=1)
+    label_ids = pred.argmax(axis=1)
+    results = [None] * len(questions)
+
+    confident = [i for i, c in enumerate(confidences) if c >= threshold]
+    if confident:
+        answers = bundle.main.answers(label_ids[confident])
+        for i, answer in zip(confident, answers):
+            results[i] = _result(answer, "dataset", float(confidences[i]))
+
+    # =====================================
+    # 2) FALLBACK → BM25 INVERTED INDEX (top-k + konteks)
+    #    atau TF-IDF cosine untuk artefak lama tanpa index
+    # =====================================
+    uncertain = [i for i, c in enumerate(confidences) if c < threshold]
+    if uncertain:
+        if bundle.fallback_index is not None and bundle.texts:
+            for i in uncertain:
+                hits = bundle.fallback_index.search(questions[i], k=FALLBACK_TOP_K, context=FALLBACK_CONTEXT)
+                if hits:
+                    references = [_reference(bundle, hit) for hit in hits]
+                    results[i] = _result(_cite(references[0]), "peraturan", hits[0]["confidence"], references)
+                else:
+                    results[i] = _result("⚠️ Tidak ditemukan peraturan yang relevan.", "peraturan", 0.0)
+        elif bundle.has_fallback:
+            q_vec = bundle.vectorizer.transform([questions[i] for i in uncertain])
+            sims = cosine_similarity(q_vec, bundle.matrix)
+            best = sims.argmax(axis=1)
+            for row, i in enumerate(uncertain):
+                idx = int(best[row])
+                results[i] = _result(bundle.texts[idx], "peraturan", float(sims[row, idx]))
+        else:
+            for i in uncertain:
+                results[i] = _result("⚠️ Model fallback (peraturan) belum tersedia.", "none", float(confidences[i]))
+
+    return results
+
+
+def _result(answer, source, confidence, references=None):
+    return {"answer": answer, "source": source, "confidence": confidence, "references": references or []}
+
+
+def _reference(bundle, hit):
+    """Kalimat / passage hasil BM25 beserta tetangganya sebagai konteks."""
+    return {
+        "kalimat": bundle.texts[hit["doc"]],
+        "pasal": hit.get("label"),  # mis. "Pasal 12 ayat (1)"; None untuk korpus kalimat lama
+        "skor": round(hit["score"], 4),
+        "filename": hit["filename"],
+        "sentence_number": hit["sentence_number"],
+        "konteks": [bundle.texts[d] for d in hit["context"]],
+    }
+
+
+def _cite(reference):
+    """Jawaban fallback diawali kutipan pasalnya jika diketahui."""
+    if reference["pasal"]:
+        return f"{reference['pasal']}: {reference['kalimat']}"
+    return reference["kalimat"]
+
+
+chat_batcher = InferenceBatcher(
+    predict_batch,
+    max_batch_size=CHAT_BATCH_MAX_SIZE,
+    max_wait_ms=CHAT_BATCH_MAX_WAIT_MS,
+    name="chat-inference",
+)
+
+chat_writer = ChatWriter(
+    max_queue=CHAT_WRITER_QUEUE_SIZE,
+    batch_size=CHAT_WRITER_BATCH_SIZE,
+    flush_interval=CHAT_WRITER_FLUSH_INTERVAL,
+    journal_path=CHAT_WRITER_JOURNAL,
+)
+if CHAT_WRITE_BEHIND and mp.parent_process() is None:
+    chat_writer.start()
+
+
 # ======================================================
 # CHAT ENDPOINT
 # ======================================================
@@ -52,82 +162,158 @@ def chat():
     if not question:
         return jsonify({"error": "Pertanyaan tidak boleh kosong"}), 400
 
-    answer, source, confidence = "", "", 0.0
+    if not model_state.ready.is_set():
+        return jsonify({"error": "Model sedang dimuat, coba beberapa saat lagi"}), 503
+
+    result = answer_question(question)
+    answer, source, confidence = result["answer"], result["source"], result["confidence"]
 
     # =====================================
-    # 1) UTAMA → LSTM MODEL
+    # SIMPAN KE DATABASE (write-behind, tidak menunggu commit)
     # =====================================
-    if main_model and tokenizer_main and le_main:
-        seq = tokenizer_main.texts_to_sequences([question])
-        pad = pad_sequences(seq, maxlen=main_model.input_shape[1], padding="post")
-        pred = main_model.predict(pad, verbose=0)
-
-        confidence = float(np.max(pred))
-
-        if confidence >= THRESHOLD:
-            label_id = int(np.argmax(pred))
-            answer = le_main.inverse_transform([label_id])[0]
-            source = "dataset"
-        else:
-            # =====================================
-            # 2) FALLBACK → SEMANTIC SEARCH (TF-IDF)
-            # =====================================
-            if vectorizer and matrix is not None and fallback_texts:
-                q_vec = vectorizer.transform([question])
-                sims = cosine_similarity(q_vec, matrix)
-                idx = int(np.argmax(sims))
-                confidence = float(np.max(sims))
-
-                answer = fallback_texts[idx]
-                source = "peraturan"
-            else:
-                answer = "⚠️ Model fallback (peraturan) belum tersedia."
-                source = "none"
-
+    record = chat_record(npm, question, answer, source, confidence)
+    if CHAT_WRITE_BEHIND:
+        chat_writer.enqueue(record)
     else:
-        answer = "⚠️ Model utama belum tersedia."
-        source = "none"
+        try:
+            persist_chat_records([record])
+        except Exception as e:
+            print("❌ Error simpan chat:", e)
 
     # =====================================
-    # SIMPAN KE DATABASE
+    # RESPONSE
     # =====================================
-    try:
-        new_chat = ChatHistory(
-            npm=npm,
-            question=question,
-            answer=answer,
-            source=source,
-            confidence=confidence
-        )
-        db.session.add(new_chat)
-
-        # TOPIC SAVING
-        topic_name = question[:100]
-        exist = TopicStats.query.filter(
-            func.lower(TopicStats.topic_name) == func.lower(topic_name)
-        ).first()
-
-        if exist:
-            exist.mention_count += 1
-            exist.last_updated = datetime.utcnow()
-        else:
-            new_topic = TopicStats(
-                topic_name=topic_name,
-                mention_count=1,
-                last_updated=datetime.utcnow()
-            )
-            db.session.add(new_topic)
+    return jsonify({
+        "jawaban": answer,
+        "sumber": source,
+        "confidence": confidence,
+        "referensi": result["references"],
+    })
+
+
+def answer_question(question):
+    """
+    Jawaban dari cache, lalu tier lookup dataset (exact / near-duplicate),
+    atau lewat batcher inference jika keduanya miss.
+    """
+    # fingerprint dibaca sekali: jika hot swap terjadi selama submit, hasil
+    # bundle lama tidak boleh tersimpan dengan fingerprint versi baru
+    fingerprint = model_state.fingerprint
+    cache_key = normalize_question(question)
+    result = answer_cache.get(cache_key, fingerprint) if cache_key else None
+    if result is not None:
+        return result
+
+    result = _lookup(question)
+    if result is None:
+        started = time.perf_counter()
+        result = chat_batcher.submit(question)
+        lookup_stats.record_model(time.perf_counter() - started)
+        if cache_key and result["source"] != "none" and model_state.fingerprint == fingerprint:
+            answer_cache.put(cache_key, result, fingerprint)
+    return result
+
+
+def _lookup(question):
+    bundle = model_state.bundle
+    if not QUESTION_LOOKUP_ENABLED or bundle is None or bundle.lookup is None:
+        return None
+    started = time.perf_counter()
+    hit = bundle.lookup.match(question)
+    lookup_stats.record(hit[0] if hit else None, time.perf_counter() - started)
+    if hit is None:
+        return None
+    source, answer, similarity = hit
+    return _result(answer, source, similarity)
+
+
+# ======================================================
+# CHAT PER SESI (1 request = jawab + simpan giliran)
+# ======================================================
+# Menggantikan 3 request dari frontend (/chat + 2x /chat/message):
+# jawaban dihitung, lalu ChatMessage user & bot, ChatHistory, dan
+# TopicStats ditulis dalam SATU transaksi / satu commit.
+# /chat/turn tanpa session_id membuat sesi baru sekaligus.
+@chat_bp.route("/chat/turn", methods=["POST"])
+@chat_bp.route("/chat/session/<int:session_id>/turn", methods=["POST"])
+@cross_origin()
+def chat_turn(session_id=None):
+    data = request.json or {}
+    raw_question = (data.get("pertanyaan") or "").strip()
+    question = raw_question.lower()
+    npm = data.get("npm")
+
+    if not question:
+        return jsonify({"error": "Pertanyaan tidak boleh kosong"}), 400
+
+    if session_id is not None:
+        session = db.session.get(ChatSession, session_id)
+        if session is None:
+            return jsonify({"error": "Sesi tidak ditemukan"}), 404
+        if npm and session.npm != npm:
+            return jsonify({"error": "Sesi bukan milik user ini"}), 403
+        npm = session.npm
+    elif not npm:
+        return jsonify({"error": "NPM tidak boleh kosong"}), 400
+
+    if not model_state.ready.is_set():
+        return jsonify({"error": "Model sedang dimuat, coba beberapa saat lagi"}), 503
 
+    asked_at = datetime.utcnow()
+    result = answer_question(question)
+    answer, source, confidence = result["answer"], result["source"], result["confidence"]
+
+    try:
+        if session_id is None:
+            session = ChatSession(npm=npm, created_at=asked_at)
+            db.session.add(session)
+        user_msg = ChatMessage(session=session, sender="user", message=raw_question, timestamp=asked_at)
+        bot_msg = ChatMessage(session=session, sender="bot", message=answer, timestamp=datetime.utcnow())
+        db.session.add_all([user_msg, bot_msg])
+        stage_chat_records([chat_record(npm, question, answer, source, confidence)])
         db.session.commit()
     except Exception as e:
-        print("❌ Error simpan chat:", e)
         db.session.rollback()
+        print("❌ Error simpan giliran chat:", e)
+        return jsonify({"error": "Gagal menyimpan percakapan"}), 500
 
-    # =====================================
-    # RESPONSE
-    # =====================================
     return jsonify({
+        "session_id": session.id,
+        "created_at": session.created_at.isoformat(),
         "jawaban": answer,
         "sumber": source,
-        "confidence": confidence
+        "confidence": confidence,
+        "referensi": result["references"],
+        "messages": [
+            {"id": m.id, "sender": m.sender, "message": m.message, "timestamp": m.timestamp.isoformat()}
+            for m in (user_msg, bot_msg)
+        ],
+    })
+
+
+# ======================================================
+# METRIK BATCHING
+# ======================================================
+@chat_bp.route("/chat/metrics", methods=["GET"])
+@cross_origin()
+def chat_metrics():
+    return jsonify({
+        "inference": chat_batcher.stats(),
+        "answer_cache": answer_cache.stats(),
+        "question_lookup": lookup_stats.stats(),
+        "chat_writer": chat_writer.stats(),
     })
+
+
+# ======================================================
+# HEALTH CHECK (untuk load balancer)
+# ======================================================
+@chat_bp.route("/health/live", methods=["GET"])
+def health_live():
+    return jsonify({"status": "alive"})
+
+
+@chat_bp.route("/health/ready", methods=["GET"])
+def health_ready():
+    status = model_state.status()
+    return jsonify(status), (200 if status["ready"] else 503)
@@ -6,6 +6,7 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 from backend.config import db, app
 from backend.db.models import User, ChatSession, ChatMessage, LoginHistory
+from sqlalchemy import func, select
 
 user_bp = Blueprint("user_bp", __name__)
 
@@ -15,6 +16,13 @@ user_bp = Blueprint("user_bp", __name__)
 UPLOAD_FOLDER = os.path.join(app.root_path, "static", "uploads", "profile")
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# =========================
+# PAGINASI RIWAYAT CHAT
+# =========================
+SESSION_PAGE_DEFAULT, SESSION_PAGE_MAX = 20, 100
+MESSAGE_PAGE_DEFAULT, MESSAGE_PAGE_MAX = 50, 200
+PREVIEW_LENGTH = 120
+
 # =========================
 # REGISTER (SIGN UP)
 # =========================
@@ -157,25 +165,97 @@ def add_chat_message():
     return jsonify({"message": "Message saved"})
 
 # =========================
-# LIHAT SEMUA RIWAYAT CHAT
+# DAFTAR SESI CHAT (paginasi keyset)
 # =========================
+# GET /chat/history/<npm>?limit=20&before=<session_id>
+# Satu query ter-grup: tiap sesi + jumlah pesan + preview pesan terakhir.
+# Halaman berikutnya diminta dengan before=next_before.
 @user_bp.route("/chat/history/<string:npm>", methods=["GET"])
 def get_chat_history(npm):
-    sessions = ChatSession.query.filter_by(npm=npm).order_by(ChatSession.created_at.desc()).all()
-    result = []
-
-    for s in sessions:
-        messages = ChatMessage.query.filter_by(session_id=s.id).order_by(ChatMessage.timestamp.asc()).all()
-        result.append({
-            "session_id": s.id,
-            "created_at": s.created_at.isoformat(),
-            "messages": [
-                {"sender": m.sender, "message": m.message, "timestamp": m.timestamp.isoformat()}
-                for m in messages
-            ]
-        })
+    limit = _limit_arg(SESSION_PAGE_DEFAULT, SESSION_PAGE_MAX)
+    before = request.args.get("before", type=int)
+
+    page = select(ChatSession.id, ChatSession.created_at).where(ChatSession.npm == npm)
+    if before:
+        page = page.where(ChatSession.id < before)
+    page = page.order_by(ChatSession.id.desc()).limit(limit + 1).subquery()
+
+    stats = (
+        select(
+            ChatMessage.session_id,
+            func.count(ChatMessage.id).label("message_count"),
+            func.max(ChatMessage.id).label("last_id"),
+        )
+        .join(page, page.c.id == ChatMessage.session_id)
+        .group_by(ChatMessage.session_id)
+        .subquery()
+    )
+
+    rows = db.session.execute(
+        select(
+            page.c.id, page.c.created_at, stats.c.message_count,
+            ChatMessage.sender,
+            func.substr(ChatMessage.message, 1, PREVIEW_LENGTH).label("preview"),
+            ChatMessage.timestamp,
+        )
+        .outerjoin(stats, stats.c.session_id == page.c.id)
+        .outerjoin(ChatMessage, ChatMessage.id == stats.c.last_id)
+        .order_by(page.c.id.desc())
+    ).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return jsonify({
+        "sessions": [
+            {
+                "session_id": r.id,
+                "created_at": r.created_at.isoformat(),
+                "message_count": r.message_count or 0,
+                "last_message": {
+                    "sender": r.sender,
+                    "preview": r.preview,
+                    "timestamp": r.timestamp.isoformat(),
+                } if r.sender else None,
+            }
+            for r in rows
+        ],
+        "next_before": rows[-1].id if has_more else None,
+    })
+
+# =========================
+# PESAN DALAM SATU SESI (paginasi keyset)
+# =========================
+# GET /chat/session/<id>/messages?limit=50&before=<message_id>
+# Mengembalikan pesan terbaru (urut lama → baru); pesan yang lebih lama
+# diminta dengan before=next_before.
+@user_bp.route("/chat/session/<int:session_id>/messages", methods=["GET"])
+def get_session_messages(session_id):
+    if db.session.get(ChatSession, session_id) is None:
+        return jsonify({"error": "Sesi tidak ditemukan"}), 404
+
+    limit = _limit_arg(MESSAGE_PAGE_DEFAULT, MESSAGE_PAGE_MAX)
+    before = request.args.get("before", type=int)
+
+    query = ChatMessage.query.filter(ChatMessage.session_id == session_id)
+    if before:
+        query = query.filter(ChatMessage.id < before)
+    messages = query.order_by(ChatMessage.id.desc()).limit(limit + 1).all()
+
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    return jsonify({
+        "session_id": session_id,
+        "messages": [
+            {"id": m.id, "sender": m.sender, "message": m.message, "timestamp": m.timestamp.isoformat()}
+            for m in reversed(messages)
+        ],
+        "next_before": messages[-1].id if has_more else None,
+    })
+
 
-    return jsonify(result)
+def _limit_arg(default, maximum):
+    limit = request.args.get("limit", default, type=int)
+    return max(1, min(limit, maximum))
 
 # =========================
 # AMBIL DETAIL SATU SESI CHAT
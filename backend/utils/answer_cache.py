@@ -0,0 +1,233 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# ==============================================================
+# 🔹 ANSWER CACHE (pertanyaan ternormalisasi → jawaban)
+# ==============================================================
+# Mahasiswa sering menanyakan hal yang sama ("cara isi krs", "jadwal uas").
+# Jawaban disimpan per bentuk kanonik pertanyaan supaya tokenisasi,
+# predict, dan fallback tidak diulang.
+#
+# - LRU + TTL per proses, dengan counter hit/miss/eviction
+# - setiap entri ditandai versi model; jika versi berubah (retrain,
+#   rollback) entri lama otomatis tidak berlaku
+# - opsional: backend bersama berbasis file SQLite agar beberapa worker
+#   bisa saling memakai hasil cache; tabelnya dibatasi jumlah baris dan
+#   entri kedaluwarsa dibersihkan setiap SHARED_PURGE_EVERY kali put
+
+# Normalisasi singkatan / bahasa gaul yang umum
+SLANG = {
+    "gmn": "bagaimana", "bgmn": "bagaimana", "gimana": "bagaimana", "gmana": "bagaimana",
+    "yg": "yang", "dgn": "dengan", "dg": "dengan", "utk": "untuk", "untk": "untuk",
+    "tdk": "tidak", "gk": "tidak", "ga": "tidak", "gak": "tidak", "nggak": "tidak", "engga": "tidak",
+    "krn": "karena", "karna": "karena", "sdh": "sudah", "udh": "sudah", "udah": "sudah",
+    "blm": "belum", "kpn": "kapan", "dmn": "dimana", "brp": "berapa", "bs": "bisa",
+    "jd": "jadi", "aja": "saja", "sy": "saya", "aku": "saya", "gw": "saya", "gue": "saya",
+    "mhs": "mahasiswa", "matkul": "mata kuliah", "makul": "mata kuliah",
+    "dosbing": "dosen pembimbing", "dospem": "dosen pembimbing",
+    "tgl": "tanggal", "thn": "tahun", "smt": "semester", "smstr": "semester",
+}
+# Kata pengisi yang tidak mengubah makna pertanyaan
+FILLERS = {"dong", "sih", "nih", "kak", "deh", "ya", "yah", "kah", "tolong", "mohon"}
+# Sapaan yang hanya dibuang di awal / akhir kalimat ("min, cara isi krs?");
+# di tengah bisa bermakna lain ("ipk min 3" = minimal)
+VOCATIVES = {"min"}
+
+# Tiap berapa put ke backend bersama entri kedaluwarsa / berlebih dibersihkan
+SHARED_PURGE_EVERY = 256
+
+_PUNCT_RE = re.compile(r"[^\w\s]+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_question(text):
+    """Bentuk kanonik pertanyaan: lowercase, tanpa tanda baca, slang dinormalisasi."""
+    text = _PUNCT_RE.sub(" ", text.lower())
+    words = []
+    for w in _SPACE_RE.split(text.strip()):
+        if not w or w in FILLERS:
+            continue
+        words.append(w)
+    if words and words[0] in VOCATIVES:
+        words = words[1:]
+    if words and words[-1] in VOCATIVES:
+        words = words[:-1]
+    return " ".join(SLANG.get(w, w) for w in words)
+
+
+class AnswerCache:
+    def __init__(self, max_entries=2048, ttl=3600, shared_path=None, shared_max_rows=20000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared_path = shared_path or None
+        self.shared_max_rows = shared_max_rows
+        self._shared_puts = 0
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key → (value, expires_at, version)
+        self._local = threading.local()
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.shared_purged = 0
+
+        if self.shared_path:
+            self._init_shared()
+
+    # ------------------------------
+    # API
+    # ------------------------------
+    def get(self, key, version):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, entry_version = entry
+                if entry_version == version and expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                if entry_version == version:
+                    self.expirations += 1
+
+        value = self._shared_get(key, version, now)
+        with self._lock:
+            if value is not None:
+                self.shared_hits += 1
+                self._store(key, value, now + self.ttl, version)
+            else:
+                self.misses += 1
+        return value
+
+    def put(self, key, value, version):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, value, expires_at, version)
+        self._shared_put(key, value, expires_at, version)
+
+    def invalidate(self, keep_version=None):
+        """Kosongkan cache lokal; di backend bersama hapus entri selain keep_version."""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+        if self.shared_path:
+            try:
+                conn = self._conn()
+                conn.execute(
+                    "DELETE FROM answer_cache WHERE version != ? OR expires_at < ?",
+                    (keep_version or "", time.time()),
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                print("⚠️ Gagal invalidasi shared answer cache:", e)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "shared": bool(self.shared_path),
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "shared_purged": self.shared_purged,
+            }
+
+    # ------------------------------
+    # Internal
+    # ------------------------------
+    def _store(self, key, value, expires_at, version):
+        # dipanggil dengan self._lock terkunci
+        self._entries[key] = (value, expires_at, version)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.shared_path, timeout=1.0)
+            self._local.conn = conn
+        return conn
+
+    def _init_shared(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.shared_path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS answer_cache ("
+            " key TEXT PRIMARY KEY, version TEXT NOT NULL,"
+            " value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS answer_cache_expires ON answer_cache (expires_at)")
+        conn.commit()
+        self._shared_purge(conn)
+
+    def _shared_get(self, key, version, now):
+        if not self.shared_path:
+            return None
+        try:
+            row = self._conn().execute(
+                "SELECT value FROM answer_cache WHERE key = ? AND version = ? AND expires_at > ?",
+                (key, version, now),
+            ).fetchone()
+        except sqlite3.Error as e:
+            print("⚠️ Shared answer cache tidak bisa dibaca:", e)
+            return None
+        return json.loads(row[0]) if row else None
+
+    def _shared_put(self, key, value, expires_at, version):
+        if not self.shared_path:
+            return
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO answer_cache (key, version, value, expires_at) VALUES (?, ?, ?, ?)",
+                (key, version, json.dumps(value), expires_at),
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            print("⚠️ Shared answer cache tidak bisa ditulis:", e)
+            return
+        with self._lock:
+            self._shared_puts += 1
+            due = self._shared_puts % SHARED_PURGE_EVERY == 0
+        if due:
+            self._shared_purge(conn)
+
+    def _shared_purge(self, conn):
+        """Hapus entri kedaluwarsa, lalu yang paling cepat kedaluwarsa jika melebihi shared_max_rows."""
+        try:
+            removed = conn.execute(
+                "DELETE FROM answer_cache WHERE expires_at < ?", (time.time(),)
+            ).rowcount
+            if self.shared_max_rows:
+                removed += conn.execute(
+                    "DELETE FROM answer_cache WHERE key IN ("
+                    " SELECT key FROM answer_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                    (self.shared_max_rows,),
+                ).rowcount
+            conn.commit()
+        except sqlite3.Error as e:
+            print("⚠️ Gagal membersihkan shared answer cache:", e)
+            return
+        if removed:
+            with self._lock:
+                self.shared_purged += removed
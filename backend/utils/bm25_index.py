@@ -0,0 +1,624 @@
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+from backend.utils.mmap_artifacts import pack_strings, save_artifact, load_artifact
+from backend.utils.regulation_chunker import slice_passage
+
+# ==============================================================
+# 🔹 INVERTED INDEX BM25 UNTUK FALLBACK PERATURAN
+# ==============================================================
+# Pengganti cosine_similarity(q_vec, matrix) + argmax yang selalu
+# menyentuh SELURUH kalimat. Index menyimpan posting list per term dalam
+# array ringkas (format CSR):
+#
+#   term_ptr[t] : term_ptr[t+1]  → rentang posting milik term t
+#   post_docs                    → id dokumen (kalimat), int32
+#   post_weights                 → bobot BM25 yang sudah dihitung, float32
+#
+# Query hanya membaca posting dari term yang muncul di pertanyaan,
+# lalu mengembalikan top-k kalimat + kalimat tetangganya (berdasarkan
+# sentence_number pada file yang sama) sebagai konteks.
+
+TOKEN_RE = re.compile(r"(?u)\b\w\w+\b")  # sama dengan token_pattern TfidfVectorizer
+# "Pasal 5 ayat (2)" → term tambahan "pasal5", "ayat2": angka satu digit tidak lolos
+# TOKEN_RE sehingga kutipan pasal di pertanyaan tidak akan cocok tanpa ini
+CITATION_RE = re.compile(r"\b(pasal|ayat)\s*\(?(\d+[a-z]?)\b")
+
+
+def tokenize(text):
+    text = text.lower()
+    return TOKEN_RE.findall(text) + [kind + number for kind, number in CITATION_RE.findall(text)]
+
+
+def _count_postings(sentences):
+    """
+    Hitung posting (term, dokumen, tf) untuk sekumpulan kalimat.
+    Mengembalikan (vocab, term_ptr, post_terms, post_docs, tf, doc_lengths);
+    posting terurut per term lalu per dokumen.
+    """
+    n_docs = len(sentences)
+    vocab = {}
+    flat_terms, doc_lengths = [], np.zeros(n_docs, dtype=np.float32)
+    for doc, text in enumerate(sentences):
+        tokens = tokenize(text)
+        doc_lengths[doc] = len(tokens)
+        flat_terms.extend(vocab.setdefault(tok, len(vocab)) for tok in tokens)
+
+    flat_terms = np.asarray(flat_terms, dtype=np.int64)
+    flat_docs = np.repeat(np.arange(n_docs, dtype=np.int64), doc_lengths.astype(np.int64))
+
+    # (term, doc) unik + frekuensinya, terurut per term lalu per doc
+    keys, tf = np.unique(flat_terms * max(n_docs, 1) + flat_docs, return_counts=True)
+    post_terms = keys // max(n_docs, 1)
+    post_docs = (keys % max(n_docs, 1)).astype(np.int32)
+
+    df = np.bincount(post_terms, minlength=len(vocab))
+    term_ptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+    np.cumsum(df, out=term_ptr[1:])
+    return vocab, term_ptr, post_terms, post_docs, tf.astype(np.float32), doc_lengths
+
+
+def _term_array(vocab):
+    terms = np.empty(len(vocab), dtype=object)
+    for term, i in vocab.items():
+        terms[i] = term
+    return terms.astype(str) if len(vocab) else np.array([], dtype=str)
+
+
+class BM25Index:
+    def __init__(self, terms, term_ptr, post_docs, post_weights, term_max,
+                 doc_file, doc_sentence_number, files, k1=1.5, b=0.75):
+        self.terms = terms
+        self.term_ptr = term_ptr
+        self.post_docs = post_docs
+        self.post_weights = post_weights
+        self.term_max = term_max
+        self.doc_file = doc_file
+        self.doc_sentence_number = doc_sentence_number
+        self.files = files
+        self.k1 = k1
+        self.b = b
+        self.term_ids = {t: i for i, t in enumerate(terms)}
+
+    @property
+    def num_docs(self):
+        return len(self.doc_file)
+
+    # ------------------------------
+    # Build
+    # ------------------------------
+    @classmethod
+    def build(cls, sentences, filenames=None, sentence_numbers=None, k1=1.5, b=0.75):
+        """
+        sentences        : list kalimat (urut per file lalu sentence_number)
+        filenames        : list nama file per kalimat (opsional)
+        sentence_numbers : list nomor kalimat per kalimat (opsional)
+        """
+        n_docs = len(sentences)
+        filenames = filenames if filenames is not None else [None] * n_docs
+        sentence_numbers = sentence_numbers if sentence_numbers is not None else range(1, n_docs + 1)
+
+        vocab, term_ptr, post_terms, post_docs, tf, doc_lengths = _count_postings(sentences)
+        df = np.diff(term_ptr)
+
+        avgdl = float(doc_lengths.mean()) if n_docs else 0.0
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        norm = k1 * (1.0 - b + b * doc_lengths[post_docs] / max(avgdl, 1e-9))
+        post_weights = (idf[post_terms] * tf * (k1 + 1.0) / (tf + norm)).astype(np.float32)
+
+        file_list = sorted({f for f in filenames if f is not None})
+        file_ids = {f: i for i, f in enumerate(file_list)}
+        doc_file = np.array([file_ids.get(f, -1) for f in filenames], dtype=np.int32)
+        doc_sentence_number = np.array(
+            [n if n is not None else -1 for n in sentence_numbers], dtype=np.int32
+        )
+
+        return cls(
+            terms=_term_array(vocab),
+            term_ptr=term_ptr,
+            post_docs=post_docs,
+            post_weights=post_weights,
+            term_max=(idf * (k1 + 1.0)).astype(np.float32),
+            doc_file=doc_file,
+            doc_sentence_number=doc_sentence_number,
+            files=np.array(file_list, dtype=str),
+            k1=k1,
+            b=b,
+        )
+
+    # ------------------------------
+    # Simpan / muat
+    # ------------------------------
+    def save(self, path):
+        np.savez(
+            path,
+            terms=self.terms,
+            term_ptr=self.term_ptr,
+            post_docs=self.post_docs,
+            post_weights=self.post_weights,
+            term_max=self.term_max,
+            doc_file=self.doc_file,
+            doc_sentence_number=self.doc_sentence_number,
+            files=self.files,
+            params=np.array([self.k1, self.b], dtype=np.float64),
+        )
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            k1, b = data["params"].tolist()
+            return cls(
+                terms=data["terms"],
+                term_ptr=data["term_ptr"],
+                post_docs=data["post_docs"],
+                post_weights=data["post_weights"],
+                term_max=data["term_max"],
+                doc_file=data["doc_file"],
+                doc_sentence_number=data["doc_sentence_number"],
+                files=data["files"],
+                k1=k1,
+                b=b,
+            )
+
+    # ------------------------------
+    # Query
+    # ------------------------------
+    def search(self, query, k=3, context=1):
+        """
+        Top-k kalimat untuk query. Setiap hasil berisi:
+        doc, score, confidence (0..1 relatif terhadap skor maksimum teoritis),
+        filename, sentence_number, dan context (id dokumen tetangga).
+        """
+        term_ids = sorted({self.term_ids[t] for t in tokenize(query) if t in self.term_ids})
+        if not term_ids:
+            return []
+
+        starts = self.term_ptr[term_ids]
+        ends = self.term_ptr[np.asarray(term_ids) + 1]
+        docs = np.concatenate([self.post_docs[s:e] for s, e in zip(starts, ends)])
+        weights = np.concatenate([self.post_weights[s:e] for s, e in zip(starts, ends)])
+
+        # akumulasi skor hanya untuk dokumen yang tersentuh posting
+        cand, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+
+        top = min(k, len(cand))
+        best = np.argpartition(-scores, top - 1)[:top]
+        best = best[np.argsort(-scores[best], kind="stable")]
+
+        upper = float(self.term_max[term_ids].sum()) or 1.0
+        results = []
+        for i in best:
+            doc = int(cand[i])
+            results.append({
+                "doc": doc,
+                "score": float(scores[i]),
+                "confidence": min(1.0, float(scores[i]) / upper),
+                "filename": self.filename(doc),
+                "sentence_number": int(self.doc_sentence_number[doc]),
+                "context": self.neighbours(doc, context),
+            })
+        return results
+
+    def filename(self, doc):
+        f = int(self.doc_file[doc])
+        return str(self.files[f]) if f >= 0 else None
+
+    def neighbours(self, doc, context=1):
+        """Id dokumen sebelum/sesudah doc pada file yang sama (urut sentence_number)."""
+        lo = max(0, doc - context)
+        hi = min(self.num_docs, doc + context + 1)
+        same_file = self.doc_file[lo:hi] == self.doc_file[doc]
+        return [int(d) for d in range(lo, hi) if same_file[d - lo] and d != doc]
+
+
+# ==============================================================
+# 🔹 SEGMENTED BM25 (SATU SEGMEN PER DOKUMEN PERATURAN)
+# ==============================================================
+# Index global di atas harus dibangun ulang dari seluruh korpus setiap
+# kali satu dokumen berubah. Di sini setiap dokumen punya segmen sendiri
+# yang hanya menyimpan statistik mentah (tf per posting + panjang
+# kalimat). Bobot BM25 dihitung saat query dengan df / jumlah kalimat /
+# avgdl GLOBAL (dijumlahkan dari semua segmen), sehingga skornya sama
+# dengan BM25Index.build atas korpus gabungan.
+#
+# Upload satu dokumen = bangun 1 segmen + tulis ulang manifest; segmen
+# dokumen lain tidak disentuh (dan ikut ke versi baru lewat hard link).
+#
+#   <dir>/segments.json     → urutan segmen (per filename) + metadata
+#   <dir>/<segment_id>/     → satu segmen (immutable, folder artefak mmap;
+#                             <segment_id>.npz untuk versi lama)
+#
+# Teks passage disimpan sebagai blob teks hasil ekstraksi dokumen
+# (peraturan_documents.text_blob) + offset awal/akhir per passage;
+# text() mengiris blob (memmap) tanpa menyalinnya. Label kutipan ("Pasal 12
+# ayat (1)") ikut diindeks sehingga query "pasal 12" menemukan pasalnya.
+
+SEGMENT_MANIFEST = "segments.json"
+# search(): akumulasi padat (array seukuran korpus) hanya jika
+# posting x rasio ≥ jumlah kalimat; selain itu np.unique atas posting saja
+DENSE_ACCUMULATE_RATIO = 8
+
+
+def segment_id(filename, content_hash):
+    return hashlib.sha1(f"{filename}\x1f{content_hash}".encode("utf-8")).hexdigest()[:16]
+
+
+class BM25Segment:
+    def __init__(self, filename, content_hash, terms, term_ptr, post_docs, post_tf,
+                 doc_len, sentence_numbers, text_blob, text_starts, text_ends, label_blob, label_offsets):
+        self.filename = filename
+        self.content_hash = content_hash
+        self.id = segment_id(filename, content_hash)
+        self.terms = terms
+        self.term_ptr = term_ptr
+        self.post_docs = post_docs
+        self.post_tf = post_tf
+        self.doc_len = doc_len
+        self.sentence_numbers = sentence_numbers
+        self.text_blob = text_blob
+        self.text_starts = text_starts
+        self.text_ends = text_ends
+        self.label_blob = label_blob
+        self.label_offsets = label_offsets
+        self.term_ids = {t: i for i, t in enumerate(terms)}
+        self.post_dl = doc_len[post_docs]  # panjang kalimat per posting (tidak disimpan)
+
+    def __len__(self):
+        return len(self.doc_len)
+
+    @classmethod
+    def build(cls, filename, content_hash, sentences, sentence_numbers=None, labels=None,
+              text_blob=None, spans=None):
+        """
+        sentences : teks passage / kalimat (urut)
+        labels    : label kutipan per passage (None jika tidak ada)
+        text_blob + spans : blob teks dokumen + (awal, akhir) byte per passage;
+                            tanpa keduanya teks passage dikemas berurutan
+        """
+        labels = labels if labels is not None else [None] * len(sentences)
+        vocab, term_ptr, _, post_docs, tf, doc_lengths = _count_postings(
+            [f"{label} {s}" if label else s for s, label in zip(sentences, labels)]
+        )
+        if text_blob is not None and spans is not None:
+            blob = np.frombuffer(text_blob, dtype=np.uint8)
+            starts = np.array([s for s, _ in spans], dtype=np.int64)
+            ends = np.array([e for _, e in spans], dtype=np.int64)
+        else:
+            blob, offsets = pack_strings(sentences)
+            starts, ends = offsets[:-1], offsets[1:]
+        label_blob, label_offsets = pack_strings([label or "" for label in labels])
+        numbers = sentence_numbers if sentence_numbers is not None else range(1, len(sentences) + 1)
+        return cls(
+            filename, content_hash, _term_array(vocab), term_ptr, post_docs, tf, doc_lengths,
+            np.array([n if n is not None else -1 for n in numbers], dtype=np.int32),
+            blob, starts, ends, label_blob, label_offsets,
+        )
+
+    def text(self, local):
+        return slice_passage(self.text_blob, self.text_starts[local], self.text_ends[local])
+
+    def label(self, local):
+        start, end = self.label_offsets[local], self.label_offsets[local + 1]
+        return self.label_blob[start:end].tobytes().decode("utf-8") or None
+
+    def span(self, term):
+        t = self.term_ids.get(term)
+        return None if t is None else (self.term_ptr[t], self.term_ptr[t + 1])
+
+    def save(self, directory):
+        return save_artifact(
+            os.path.join(directory, self.id),
+            arrays={
+                "terms": self.terms,
+                "term_ptr": self.term_ptr,
+                "post_docs": self.post_docs,
+                "post_tf": self.post_tf,
+                "doc_len": self.doc_len,
+                "sentence_numbers": self.sentence_numbers,
+                "text_blob": self.text_blob,
+                "text_starts": self.text_starts,
+                "text_ends": self.text_ends,
+                "label_blob": self.label_blob,
+                "label_offsets": self.label_offsets,
+            },
+            meta={"filename": self.filename, "content_hash": self.content_hash},
+        )
+
+    @classmethod
+    def load(cls, path):
+        if os.path.isdir(path):
+            a = load_artifact(path)
+            return cls(
+                a.meta["filename"], a.meta["content_hash"], a["terms"], a["term_ptr"], a["post_docs"],
+                a["post_tf"], a["doc_len"], a["sentence_numbers"],
+                a["text_blob"], a["text_starts"], a["text_ends"], a["label_blob"], a["label_offsets"],
+            )
+        with np.load(path, allow_pickle=False) as data:  # segmen .npz versi lama
+            filename, content_hash = data["meta"].tolist()
+            if "text_offsets" in data:
+                # segmen lama: kalimat dikemas berurutan, tanpa label
+                offsets = data["text_offsets"]
+                starts, ends = offsets[:-1], offsets[1:]
+                label_blob, label_offsets = pack_strings([""] * len(data["doc_len"]))
+            else:
+                starts, ends = data["text_starts"], data["text_ends"]
+                label_blob, label_offsets = data["label_blob"], data["label_offsets"]
+            return cls(
+                filename, content_hash, data["terms"], data["term_ptr"], data["post_docs"],
+                data["post_tf"], data["doc_len"], data["sentence_numbers"],
+                data["text_blob"], starts, ends, label_blob, label_offsets,
+            )
+
+
+def segment_path(directory, seg_id):
+    """Folder segmen mmap, atau <id>.npz untuk segmen versi lama."""
+    path = os.path.join(directory, seg_id)
+    return path if os.path.isdir(path) else path + ".npz"
+
+
+def read_segment_manifest(directory):
+    try:
+        with open(os.path.join(directory, SEGMENT_MANIFEST), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def write_segment_manifest(directory, segments):
+    """segments: list BM25Segment (atau metadata) → manifest terurut per filename."""
+    entries = sorted(
+        ({"id": s.id, "filename": s.filename, "content_hash": s.content_hash, "sentences": len(s)}
+         for s in segments),
+        key=lambda e: e["filename"],
+    )
+    path = os.path.join(directory, SEGMENT_MANIFEST)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"segments": entries}, f, indent=2)
+    os.replace(tmp, path)
+    return entries
+
+
+class _SegmentTexts:
+    """Akses kalimat per id dokumen global (pengganti list fallback_texts)."""
+
+    def __init__(self, index):
+        self._index = index
+
+    def __len__(self):
+        return self._index.num_docs
+
+    def __getitem__(self, doc):
+        seg, local = self._index.locate(doc)
+        return self._index.segments[seg].text(local)
+
+
+class SegmentedBM25:
+    """Gabungan segmen per dokumen; antarmuka search() sama dengan BM25Index."""
+
+    def __init__(self, segments, k1=1.5, b=0.75):
+        self.segments = sorted(segments, key=lambda s: s.filename)
+        self.k1 = k1
+        self.b = b
+        self.offsets = np.zeros(len(self.segments) + 1, dtype=np.int64)
+        np.cumsum([len(s) for s in self.segments], out=self.offsets[1:])
+        total_len = sum(float(s.doc_len.sum()) for s in self.segments)
+        self.avgdl = total_len / self.num_docs if self.num_docs else 0.0
+        self.files = [s.filename for s in self.segments]
+        self.texts = _SegmentTexts(self)
+        # term → [(indeks segmen, id term lokal)], diisi saat term pertama kali di-query
+        self._term_segments = {}
+
+    @property
+    def num_docs(self):
+        return int(self.offsets[-1])
+
+    @classmethod
+    def load(cls, directory, reuse=None):
+        """
+        Muat semua segmen dari manifest. `reuse` (SegmentedBM25 sebelumnya)
+        dipakai ulang untuk segmen yang id-nya sama → hanya segmen baru yang dibaca.
+        """
+        manifest = read_segment_manifest(directory)
+        if manifest is None:
+            return None
+        known = {s.id: s for s in reuse.segments} if reuse is not None else {}
+        segments = [known.get(e["id"]) or BM25Segment.load(segment_path(directory, e["id"]))
+                    for e in manifest["segments"]]
+        return cls(segments)
+
+    def locate(self, doc):
+        seg = int(np.searchsorted(self.offsets, doc, side="right")) - 1
+        return seg, doc - int(self.offsets[seg])
+
+    def filename(self, doc):
+        return self.segments[self.locate(doc)[0]].filename
+
+    def neighbours(self, doc, context=1):
+        seg = self.locate(doc)[0]
+        lo = max(int(self.offsets[seg]), doc - context)
+        hi = min(int(self.offsets[seg + 1]), doc + context + 1)
+        return [d for d in range(lo, hi) if d != doc]
+
+    def segments_for(self, term):
+        """Segmen yang memuat term; dihitung sekali per term lalu di-cache (term tak dikenal tidak)."""
+        hits = self._term_segments.get(term)
+        if hits is None:
+            hits = []
+            for i, seg in enumerate(self.segments):
+                t = seg.term_ids.get(term)
+                if t is not None:
+                    hits.append((i, t))
+            if hits:
+                self._term_segments[term] = hits
+        return hits
+
+    def search(self, query, k=3, context=1):
+        k1, b, n_docs = self.k1, self.b, self.num_docs
+        # kumpulkan potongan posting dari semua segmen dulu (hanya slicing),
+        # lalu bobot BM25 dihitung sekali secara vektor
+        local, tf, dl, offsets, lengths, idfs, upper = [], [], [], [], [], [], 0.0
+        for term in sorted(set(tokenize(query))):
+            df = 0
+            for i, t in self.segments_for(term):
+                seg = self.segments[i]
+                s, e = seg.term_ptr[t], seg.term_ptr[t + 1]
+                local.append(seg.post_docs[s:e])
+                tf.append(seg.post_tf[s:e])
+                dl.append(seg.post_dl[s:e])
+                offsets.append(self.offsets[i])
+                lengths.append(e - s)
+                df += int(e - s)
+            if df:
+                idf = np.float32(np.log1p((n_docs - df + 0.5) / (df + 0.5)))
+                idfs.append((idf, df))
+                upper += float(idf * np.float32(k1 + 1.0))
+        if not local:
+            return []
+
+        tf = np.concatenate(tf)
+        idf = np.repeat(np.array([i for i, _ in idfs], dtype=np.float32), [df for _, df in idfs])
+        norm = k1 * (1.0 - b + b * np.concatenate(dl) / np.float32(max(self.avgdl, 1e-9)))
+        docs = np.concatenate(local).astype(np.int64) + np.repeat(offsets, lengths)
+        weights = idf * tf * (k1 + 1.0) / (tf + norm)
+        if len(docs) * DENSE_ACCUMULATE_RATIO < n_docs:
+            # akumulasi hanya atas dokumen yang tersentuh posting (seperti BM25Index.search)
+            cand, inverse = np.unique(docs, return_inverse=True)
+            scores = np.bincount(inverse, weights=weights)
+        else:
+            # posting sudah sebanding dengan korpus → bincount padat lebih murah daripada sort
+            dense = np.bincount(docs, weights=weights, minlength=n_docs)
+            cand = np.flatnonzero(dense)
+            scores = dense[cand]
+
+        top = min(k, len(cand))
+        best = np.argpartition(-scores, top - 1)[:top]
+        best = best[np.argsort(-scores[best], kind="stable")]
+
+        upper = upper or 1.0
+        results = []
+        for i in best:
+            doc = int(cand[i])
+            seg, local = self.locate(doc)
+            results.append({
+                "doc": doc,
+                "score": float(scores[i]),
+                "confidence": min(1.0, float(scores[i]) / upper),
+                "filename": self.segments[seg].filename,
+                "sentence_number": int(self.segments[seg].sentence_numbers[local]),
+                "label": self.segments[seg].label(local),
+                "context": self.neighbours(doc, context),
+            })
+        return results
+
+
+def benchmark_segments(n_files=300, sentences_per_file=1000, n_queries=200, k=3):
+    """Update satu dokumen: rebuild penuh vs segmen baru; + parity hasil query."""
+    docs, words, probs, rng = _synthetic_corpus(n_files * sentences_per_file)
+    files = [f"peraturan_{i:04d}.pdf" for i in range(n_files)]
+    per_file = [docs[i * sentences_per_file:(i + 1) * sentences_per_file] for i in range(n_files)]
+    queries = [" ".join(rng.choice(words, size=5, p=probs)) for _ in range(n_queries)]
+
+    segments = [BM25Segment.build(f, "v1", s) for f, s in zip(files, per_file)]
+
+    # dokumen ke-7 diganti isinya
+    per_file[7] = [d + " revisi" for d in per_file[7]]
+    t0 = time.perf_counter()
+    full = BM25Index.build(
+        [d for group in per_file for d in group],
+        [f for f in files for _ in range(sentences_per_file)],
+    )
+    t_full = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    segments[7] = BM25Segment.build(files[7], "v2", per_file[7])
+    segmented = SegmentedBM25(segments)
+    t_seg = time.perf_counter() - t0
+
+    mismatches = 0
+    for q in queries:
+        a, b = full.search(q, k=k), segmented.search(q, k=k)
+        if [h["doc"] for h in a] != [h["doc"] for h in b] or \
+                not np.allclose([h["score"] for h in a], [h["score"] for h in b], rtol=1e-4):
+            mismatches += 1
+
+    t0 = time.perf_counter()
+    for q in queries:
+        full.search(q, k=k)
+    q_full = (time.perf_counter() - t0) / n_queries
+    t0 = time.perf_counter()
+    for q in queries:
+        segmented.search(q, k=k)
+    q_seg = (time.perf_counter() - t0) / n_queries
+
+    print(f"📊 {n_files} dokumen x {sentences_per_file} kalimat | update 1 dokumen: rebuild penuh {t_full:.2f}s "
+          f"vs segmen {t_seg:.3f}s | query {q_full * 1000:.2f} ms vs {q_seg * 1000:.2f} ms "
+          f"| hasil berbeda: {mismatches}/{n_queries}")
+
+
+# ==============================================================
+# 🔹 BENCHMARK vs TF-IDF + cosine_similarity
+# ==============================================================
+def _synthetic_corpus(n_docs, vocab_size=50000, mean_len=18, seed=0):
+    rng = np.random.default_rng(seed)
+    words = np.array([f"kata{i}" for i in range(vocab_size)])
+    ranks = np.arange(1, vocab_size + 1)
+    probs = (1.0 / ranks) / (1.0 / ranks).sum()  # distribusi Zipf
+    lengths = np.clip(rng.poisson(mean_len, n_docs), 3, None)
+    flat = rng.choice(vocab_size, size=int(lengths.sum()), p=probs)
+    docs, pos = [], 0
+    for n in lengths:
+        docs.append(" ".join(words[flat[pos:pos + n]]))
+        pos += n
+    return docs, words, probs, rng
+
+
+def benchmark(sizes=(10_000, 100_000, 1_000_000), n_queries=200, k=3):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    for n_docs in sizes:
+        docs, words, probs, rng = _synthetic_corpus(n_docs)
+        queries = [" ".join(rng.choice(words, size=5, p=probs)) for _ in range(n_queries)]
+
+        t0 = time.perf_counter()
+        vectorizer = TfidfVectorizer()
+        matrix = vectorizer.fit_transform(docs)
+        t_fit = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for q in queries:
+            sims = cosine_similarity(vectorizer.transform([q]), matrix)
+            np.argmax(sims)
+        t_tfidf = (time.perf_counter() - t0) / n_queries
+
+        t0 = time.perf_counter()
+        index = BM25Index.build(docs, ["bench.txt"] * n_docs)
+        t_build = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for q in queries:
+            index.search(q, k=k)
+        t_bm25 = (time.perf_counter() - t0) / n_queries
+
+        print(f"📊 {n_docs:>9,} kalimat | TF-IDF fit {t_fit:6.2f}s, query {t_tfidf * 1000:8.3f} ms "
+              f"| BM25 build {t_build:6.2f}s, query top-{k} {t_bm25 * 1000:8.3f} ms "
+              f"| speedup {t_tfidf / max(t_bm25, 1e-9):6.1f}x")
+
+
+if __name__ == "__main__":
+    # 🔹 python -m backend.utils.bm25_index [ukuran ...]
+    # 🔹 python -m backend.utils.bm25_index segments [jumlah_dokumen]
+    if sys.argv[1:2] == ["segments"]:
+        benchmark_segments(n_files=int(sys.argv[2]) if len(sys.argv) > 2 else 300)
+    else:
+        sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+        benchmark(sizes)
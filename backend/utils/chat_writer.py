@@ -0,0 +1,397 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+from backend.config import app, db
+from backend.db.models import ChatHistory, TopicStats, topic_hash
+from backend.db.upsert import upsert
+
+# ==============================================================
+# 🔹 WRITE-BEHIND UNTUK ChatHistory & TopicStats
+# ==============================================================
+# Endpoint chat tidak lagi menunggu INSERT + update topik + COMMIT.
+# Record chat dimasukkan ke antrean in-process (bounded), lalu thread
+# background menulisnya per batch:
+#   - ChatHistory  → satu INSERT multi-row (executemany)
+#   - TopicStats   → hitungan topik diagregasi dulu per batch, lalu satu
+#                    upsert atomik per batch (kunci unik topic_hash)
+#
+# Flush terjadi saat batch penuh, saat interval waktu habis, dan saat
+# proses berhenti (atexit). Jika antrean penuh atau database gagal,
+# record ditulis ke file journal per proses (JSON lines) dan diputar
+# ulang nanti.
+#
+# Batch yang gagal dicoba ulang per record: satu record rusak (mis. npm
+# yang tidak ada di users → FK gagal) tidak boleh menahan record lain.
+# Record yang tetap ditolak database (IntegrityError / DataError) masuk
+# karantina "<journal>.rejected.jsonl" dan tidak diputar ulang; error
+# lain (database mati) → sisa record ke journal.
+
+TOPIC_MAX_LEN = 100
+
+
+def chat_record(npm, question, answer, source, confidence):
+    """Bentuk record standar yang dipakai writer."""
+    now = datetime.utcnow()
+    return {
+        "npm": npm,
+        "question": question,
+        "answer": answer,
+        "source": source,
+        "confidence": confidence,
+        "created_at": now,
+    }
+
+
+def persist_chat_records(records):
+    """Tulis banyak record sekaligus dalam satu transaksi (butuh app context)."""
+    if not records:
+        return
+    try:
+        stage_chat_records(records)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def stage_chat_records(records):
+    """INSERT ChatHistory + upsert TopicStats pada session aktif, tanpa commit."""
+    if not records:
+        return
+    rows = [
+        {
+            "npm": r["npm"],
+            "question": r["question"],
+            "answer": r["answer"],
+            "source": r["source"],
+            "confidence": r["confidence"],
+            "created_at": r["created_at"],
+            "timestamp": r["created_at"],
+        }
+        for r in records
+    ]
+    db.session.execute(insert(ChatHistory), rows)
+    _apply_topic_counts(Counter(r["question"][:TOPIC_MAX_LEN] for r in records))
+
+
+def _apply_topic_counts(counts):
+    """Tambah mention_count lewat upsert; biaya tetap berapa pun jumlah topik di tabel."""
+    now = datetime.utcnow()
+    rows = {}
+    for topic_name, n in counts.items():
+        key = topic_hash(topic_name)
+        row = rows.setdefault(key, {
+            "topic_hash": key,
+            "topic_name": topic_name,
+            "mention_count": 0,
+            "last_updated": now,
+        })
+        row["mention_count"] += n
+
+    # urutkan per kunci supaya worker paralel mengunci baris dengan urutan sama (hindari deadlock)
+    upsert(
+        TopicStats,
+        [rows[k] for k in sorted(rows)],
+        key_columns=["topic_hash"],
+        increment=["mention_count"],
+        replace=["last_updated"],
+    )
+
+
+class ChatWriter:
+    def __init__(self, max_queue=10000, batch_size=200, flush_interval=1.0,
+                 put_timeout=0.05, journal_path=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.journal_path = journal_path
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._journal_lock = threading.Lock()
+        self._lock = threading.Lock()  # counter statistik (diubah dari banyak request thread)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.rejected = 0
+        self.failures = 0
+        self.last_flush_ms = 0.0
+
+    # ------------------------------
+    # API untuk request thread
+    # ------------------------------
+    def enqueue(self, record):
+        self.start()
+        try:
+            # backpressure ringan: tunggu sebentar jika antrean penuh
+            self._queue.put(record, timeout=self.put_timeout)
+            self._count(enqueued=1)
+        except queue.Full:
+            self._spill([record])
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, n in deltas.items():
+                setattr(self, name, getattr(self, name) + n)
+
+    def stats(self):
+        with self._lock:
+            counters = {
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "batches": self.batches,
+                "spilled_to_journal": self.spilled,
+                "replayed_from_journal": self.replayed,
+                "rejected": self.rejected,
+                "flush_failures": self.failures,
+                "last_flush_ms": round(self.last_flush_ms, 2),
+            }
+        return dict(
+            counters,
+            queue_length=self._queue.qsize(),
+            queue_capacity=self._queue.maxsize,
+            journal_pending=self._journal_has_data(),
+        )
+
+    def stop(self, timeout=10.0):
+        """Flush semua record yang tersisa (dipanggil saat shutdown)."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+
+    # ------------------------------
+    # Worker
+    # ------------------------------
+    def start(self):
+        """Jalankan thread writer (sekaligus memutar ulang journal sisa proses sebelumnya)."""
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="chat-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+            elif self._journal_has_data():
+                self._replay_journal()
+
+        if self._journal_has_data():
+            self._replay_journal()
+
+    def _collect(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (self._stopping.is_set() and self._queue.empty()):
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.2)))
+            except queue.Empty:
+                continue
+        return batch
+
+    def _flush(self, batch):
+        started = time.perf_counter()
+        try:
+            with app.app_context():
+                _, pending = self._persist(batch)
+            if pending:
+                print(f"❌ Gagal flush {len(pending)} chat ke database, dialihkan ke journal")
+                self._spill(pending)
+        finally:
+            with self._lock:
+                self.last_flush_ms = (time.perf_counter() - started) * 1000.0
+
+    def _persist(self, records):
+        """
+        Tulis records (butuh app context): satu transaksi, atau per record jika
+        batch gagal. Mengembalikan (jumlah tertulis, record yang belum tertulis
+        karena database tidak bisa dipakai). Record yang ditolak dikarantina.
+        """
+        try:
+            persist_chat_records(records)
+            self._count(written=len(records), batches=1)
+            return len(records), []
+        except Exception as e:
+            self._count(failures=1)
+            if len(records) == 1:
+                if isinstance(e, (IntegrityError, DataError)):
+                    self._reject(records[0], e)
+                    return 0, []
+                print("❌ Database tidak bisa ditulis:", e)
+                return 0, records
+            print(f"⚠️ Batch {len(records)} chat gagal, dicoba per record:", e)
+
+        written = 0
+        for i, r in enumerate(records):
+            try:
+                persist_chat_records([r])
+                written += 1
+            except (IntegrityError, DataError) as e:
+                self._reject(r, e)
+            except Exception as e:
+                print("❌ Database tidak bisa ditulis:", e)
+                self._count(written=written)
+                return written, records[i:]
+        self._count(written=written, batches=1)
+        return written, []
+
+    # ------------------------------
+    # Journal (spill ke file lokal, satu file per proses)
+    # ------------------------------
+    # journal_path = "<dir>/chat_history.jsonl" adalah nama dasar; setiap
+    # worker menulis ke "chat_history.<pid>.jsonl" sehingga append dari
+    # proses lain tidak pernah bercampur dengan file yang sedang diputar
+    # ulang. Replay mengklaim file dengan os.replace ke
+    # "chat_history.<pid>.replay.jsonl" milik proses ini (atomik: hanya satu
+    # proses yang menang). Yang boleh diklaim: journal milik sendiri, serta
+    # journal / file replay milik proses yang sudah mati (atau file lama
+    # tanpa pid dari versi sebelumnya). File karantina
+    # "chat_history.rejected.jsonl" tidak pernah diklaim.
+    def _journal_file(self, pid=None, replay=False):
+        root, ext = os.path.splitext(self.journal_path)
+        return f"{root}.{pid or os.getpid()}{'.replay' if replay else ''}{ext or '.jsonl'}"
+
+    def _rejected_file(self):
+        root, ext = os.path.splitext(self.journal_path)
+        return f"{root}.rejected{ext or '.jsonl'}"
+
+    def _reject(self, record, error):
+        """Karantina record yang ditolak database; tidak ikut diputar ulang."""
+        self._count(rejected=1)
+        print(f"⚠️ Chat npm={record['npm']!r} ditolak database, dikarantina:", error.__class__.__name__)
+        if not self.journal_path:
+            return
+        line = json.dumps(dict(record, created_at=record["created_at"].isoformat(),
+                               error=str(getattr(error, "orig", error))[:500])) + "\n"
+        with self._journal_lock:
+            os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+            with open(self._rejected_file(), "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def _spill(self, records):
+        if not self.journal_path:
+            print(f"⚠️ {len(records)} chat dibuang: antrean penuh dan journal tidak dikonfigurasi")
+            return
+        with self._journal_lock:
+            os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+            with open(self._journal_file(), "a", encoding="utf-8") as f:
+                for r in records:
+                    f.write(json.dumps(dict(r, created_at=r["created_at"].isoformat())) + "\n")
+        self._count(spilled=len(records))
+
+    def _claimable_journals(self):
+        """File journal yang boleh diputar ulang proses ini (milik sendiri dulu)."""
+        own = self._journal_file()
+        directory = os.path.dirname(self.journal_path) or "."
+        root, ext = os.path.splitext(os.path.basename(self.journal_path))
+        ext = ext or ".jsonl"
+        try:
+            names = sorted(os.listdir(directory))
+        except FileNotFoundError:
+            return []
+        found = [own] if os.path.exists(own) else []
+        for name in names:
+            path = os.path.join(directory, name)
+            if path == own:
+                continue
+            if name in (root + ext, os.path.basename(self.journal_path) + ".replay"):
+                found.append(path)  # journal bersama versi lama (tanpa pid)
+                continue
+            if not (name.startswith(root + ".") and name.endswith(ext)):
+                continue
+            pid = name[len(root) + 1:-len(ext)].split(".")[0]
+            if pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid)):
+                found.append(path)
+        return found
+
+    def _journal_has_data(self):
+        if not self.journal_path:
+            return False
+        return os.path.exists(self._journal_file(replay=True)) or bool(self._claimable_journals())
+
+    def _claim_journal(self):
+        """Pindahkan satu journal ke file replay milik proses ini. False jika tidak ada."""
+        replay_path = self._journal_file(replay=True)
+        if os.path.exists(replay_path):
+            return True  # sisa replay yang gagal sebelumnya
+        for path in self._claimable_journals():
+            with self._journal_lock:  # _spill proses ini tidak menulis ke file yang sedang dipindah
+                try:
+                    os.replace(path, replay_path)
+                except FileNotFoundError:
+                    continue  # sudah diklaim proses lain
+            return True
+        return False
+
+    def _replay_journal(self):
+        if not self._claim_journal():
+            return
+        replay_path = self._journal_file(replay=True)
+
+        records = []
+        with open(replay_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                r = json.loads(line)
+                r["created_at"] = datetime.fromisoformat(r["created_at"])
+                records.append(r)
+
+        done = written = 0
+        with app.app_context():
+            while done < len(records):
+                chunk = records[done:done + self.batch_size]
+                n, pending = self._persist(chunk)
+                written += n
+                done += len(chunk) - len(pending)
+                if pending:
+                    break
+
+        self._count(replayed=written)
+        if done < len(records):
+            # sisa record ditulis ulang ke file .replay, dicoba lagi di putaran berikutnya
+            with open(replay_path, "w", encoding="utf-8") as f:
+                for r in records[done:]:
+                    f.write(json.dumps(dict(r, created_at=r["created_at"].isoformat())) + "\n")
+            print(f"⚠️ Replay journal chat gagal, {len(records) - done} record dicoba lagi nanti")
+            time.sleep(self.flush_interval)
+            return
+
+        os.remove(replay_path)
+        print(f"✅ {written} chat dari journal berhasil ditulis ke database"
+              + (f" ({len(records) - written} dikarantina)" if written < len(records) else ""))
+
+
+def _pid_alive(pid):
+    if os.name == "nt":
+        return True  # os.kill(pid, 0) di Windows menghentikan proses; anggap masih hidup
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
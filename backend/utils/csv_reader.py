@@ -0,0 +1,156 @@
+import codecs
+import csv
+import sys
+import time
+
+# ==============================================================
+# 🔹 PEMBACA CSV: SNIFF SEKALI + STREAMING PER CHUNK
+# ==============================================================
+# Pengganti rangkaian pd.read_csv (3 encoding x 3 mode engine) yang bisa
+# mem-parsing file buruk hingga 9 kali. Di sini:
+#   1. encoding + delimiter ditebak SEKALI dari sampel awal file (64 KB);
+#      jika file lebih besar dari sampel, encoding terpilih diverifikasi
+#      atas seluruh file (decoder inkremental, hanya byte) dan turun ke
+#      kandidat berikutnya jika ada byte cp1252 / latin-1 di belakang
+#   2. file dibaca satu kali dengan modul csv, dikeluarkan per chunk
+#      berukuran tetap → memori puncak sebanding chunk_size, bukan file
+#   3. baris rusak (jumlah kolom salah / kolom wajib kosong / byte tidak
+#      valid) dicatat lengkap dengan nomor barisnya pada pass yang sama
+
+SAMPLE_BYTES = 64 * 1024
+ENCODINGS = ("utf-8-sig", "utf-8", "cp1252", "latin1")
+DELIMITERS = ",;\t|"
+MAX_REPORTED_ERRORS = 100
+VERIFY_BLOCK_BYTES = 1024 * 1024
+
+
+def sniff_csv(path, sample_bytes=SAMPLE_BYTES):
+    """Tebak (encoding, delimiter) dari sampel awal file."""
+    with open(path, "rb") as f:
+        sample = f.read(sample_bytes)
+
+    if sample.startswith(codecs.BOM_UTF8):
+        candidates = [ENCODINGS[0]] + [enc for enc in ENCODINGS if not enc.startswith("utf-8")]
+    else:
+        # buang baris terakhir yang mungkin terpotong di tengah karakter multibyte
+        cut = sample.rfind(b"\n")
+        body = sample[:cut] if cut > 0 and len(sample) == sample_bytes else sample
+        candidates = [enc for enc in ENCODINGS[1:] if _decodes([body], enc)]
+
+    if len(sample) < sample_bytes:
+        encoding = candidates[0]  # sampel = seluruh file
+    else:
+        encoding = next(enc for enc in candidates if _decodes(_blocks(path), enc))
+
+    text = sample.decode(encoding, errors="replace")
+    try:
+        delimiter = csv.Sniffer().sniff(text, delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        header = text.splitlines()[0] if text else ""
+        counts = {d: header.count(d) for d in DELIMITERS}
+        delimiter = max(counts, key=counts.get) if any(counts.values()) else ","
+    return encoding, delimiter
+
+
+def _blocks(path):
+    with open(path, "rb") as f:
+        yield from iter(lambda: f.read(VERIFY_BLOCK_BYTES), b"")
+
+
+def _decodes(blocks, encoding):
+    """True jika seluruh byte valid untuk encoding (latin1 selalu True)."""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        for block in blocks:
+            decoder.decode(block)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+class CsvReport:
+    """Ringkasan satu pass pembacaan: jumlah baris + daftar baris rusak."""
+
+    def __init__(self, encoding, delimiter):
+        self.encoding = encoding
+        self.delimiter = delimiter
+        self.header = []
+        self.rows = 0
+        self.malformed = 0
+        self.errors = []
+
+    def error(self, line, reason):
+        self.malformed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "reason": reason})
+
+    def as_dict(self):
+        return {
+            "encoding": self.encoding,
+            "delimiter": self.delimiter,
+            "rows": self.rows,
+            "malformed_rows": self.malformed,
+            "errors": self.errors,
+        }
+
+
+def iter_csv_chunks(path, required=(), chunk_size=5000, report=None):
+    """
+    Generator list baris (dict kolom → nilai) per chunk.
+    Baris rusak dilewati dan dicatat ke `report` (CsvReport) dengan nomor baris fisik.
+    """
+    if report is None:
+        encoding, delimiter = sniff_csv(path)
+        report = CsvReport(encoding, delimiter)
+
+    with open(path, "r", encoding=report.encoding, errors="replace", newline="") as f:
+        reader = csv.reader(f, delimiter=report.delimiter)
+        try:
+            header = [h.strip().lower() for h in next(reader)]
+        except StopIteration:
+            return
+        if header and header[0].startswith("ï»¿"):
+            header[0] = header[0][3:]  # BOM UTF-8 terbaca sebagai cp1252 / latin1
+        report.header = header
+
+        missing = [c for c in required if c not in header]
+        if missing:
+            raise ValueError(f"❌ CSV harus punya kolom: {', '.join(required)} (tidak ada: {', '.join(missing)})")
+
+        chunk = []
+        line = reader.line_num
+        for fields in reader:
+            start, line = line + 1, reader.line_num
+            if not fields or not any(v.strip() for v in fields):
+                continue  # baris kosong bukan error
+            if len(fields) != len(header):
+                report.error(start, f"jumlah kolom {len(fields)}, seharusnya {len(header)}")
+                continue
+            row = dict(zip(header, (v.strip() for v in fields)))
+            empty = [c for c in required if not row[c]]
+            if empty:
+                report.error(start, f"kolom kosong: {', '.join(empty)}")
+                continue
+            if any("\ufffd" in row[c] for c in required):
+                report.error(start, f"karakter tidak valid untuk encoding {report.encoding}")
+                continue
+
+            report.rows += 1
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+if __name__ == "__main__":
+    # 🔹 python -m backend.utils.csv_reader file.csv → cek cepat sebuah CSV
+    started = time.perf_counter()
+    encoding, delimiter = sniff_csv(sys.argv[1])
+    report = CsvReport(encoding, delimiter)
+    for _ in iter_csv_chunks(sys.argv[1], report=report):
+        pass
+    print(report.as_dict())
+    print(f"⏱️ {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,233 @@
+import bisect
+import re
+import threading
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import func, select, text, tuple_
+
+from backend.config import db
+from backend.db.models import Dataset
+
+# ==============================================================
+# 🔹 PAGINASI, PENCARIAN & EKSPOR DATASET Q&A
+# ==============================================================
+# Dipakai GET /api/admin/dataset:
+#   - keyset pagination (cursor), bukan OFFSET / .all()
+#   - sort: id atau updated_at, asc / desc
+#   - pencarian teks di pertanyaan + jawaban:
+#       MySQL  → FULLTEXT index ft_dataset_text (MATCH ... AGAINST, boolean mode)
+#       lainnya (SQLite lokal) → token index in-app (posting list numpy),
+#                                 dibangun ulang otomatis jika tabel berubah
+#   - iter_rows(): batch keyset untuk ekspor streaming (memori konstan)
+
+FULLTEXT_INDEX = "ft_dataset_text"
+SORT_COLUMNS = {"id": Dataset.id, "updated_at": Dataset.updated_at}
+
+_TOKEN_RE = re.compile(r"(?u)\w+")
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# ==============================================================
+# 🔹 TOKEN INDEX IN-APP (untuk database tanpa FULLTEXT)
+# ==============================================================
+class DatasetTokenIndex:
+    """
+    Posting list per token → array id dataset (terurut).
+    Query = AND semua token; token terakhir dicocokkan sebagai prefix
+    supaya pencarian "jadw" sudah menemukan "jadwal".
+    updated_at ikut disimpan (mikrodetik) agar sort + keyset bisa
+    dikerjakan di numpy, dan database hanya diminta satu halaman id.
+    """
+
+    def __init__(self, postings, ids, updated, signature):
+        self.postings = postings
+        self.terms = sorted(postings)
+        self.ids = ids
+        self.updated = updated
+        self.signature = signature
+
+    @classmethod
+    def build(cls, rows, signature=None):
+        postings, ids, updated = {}, [], []
+        for row_id, pertanyaan, jawaban, updated_at in rows:
+            ids.append(row_id)
+            updated.append(_micros(updated_at))
+            for tok in set(tokenize(pertanyaan)) | set(tokenize(jawaban)):
+                postings.setdefault(tok, []).append(row_id)
+        ids = np.asarray(ids, dtype=np.int64)
+        order = np.argsort(ids)
+        return cls(
+            {t: np.unique(np.asarray(v, dtype=np.int64)) for t, v in postings.items()},
+            ids[order],
+            np.asarray(updated, dtype=np.int64)[order],
+            signature,
+        )
+
+    def updated_of(self, ids):
+        return self.updated[np.searchsorted(self.ids, ids)]
+
+    def search(self, query):
+        """Id dataset (terurut naik) yang memuat semua token query."""
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+        result = None
+        for i, tok in enumerate(tokens):
+            if i == len(tokens) - 1:
+                ids = self._prefix(tok)
+            else:
+                ids = self.postings.get(tok, np.empty(0, dtype=np.int64))
+            result = ids if result is None else np.intersect1d(result, ids, assume_unique=True)
+            if not len(result):
+                break
+        return result
+
+    def _prefix(self, prefix):
+        lo = bisect.bisect_left(self.terms, prefix)
+        hi = bisect.bisect_left(self.terms, prefix + "\uffff")
+        matches = [self.postings[t] for t in self.terms[lo:hi]]
+        if not matches:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(matches))
+
+
+_index_lock = threading.Lock()
+_token_index = None
+
+
+def _table_signature():
+    row = db.session.execute(
+        select(func.count(Dataset.id), func.max(Dataset.id), func.max(Dataset.updated_at))
+    ).one()
+    return tuple(str(v) for v in row)
+
+
+def token_index():
+    """Token index terkini; dibangun ulang jika isi tabel dataset berubah."""
+    global _token_index
+    signature = _table_signature()
+    with _index_lock:
+        if _token_index is None or _token_index.signature != signature:
+            rows = db.session.execute(
+                select(Dataset.id, Dataset.pertanyaan, Dataset.jawaban, Dataset.updated_at)
+            ).yield_per(5000)
+            _token_index = DatasetTokenIndex.build(rows, signature)
+        return _token_index
+
+
+# ==============================================================
+# 🔹 QUERY
+# ==============================================================
+def _dialect():
+    return db.session.get_bind().dialect.name
+
+
+def _micros(dt):
+    return int(np.datetime64(dt, "us").astype(np.int64)) if dt is not None else np.iinfo(np.int64).min
+
+
+def encode_cursor(row, sort):
+    if sort == "updated_at":
+        return f"{row.updated_at.isoformat()}_{row.id}"
+    return str(row.id)
+
+
+def decode_cursor(cursor, sort):
+    """Cursor → (updated_at, id) atau (None, id)."""
+    try:
+        if sort == "updated_at":
+            ts, row_id = cursor.rsplit("_", 1)
+            return datetime.fromisoformat(ts), int(row_id)
+        return None, int(cursor)
+    except ValueError:
+        raise InvalidCursor(f"Cursor tidak valid: {cursor}")
+
+
+def build_query(q=None, sort="id", descending=True, cursor=None):
+    """Query SQL: keyset + ORDER BY di database (pencarian via FULLTEXT MySQL)."""
+    column = SORT_COLUMNS[sort]
+    stmt = select(Dataset)
+    if q and tokenize(q):
+        boolean = " ".join(f"+{tok}*" for tok in tokenize(q))
+        stmt = stmt.where(
+            text("MATCH (dataset.pertanyaan, dataset.jawaban) AGAINST (:q IN BOOLEAN MODE)").bindparams(q=boolean)
+        )
+    if cursor:
+        updated_at, row_id = decode_cursor(cursor, sort)
+        if sort == "updated_at":
+            key, value = tuple_(Dataset.updated_at, Dataset.id), (updated_at, row_id)
+        else:
+            key, value = Dataset.id, row_id
+        stmt = stmt.where(key < value if descending else key > value)
+    if sort == "id":
+        order = [column.desc() if descending else column.asc()]
+    else:
+        order = [column.desc(), Dataset.id.desc()] if descending else [column.asc(), Dataset.id.asc()]
+    return stmt.order_by(*order)
+
+
+def _indexed_page(q, sort, descending, cursor, limit):
+    """Pencarian lewat token index: filter, sort & keyset di numpy, lalu ambil 1 halaman."""
+    index = token_index()
+    ids = index.search(q)
+    updated = index.updated_of(ids) if sort == "updated_at" else None
+
+    if cursor:
+        c_updated, c_id = decode_cursor(cursor, sort)
+        if sort == "updated_at":
+            cu = _micros(c_updated)
+            mask = (updated < cu) | ((updated == cu) & (ids < c_id)) if descending \
+                else (updated > cu) | ((updated == cu) & (ids > c_id))
+            updated = updated[mask]
+        else:
+            mask = ids < c_id if descending else ids > c_id
+        ids = ids[mask]
+
+    order = np.lexsort((ids, updated)) if sort == "updated_at" else np.arange(len(ids))
+    if descending:
+        order = order[::-1]
+    page_ids = ids[order[:limit + 1]].tolist()
+
+    by_id = {d.id: d for d in Dataset.query.filter(Dataset.id.in_(page_ids)).all()} if page_ids else {}
+    return [by_id[i] for i in page_ids if i in by_id]
+
+
+def fetch_page(q=None, sort="id", descending=True, cursor=None, limit=50):
+    """Satu halaman + cursor halaman berikutnya (None jika sudah habis)."""
+    if q and tokenize(q) and _dialect() != "mysql":
+        rows = _indexed_page(q, sort, descending, cursor, limit)
+    else:
+        rows = db.session.execute(
+            build_query(q, sort, descending, cursor).limit(limit + 1)
+        ).scalars().all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return rows, (encode_cursor(rows[-1], sort) if has_more else None)
+
+
+def iter_rows(q=None, sort="id", descending=True, batch_size=1000):
+    """Seluruh baris yang cocok, dibaca per batch keyset (untuk ekspor streaming)."""
+    cursor = None
+    while True:
+        rows, cursor = fetch_page(q, sort, descending, cursor, limit=batch_size)
+        yield from rows
+        db.session.expunge_all()
+        if cursor is None:
+            return
+
+
+def serialize(d):
+    return {
+        "id": d.id,
+        "pertanyaan": d.pertanyaan,
+        "jawaban": d.jawaban,
+        "updated_at": d.updated_at.strftime("%Y-%m-%d %H:%M:%S") if d.updated_at else None,
+    }
@@ -0,0 +1,121 @@
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+
+from sqlalchemy import delete, insert, select, update
+
+from backend.config import db
+from backend.db.models import Dataset, dataset_hash
+
+# ==============================================================
+# 🔹 SINKRONISASI DATASET DIFERENSIAL
+# ==============================================================
+# Upload CSV tidak lagi menghapus seluruh tabel lalu memasukkan ulang
+# baris per baris lewat ORM. Setiap pasangan (pertanyaan, jawaban)
+# di-hash, dibandingkan dengan isi tabel, dan hanya selisihnya yang
+# ditulis:
+#
+#   1. hash sama                       → tidak berubah (id tetap)
+#   2. pertanyaan sama, jawaban beda   → UPDATE (id tetap)
+#   3. sisa baris CSV                  → INSERT
+#   4. sisa baris tabel                → DELETE
+#
+# Pasangan duplikat diperlakukan sebagai multiset (2 baris identik di CSV
+# = 2 baris di tabel). Semua penulisan memakai statement Core per chunk
+# (executemany) dalam SATU transaksi.
+
+CHUNK_SIZE = 1000
+SAMPLE_SIZE = 5
+
+
+def sync_dataset(pairs, mode="sync"):
+    """
+    pairs : iterable (pertanyaan, jawaban) yang sudah dibersihkan
+    mode  : "sync" (diferensial) atau "replace" (hapus semua lalu insert)
+    Butuh app context. Mengembalikan laporan diff.
+    """
+    started = time.perf_counter()
+    incoming = [(q, a, dataset_hash(q, a)) for q, a in pairs]
+    now = datetime.utcnow()
+
+    try:
+        if mode == "replace":
+            removed = db.session.execute(delete(Dataset)).rowcount
+            inserts, updates, deletes, unchanged = incoming, [], [], 0
+        else:
+            inserts, updates, deletes, unchanged = _diff(incoming)
+            removed = len(deletes)
+
+        for i in range(0, len(deletes), CHUNK_SIZE):
+            db.session.execute(delete(Dataset).where(Dataset.id.in_(deletes[i:i + CHUNK_SIZE])))
+        for i in range(0, len(updates), CHUNK_SIZE):
+            db.session.execute(update(Dataset), [
+                {"id": row_id, "jawaban": a, "content_hash": h, "updated_at": now}
+                for row_id, q, a, h in updates[i:i + CHUNK_SIZE]
+            ])
+        for i in range(0, len(inserts), CHUNK_SIZE):
+            db.session.execute(insert(Dataset), [
+                {"pertanyaan": q, "jawaban": a, "content_hash": h, "updated_at": now}
+                for q, a, h in inserts[i:i + CHUNK_SIZE]
+            ])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    report = {
+        "mode": mode,
+        "total": len(incoming),
+        "added": len(inserts),
+        "removed": removed,
+        "changed": len(updates),
+        "unchanged": unchanged,
+        "samples": {
+            "added": [q for q, _, _ in inserts[:SAMPLE_SIZE]],
+            "changed": [q for _, q, _, _ in updates[:SAMPLE_SIZE]],
+        },
+        "db_seconds": round(time.perf_counter() - started, 3),
+    }
+    print(f"✅ Sinkronisasi dataset: +{report['added']} / -{report['removed']} / "
+          f"~{report['changed']} (tetap {report['unchanged']}) dalam {report['db_seconds']}s")
+    return report
+
+
+def _diff(incoming):
+    """Bandingkan baris CSV dengan isi tabel → (inserts, updates, deletes, unchanged)."""
+    by_hash = defaultdict(deque)     # hash → id baris tabel (urut naik)
+    question_of = {}                 # id → pertanyaan
+    for row_id, q, h in db.session.execute(
+        select(Dataset.id, Dataset.pertanyaan, Dataset.content_hash).order_by(Dataset.id)
+    ):
+        by_hash[h].append(row_id)
+        question_of[row_id] = q
+
+    # 1) pasangan identik
+    unchanged = 0
+    pending = []
+    for q, a, h in incoming:
+        ids = by_hash.get(h)
+        if ids:
+            ids.popleft()
+            unchanged += 1
+        else:
+            pending.append((q, a, h))
+
+    # 2) pertanyaan sama, jawaban berubah
+    leftover_by_question = defaultdict(deque)
+    for ids in by_hash.values():
+        for row_id in ids:
+            leftover_by_question[question_of[row_id]].append(row_id)
+
+    inserts, updates = [], []
+    for q, a, h in pending:
+        ids = leftover_by_question.get(q)
+        if ids:
+            updates.append((ids.popleft(), q, a, h))
+        else:
+            inserts.append((q, a, h))
+
+    # 3) sisa baris tabel dihapus
+    deletes = sorted(row_id for ids in leftover_by_question.values() for row_id in ids)
+    return inserts, updates, deletes, unchanged
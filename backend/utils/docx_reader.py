@@ -0,0 +1,197 @@
+import os
+import re
+import sys
+import time
+import zipfile
+from collections import namedtuple
+from xml.etree.ElementTree import iterparse
+
+# ==============================================================
+# 🔹 PEMBACA .DOCX STREAMING (ITERPARSE word/document.xml)
+# ==============================================================
+# Pengganti python-docx + `full_text +=` untuk dokumen SK / kurikulum
+# yang besar. word/document.xml dibaca langsung dari zip secara
+# incremental; setiap paragraf dan baris tabel dikeluarkan sebagai blok
+# sesuai urutan di dokumen, lalu elemen XML-nya dibuang. Memori puncak
+# sebanding satu blok, bukan seluruh dokumen.
+#
+# Blok membawa metadata struktur:
+#   kind  : "paragraph" | "table_row"
+#   style : id style paragraf (mis. "Heading1", "Judul2", "ListParagraph")
+#   level : level heading (1..9) atau None
+#   table : nomor tabel (0, 1, ...) untuk baris tabel, selain itu None
+#   row   : nomor baris di dalam tabel
+#   cells : teks per sel (hanya baris tabel)
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+DOCUMENT_XML = "word/document.xml"
+
+DocBlock = namedtuple("DocBlock", "kind text style level table row cells")
+
+_HEADING_RE = re.compile(r"^(?:heading|judul|title)\s*(\d*)$", re.IGNORECASE)
+_BREAKS = {W + "tab", W + "br", W + "cr"}
+
+
+def _heading_level(style, outline):
+    if outline is not None:
+        return outline + 1
+    match = _HEADING_RE.match(style or "")
+    if match:
+        return int(match.group(1) or 1)
+    return None
+
+
+def iter_docx_blocks(path):
+    """Generator DocBlock dari file .docx sesuai urutan dokumen."""
+    if not zipfile.is_zipfile(path):
+        raise ValueError("❌ Bukan file .docx (format .doc lama tidak didukung, simpan ulang sebagai .docx)")
+
+    with zipfile.ZipFile(path) as archive, archive.open(DOCUMENT_XML) as xml:
+        body = None
+        table_depth = 0     # > 0 → sedang di dalam tabel (tabel bersarang ikut sel luar)
+        table_no = -1
+        row_no = 0
+        parts = []          # potongan teks paragraf / sel yang sedang dibaca
+        cells = []
+        style, outline = None, None
+
+        for event, elem in iterparse(xml, events=("start", "end")):
+            tag = elem.tag
+            if event == "start":
+                if tag == W + "body":
+                    body = elem
+                elif tag == W + "tbl":
+                    table_depth += 1
+                    if table_depth == 1:
+                        table_no += 1
+                        row_no = 0
+                elif tag == W + "tr" and table_depth == 1:
+                    cells = []
+                elif tag == W + "tc" and table_depth == 1:
+                    parts = []
+                elif tag == W + "p" and table_depth == 0:
+                    parts, style, outline = [], None, None
+                continue
+
+            # ---- event "end" ----
+            if tag == W + "t":
+                if elem.text:
+                    parts.append(elem.text)
+            elif tag in _BREAKS:
+                parts.append(" ")
+            elif tag == W + "pStyle" and table_depth == 0:
+                style = elem.get(W + "val")
+            elif tag == W + "outlineLvl" and table_depth == 0:
+                outline = int(elem.get(W + "val", 0))
+            elif tag == W + "p":
+                if table_depth == 0:
+                    text = "".join(parts)
+                    if text.strip():
+                        yield DocBlock("paragraph", text, style, _heading_level(style, outline), None, None, None)
+                    parts = []
+                    if body is not None:
+                        body.clear()  # paragraf selesai → buang dari pohon XML
+                else:
+                    parts.append("\n")  # antar paragraf di dalam sel
+            elif tag == W + "tc" and table_depth == 1:
+                cells.append("".join(parts).strip())
+                parts = []
+            elif tag == W + "tr" and table_depth == 1:
+                if any(cells):
+                    yield DocBlock("table_row", " ".join(c for c in cells if c), None, None, table_no, row_no, cells)
+                row_no += 1
+                elem.clear()
+            elif tag == W + "tbl":
+                table_depth -= 1
+                if table_depth == 0 and body is not None:
+                    body.clear()
+
+
+def extract_docx_text(path):
+    """Teks seluruh dokumen (paragraf & baris tabel dipisah newline)."""
+    return "\n".join(block.text for block in iter_docx_blocks(path))
+
+
+# ==============================================================
+# 🔹 BENCHMARK vs python-docx
+# ==============================================================
+def make_synthetic_docx(path, sections=200, paragraphs_per_section=20, table_rows=40):
+    """Dokumen SK tiruan: heading per bab, paragraf pasal, dan tabel besar per bab."""
+    from docx import Document
+
+    words = ("mahasiswa wajib mengikuti kegiatan akademik sesuai jadwal yang ditetapkan "
+             "oleh fakultas dan program studi dengan ketentuan berlaku").split()
+    doc = Document()
+    n = 0
+    for s in range(sections):
+        doc.add_heading(f"BAB {s + 1}", level=1)
+        for _ in range(paragraphs_per_section):
+            n += 1
+            doc.add_paragraph(f"Pasal {n} " + " ".join(words[(n + k) % len(words)] for k in range(12)) + ".")
+        if table_rows:
+            table = doc.add_table(rows=table_rows, cols=3)
+            for r, row in enumerate(table.rows):
+                row.cells[0].text = f"{r + 1}"
+                row.cells[1].text = f"MK{s:03d}{r:02d} " + words[r % len(words)]
+                row.cells[2].text = f"{(r % 4) + 1} sks."
+    doc.save(path)
+    return path
+
+
+def _legacy_sentences(path):
+    from backend.utils.pdf_parser import split_sentences, normalize_text, _legacy_word_text
+    return split_sentences(normalize_text(_legacy_word_text(path)))
+
+
+def _streaming_sentences(path):
+    from backend.utils.pdf_parser import iter_word_sentences
+    return list(iter_word_sentences(path))
+
+
+def _streaming_count(path):
+    from backend.utils.pdf_parser import iter_word_sentences
+    return sum(1 for _ in iter_word_sentences(path))
+
+
+def _measure(fn, path, consume=None):
+    """(hasil, detik, memori puncak). Memori diukur terpisah karena tracemalloc memperlambat."""
+    import tracemalloc
+    started = time.perf_counter()
+    result = fn(path)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    (consume or fn)(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def benchmark(section_counts=(50, 200, 800)):
+    import tempfile
+    print("🔹 Benchmark ekstraksi .docx (python-docx vs iterparse streaming)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for sections in section_counts:
+            path = make_synthetic_docx(os.path.join(tmp, f"sk_{sections}.docx"), sections=sections)
+            with zipfile.ZipFile(path) as archive:
+                size_mb = archive.getinfo(DOCUMENT_XML).file_size / 1e6
+
+            legacy, t_legacy, m_legacy = _measure(_legacy_sentences, path)
+            # memori streaming diukur tanpa menyimpan hasil (konsumen menulis ke DB per batch)
+            stream, t_stream, m_stream = _measure(_streaming_sentences, path, consume=_streaming_count)
+
+            # python-docx menaruh semua tabel di akhir; streaming mengikuti urutan dokumen
+            same = sorted(legacy) == sorted(stream)
+            print(f"  {sections:>4} bab (XML {size_mb:5.1f} MB) | {len(stream):>6} kalimat | "
+                  f"python-docx {t_legacy:6.2f}s / {m_legacy / 1e6:7.1f} MB | "
+                  f"streaming {t_stream:6.2f}s / {m_stream / 1e6:5.1f} MB | "
+                  f"{'✅ isi kalimat sama' if same else '⚠️ isi kalimat berbeda'}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        # 🔹 python -m backend.utils.docx_reader bench
+        benchmark()
+    else:
+        # 🔹 python -m backend.utils.docx_reader file.docx → daftar blok
+        for block in iter_docx_blocks(sys.argv[1]):
+            print(block.kind, block.level or "", block.table if block.table is not None else "", block.text[:100])
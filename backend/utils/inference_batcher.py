@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import deque
+
+# ==============================================================
+# 🔹 MICRO-BATCHING INFERENCE SCHEDULER
+# ==============================================================
+# Pertanyaan yang datang bersamaan dari banyak request dikumpulkan
+# selama beberapa milidetik, lalu diproses dalam SATU panggilan batch
+# (misalnya satu kali main_model.predict), dan hasilnya dikembalikan
+# ke masing-masing request yang menunggu.
+
+
+class _PendingItem:
+    __slots__ = ("item", "enqueued_at", "done", "result", "error")
+
+    def __init__(self, item):
+        self.item = item
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class InferenceBatcher:
+    """
+    Scheduler batch sederhana berbasis satu worker thread.
+
+    handler(items) menerima list input dan HARUS mengembalikan list hasil
+    dengan panjang dan urutan yang sama.
+    """
+
+    def __init__(self, handler, max_batch_size=32, max_wait_ms=5.0, name="batcher"):
+        self.handler = handler
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._worker = None
+
+        # Metrik
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._errors = 0
+        self._batch_sizes = {}
+        self._recent_waits = deque(maxlen=1000)
+        self._max_wait_seen = 0.0
+
+    # ------------------------------
+    # API untuk request thread
+    # ------------------------------
+    def submit(self, item, timeout=None):
+        """Masukkan satu item ke antrean dan tunggu hasil batch-nya."""
+        pending = _PendingItem(item)
+        with self._cond:
+            self._ensure_worker()
+            self._queue.append(pending)
+            self._cond.notify()
+
+        if not pending.done.wait(timeout):
+            raise TimeoutError(f"{self.name}: inference melebihi batas waktu {timeout}s")
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def stats(self):
+        with self._stats_lock:
+            waits = sorted(self._recent_waits)
+            avg_batch = (self._items / self._batches) if self._batches else 0.0
+            return {
+                "name": self.name,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "queue_length": len(self._queue),
+                "batches": self._batches,
+                "items": self._items,
+                "errors": self._errors,
+                "avg_batch_size": round(avg_batch, 2),
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "queue_wait_ms": {
+                    "p50": round(_percentile(waits, 50) * 1000.0, 3),
+                    "p95": round(_percentile(waits, 95) * 1000.0, 3),
+                    "max": round(self._max_wait_seen * 1000.0, 3),
+                },
+            }
+
+    # ------------------------------
+    # Worker thread
+    # ------------------------------
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run, name=f"{self.name}-worker", daemon=True
+            )
+            self._worker.start()
+
+    def _collect_batch(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+
+            # Tunggu item lain sampai batch penuh atau batas waktu habis
+            deadline = self._queue[0].enqueued_at + self.max_wait
+            while len(self._queue) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            size = min(len(self._queue), self.max_batch_size)
+            return [self._queue.popleft() for _ in range(size)]
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            started = time.perf_counter()
+            self._record(batch, started)
+
+            try:
+                results = self.handler([p.item for p in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(
+                        f"{self.name}: handler mengembalikan {len(results)} hasil untuk {len(batch)} input"
+                    )
+                for pending, result in zip(batch, results):
+                    pending.result = result
+            except Exception as e:
+                print(f"❌ Error di {self.name}:", e)
+                with self._stats_lock:
+                    self._errors += 1
+                for pending in batch:
+                    pending.error = e
+            finally:
+                for pending in batch:
+                    pending.done.set()
+
+    def _record(self, batch, started):
+        with self._stats_lock:
+            self._batches += 1
+            self._items += len(batch)
+            self._batch_sizes[len(batch)] = self._batch_sizes.get(len(batch), 0) + 1
+            for pending in batch:
+                wait = started - pending.enqueued_at
+                self._recent_waits.append(wait)
+                if wait > self._max_wait_seen:
+                    self._max_wait_seen = wait
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = int(round((pct / 100.0) * (len(sorted_values) - 1)))
+    return sorted_values[k]
@@ -1,13 +1,33 @@
+import hashlib
 import os
-import pandas as pd
-from backend.config import app, db, UPLOADS_DIR
-from backend.db.models import Dataset, Peraturan
+import time
+from datetime import datetime
+
+from sqlalchemy import delete, insert, select
+
+from backend.config import (
+    app, db, UPLOADS_DIR, PERATURAN_INSERT_BATCH, PERATURAN_DEBUG_TXT,
+    PERATURAN_PASSAGE_TARGET_CHARS, PERATURAN_PASSAGE_MAX_CHARS,
+)
+from backend.db.models import Peraturan, PeraturanDocument
+from backend.db.upsert import upsert
+from backend.utils.dataset_sync import sync_dataset
+from backend.utils.csv_reader import CsvReport, iter_csv_chunks, sniff_csv
+from backend.utils.pdf_parser import iter_document_blocks
+from backend.utils.regulation_chunker import RegulationChunker, iter_passages
 
 # Folder upload
 DATASET_PATH = os.path.join(UPLOADS_DIR, "datasets")
 TEXT_PATH = os.path.join(UPLOADS_DIR, "texts")
-
-def load_dataset_to_db(file_path: str = None, remove_file: bool = True):
+REQUIRED_COLUMNS = ("pertanyaan", "jawaban")
+
+def load_dataset_to_db(file_path: str = None, remove_file: bool = True, mode: str = "sync"):
+    """
+    Baca CSV lalu sinkronkan ke tabel dataset.
+    mode="sync"    → hanya selisih (tambah/ubah/hapus) yang ditulis
+    mode="replace" → isi tabel diganti seluruhnya
+    Mengembalikan (laporan diff, jumlah baris yang dilewati).
+    """
     if file_path is None:
         dataset_files = [f for f in os.listdir(DATASET_PATH) if f.endswith(".csv")]
         if not dataset_files:
@@ -15,62 +35,22 @@ def load_dataset_to_db(file_path: str = None, remove_file: bool = True):
         file_path = os.path.join(DATASET_PATH, dataset_files[0])
 
     print(f"📄 Membaca dataset: {file_path}")
-    # Try common encodings to avoid UnicodeDecodeError on various CSVs
-    read_errors = []
-    encodings_to_try = ["utf-8-sig", "utf-8", "latin1"]
-    data = None
-    used_encoding = None
-    skipped_rows = 0
-
-    for enc in encodings_to_try:
-        # First try the default C engine reading
-        try:
-            data = pd.read_csv(file_path, encoding=enc)
-            used_encoding = enc
-            print(f"Berhasil membaca CSV dengan encoding: {enc} (C engine)")
-            break
-        except Exception as e:
-            read_errors.append((enc, f"C engine: {e}"))
-        # Try python engine with automatic separator detection
-        try:
-            data = pd.read_csv(file_path, encoding=enc, sep=None, engine='python')
-            used_encoding = enc
-            print(f"ℹ️ Berhasil membaca CSV dengan encoding: {enc} (python engine, sep auto-detect)")
-            break
-        except Exception as e:
-            read_errors.append((enc, f"python engine sep auto: {e}"))
-        # Try skipping bad lines (pandas >=1.3 supports on_bad_lines)
-        try:
-            data = pd.read_csv(file_path, encoding=enc, sep=None, engine='python', on_bad_lines='skip')
-            used_encoding = enc
-            print(f"⚠️ CSV dibaca dengan skipping bad lines using encoding: {enc}")
-            # compute skipped rows approximately
-            try:
-                total_lines = sum(1 for _ in open(file_path, 'r', encoding=enc, errors='replace'))
-                # subtract header line
-                skipped_rows = max(0, total_lines - 1 - len(data))
-            except Exception:
-                skipped_rows = 0
-            break
-        except Exception as e:
-            read_errors.append((enc, f"python engine skip: {e}"))
+    # Encoding & delimiter ditebak sekali, lalu file dibaca satu pass per chunk
+    encoding, delimiter = sniff_csv(file_path)
+    csv_report = CsvReport(encoding, delimiter)
+    print(f"ℹ️ CSV terdeteksi: encoding {encoding}, delimiter {delimiter!r}")
 
-    if data is None:
-        err_msgs = "; ".join([f"{enc}:{msg}" for enc, msg in read_errors])
-        raise ValueError(f"Gagal membaca CSV. Attempts: {err_msgs}")
+    pairs = []
+    for chunk in iter_csv_chunks(file_path, required=REQUIRED_COLUMNS, report=csv_report):
+        pairs.extend((row["pertanyaan"], row["jawaban"]) for row in chunk)
 
-    if "pertanyaan" not in data.columns or "jawaban" not in data.columns:
-        raise ValueError("❌ CSV harus punya kolom: pertanyaan, jawaban")
+    skipped_rows = csv_report.malformed
+    if skipped_rows:
+        print(f"⚠️ {skipped_rows} baris CSV dilewati, contoh: {csv_report.errors[:3]}")
 
     with app.app_context():
-        # Hapus entri lama sebelum memasukkan yang baru
-        db.session.query(Dataset).delete()
-        for _, row in data.iterrows():
-            item = Dataset(pertanyaan=row["pertanyaan"], jawaban=row["jawaban"])
-            db.session.add(item)
-        db.session.commit()
-        inserted = len(data)
-        print(f"✅ {inserted} baris dataset berhasil dimasukkan ke tabel 'dataset'.")
+        report = sync_dataset(pairs, mode=mode)
+    report["csv"] = csv_report.as_dict()
 
     # Hapus file CSV yang sudah diproses untuk mencegah pemrosesan ulang.
     # Hapus file CSV lama di folder dataset, tetapi biarkan file yang baru saja diproses.
@@ -100,57 +80,166 @@ def load_dataset_to_db(file_path: str = None, remove_file: bool = True):
         except Exception as e:
             print(f"⚠️ Gagal saat proses penghapusan file dataset: {e}")
 
-    return inserted, skipped_rows
+    return report, skipped_rows
 
 
-def load_peraturan_to_db():
-    text_files = [f for f in os.listdir(TEXT_PATH) if f.endswith(".txt")]
-    if not text_files:
-        raise FileNotFoundError("❌ Tidak ada file hasil parsing PDF di uploads/texts/")
-    
-    text_file = os.path.join(TEXT_PATH, text_files[0])
-    filename = os.path.basename(text_file)
-    print(f"📘 Membaca file peraturan: {text_file}")
+# ==============================================================
+# 🔹 INGEST PERATURAN: STREAM PASSAGE → INSERT BATCH
+# ==============================================================
+# Passage dari RegulationChunker (BAB / Pasal / ayat / huruf) langsung
+# dimasukkan ke tabel peraturan per batch (Core insert, executemany)
+# tanpa lewat file "N. kalimat" di uploads/texts. File teks hanya
+# ditulis jika PERATURAN_DEBUG_TXT=1. Teks hasil ekstraksi disimpan
+# sekali di peraturan_documents.text_blob; setiap baris menyimpan
+# passage_id, label ("Pasal 12 ayat (1)") dan offset byte ke blob itu.
+#
+# Korpus dikelola per dokumen: upload hanya mengganti baris milik
+# filename tersebut. Dokumen dengan hash isi (sha256 file) yang sama
+# dengan yang tersimpan di peraturan_documents dilewati tanpa parsing.
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
 
-    with open(text_file, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
-    # Setiap baris di file adalah: "1. Kalimat pertama", "2. Kalimat kedua", dll
-    sentences = []
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        # Pisahkan nomor dan kalimat (format: "1. kalimat")
-        parts = line.split(".", 1)
-        if len(parts) == 2:
-            try:
-                sentence_number = int(parts[0].strip())
-                sentence_text = parts[1].strip()
-                if sentence_text:
-                    sentences.append((sentence_number, sentence_text))
-            except ValueError:
-                # Jika format tidak sesuai, skip baris ini
-                continue
 
+def stored_document_hash(filename):
     with app.app_context():
-        db.session.query(Peraturan).delete()
-        for sentence_number, sentence_text in sentences:
-            entry = Peraturan(
-                sentence_number=sentence_number,
-                sentence=sentence_text,
-                filename=filename
+        return db.session.execute(
+            select(PeraturanDocument.content_hash).where(PeraturanDocument.filename == filename)
+        ).scalar_one_or_none()
+
+
+def ingest_peraturan(sentences, filename, content_hash=None, debug_txt=PERATURAN_DEBUG_TXT,
+                     batch_size=PERATURAN_INSERT_BATCH, text_blob=None):
+    """
+    Ganti kalimat milik SATU dokumen di tabel peraturan (dokumen lain tidak disentuh).
+    sentences : iterable Passage atau kalimat biasa (urut), filename : nama dokumen sumber.
+    text_blob : bytes / callable → bytes (dipanggil setelah semua passage terbaca),
+                acuan offset passage.
+    Semua batch + baris peraturan_documents ditulis dalam satu transaksi.
+    Mengembalikan jumlah kalimat / passage.
+    """
+    started = time.perf_counter()
+    if content_hash is None:
+        sentences = list(sentences)
+        content_hash = hashlib.sha256(
+            "\n".join(getattr(s, "text", s) for s in sentences).encode("utf-8")
+        ).hexdigest()
+    debug_file = None
+    if debug_txt:
+        os.makedirs(TEXT_PATH, exist_ok=True)
+        debug_path = os.path.join(TEXT_PATH, os.path.splitext(filename)[0] + ".txt")
+        debug_file = open(debug_path, "w", encoding="utf-8")
+
+    total = 0
+    with app.app_context():
+        try:
+            db.session.execute(delete(Peraturan).where(Peraturan.filename == filename))
+            now = datetime.utcnow()
+            batch = []
+            for total, item in enumerate(sentences, 1):
+                row = {"sentence_number": total, "filename": filename, "uploaded_at": now,
+                       "passage_id": None, "label": None, "start_offset": None, "end_offset": None}
+                if isinstance(item, str):
+                    sentence = row["sentence"] = item
+                else:
+                    sentence = row["sentence"] = item.text
+                    row.update(passage_id=item.passage_id, label=item.label,
+                               start_offset=item.start, end_offset=item.end)
+                batch.append(row)
+                if debug_file:
+                    debug_file.write(f"{total}. {sentence}\n")
+                if len(batch) >= batch_size:
+                    db.session.execute(insert(Peraturan), batch)
+                    batch = []
+            if batch:
+                db.session.execute(insert(Peraturan), batch)
+            if callable(text_blob):
+                text_blob = text_blob()
+            upsert(
+                PeraturanDocument,
+                [{"filename": filename, "content_hash": content_hash, "sentence_count": total,
+                  "text_blob": text_blob, "uploaded_at": now, "updated_at": now}],
+                key_columns=["filename"], replace=["content_hash", "sentence_count", "text_blob", "updated_at"],
             )
-            db.session.add(entry)
-        db.session.commit()
-        print(f"✅ {len(sentences)} kalimat berhasil dimasukkan ke tabel 'peraturan'.")
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            if debug_file:
+                debug_file.close()
+
+    print(f"✅ {total} passage dari '{filename}' dimasukkan ke tabel 'peraturan' "
+          f"dalam {time.perf_counter() - started:.2f}s")
+    return total
+
+
+def load_peraturan_file(path: str, debug_txt=PERATURAN_DEBUG_TXT, force=False, filename=None, content_hash=None):
+    """
+    Parse PDF / Word lalu langsung ingest ke tabel peraturan.
+    filename (kunci dokumen di korpus) default = nama file di path.
+    Mengembalikan {"filename", "status": added|replaced|unchanged, "sentences", "content_hash"}.
+    """
+    filename = filename or os.path.basename(path)
+    content_hash = content_hash or file_sha256(path)
+    previous = stored_document_hash(filename)
+    if previous == content_hash and not force:
+        print(f"⏭️ Dokumen '{filename}' tidak berubah, ingest dilewati")
+        return {"filename": filename, "status": "unchanged", "sentences": None, "content_hash": content_hash}
+
+    print(f"📘 Memproses dokumen peraturan: {path}")
+    chunker = RegulationChunker(PERATURAN_PASSAGE_TARGET_CHARS, PERATURAN_PASSAGE_MAX_CHARS)
+    total = ingest_peraturan(
+        iter_passages(iter_document_blocks(path), chunker), filename, content_hash,
+        debug_txt=debug_txt, text_blob=chunker.blob,
+    )
+    return {
+        "filename": filename,
+        "status": "added" if previous is None else "replaced",
+        "sentences": total,
+        "content_hash": content_hash,
+    }
+
+
+def _iter_numbered_lines(text_file):
+    """Baca file debug "N. kalimat" (format lama)."""
+    with open(text_file, "r", encoding="utf-8") as f:
+        for line in f:
+            number, _, sentence = line.strip().partition(". ")
+            if number.isdigit() and sentence.strip():
+                yield sentence.strip()
+
+
+def load_peraturan_to_db(text_file: str = None):
+    """
+    Muat ulang peraturan dari file teks "N. kalimat" (hasil lama / artefak debug).
+    Upload baru memakai load_peraturan_file() tanpa file perantara.
+    """
+    if text_file is None:
+        text_files = sorted(
+            (f for f in os.listdir(TEXT_PATH) if f.endswith(".txt")),
+            key=lambda f: os.path.getmtime(os.path.join(TEXT_PATH, f)),
+            reverse=True,
+        ) if os.path.isdir(TEXT_PATH) else []
+        if not text_files:
+            raise FileNotFoundError("❌ Tidak ada file hasil parsing PDF di uploads/texts/")
+        text_file = os.path.join(TEXT_PATH, text_files[0])
+
+    print(f"📘 Membaca file peraturan: {text_file}")
+    return ingest_peraturan(
+        _iter_numbered_lines(text_file), os.path.basename(text_file), file_sha256(text_file), debug_txt=False
+    )
 
 
 if __name__ == "__main__":
     print("🚀 Memulai proses load dataset & peraturan ke database...")
     try:
-        inserted = load_dataset_to_db()
-        print(f"🎉 {inserted} baris dataset dimasukkan ke database")
+        report, skipped = load_dataset_to_db()
+        print(f"🎉 Dataset tersinkron: +{report['added']} / -{report['removed']} / ~{report['changed']}")
     except Exception as e:
         print(f"❌ Error load dataset: {e}")
 
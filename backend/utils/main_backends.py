@@ -0,0 +1,307 @@
+import json
+import os
+import pickle
+import re
+import sys
+import time
+import warnings
+import zlib
+
+import numpy as np
+
+from backend.config import MODEL_ALLOW_PICKLE
+from backend.utils.mmap_artifacts import save_artifact, load_artifact, is_artifact, artifact_size
+from backend.utils.model_registry import (
+    MAIN_LSTM_DIR, MAIN_LINEAR_DIR, MAIN_MODEL_NPZ, MAIN_MODEL_H5, MAIN_LINEAR_NPZ, TOKEN_MAIN, LABEL_MAIN,
+)
+from backend.utils.numpy_lstm import NumpyBiLSTM, pad_sequences
+
+# ==============================================================
+# 🔹 BACKEND MODEL UTAMA (PLUGGABLE)
+# ==============================================================
+# chatbot_routes hanya memakai antarmuka berikut, sehingga model utama
+# bisa diganti per deployment (MAIN_MODEL_BACKEND) tanpa menyentuh route:
+#
+#   name               : "lstm" | "linear"
+#   threshold          : ambang confidence khusus backend (None → default route)
+#   predict(questions) → matriks probabilitas (n, kelas) float32
+#   answers(label_ids) → list jawaban untuk id kelas
+#
+# Backend ditentukan oleh artefak di folder versi: main_linear/ →
+# LinearIntentModel, selain itu BiLSTM (main_lstm/). Keduanya folder
+# artefak mmap; .npz / .h5 + pickle hanya untuk versi lama.
+#
+#   lstm   : BiLSTM Keras (NumPy engine saat serving), training menit
+#   linear : fitur n-gram kata + karakter yang di-hash (crc32, 2^20 slot),
+#            regresi logistik multinomial; training detik, inferensi < 1 ms.
+#            Hanya slot hash yang muncul saat training disimpan (vocab ringkas).
+
+HASH_BITS = 20
+_WORD_RE = re.compile(r"(?u)\b\w+\b")
+
+
+class LstmBackend:
+    name = "lstm"
+    threshold = None
+
+    def __init__(self, model, tokenizer, classes):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.classes = classes  # jawaban per id kelas (urutan LabelEncoder.classes_)
+
+    @classmethod
+    def load(cls, model_dir):
+        """
+        Utamakan folder mmap main_lstm/ (bobot + vocab + tabel jawaban).
+        Versi lama: .npz / .h5 + label_main.pkl (TensorFlow hanya jika .npz belum ada).
+        """
+        lstm_dir = os.path.join(model_dir, MAIN_LSTM_DIR)
+        if is_artifact(lstm_dir):
+            model = NumpyBiLSTM.load(lstm_dir)
+            return cls(model, model.tokenizer, model.classes)
+
+        npz_path = os.path.join(model_dir, MAIN_MODEL_NPZ)
+        h5_path = os.path.join(model_dir, MAIN_MODEL_H5)
+        tokenizer = None
+        if os.path.exists(npz_path):
+            model = NumpyBiLSTM.load(npz_path)
+            tokenizer = model.tokenizer
+        elif os.path.exists(h5_path):
+            from tensorflow.keras.models import load_model
+            model = load_model(h5_path)
+        else:
+            return None
+        if tokenizer is None:
+            # tokenizer keras hanya diperlukan jika model belum diekspor ke .npz
+            tokenizer = load_legacy_pickle(os.path.join(model_dir, TOKEN_MAIN))
+        label_encoder = load_legacy_pickle(os.path.join(model_dir, LABEL_MAIN))
+        if tokenizer is None or label_encoder is None:
+            return None
+        return cls(model, tokenizer, [str(c) for c in label_encoder.classes_])
+
+    def predict(self, questions):
+        seq = self.tokenizer.texts_to_sequences(questions)
+        pad = pad_sequences(seq, maxlen=self.model.input_shape[1], padding="post")
+        return self.model.predict(pad, verbose=0)
+
+    def answers(self, label_ids):
+        return [self.classes[i] for i in label_ids]
+
+
+def load_legacy_pickle(path):
+    """Artefak pickle versi lama; None jika tidak ada atau MODEL_ALLOW_PICKLE=0."""
+    if not os.path.exists(path):
+        return None
+    if not MODEL_ALLOW_PICKLE:
+        print(f"⚠️ Artefak pickle dilewati (MODEL_ALLOW_PICKLE=0): {os.path.basename(path)}")
+        return None
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+# ==============================================================
+# 🔹 LINEAR: N-GRAM TER-HASH + REGRESI LOGISTIK
+# ==============================================================
+def hashed_features(text, char_ngrams=(3, 5)):
+    """Slot hash fitur: kata, bigram kata, dan n-gram karakter per kata (dengan batas spasi)."""
+    words = _WORD_RE.findall(text.lower())
+    grams = [f"w:{w}" for w in words]
+    grams += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    lo, hi = char_ngrams
+    for w in words:
+        padded = f" {w} "
+        for n in range(lo, hi + 1):
+            grams += [f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1)]
+    mask = (1 << HASH_BITS) - 1
+    return [zlib.crc32(g.encode("utf-8")) & mask for g in grams]
+
+
+def _weights(slots, features):
+    """
+    Hitungan slot yang dikenal → (indeks baris, bobot ter-normalisasi L2).
+    features terurut → binary search langsung di array (mmap), tanpa dict per proses.
+    """
+    slots = np.asarray(slots, dtype=np.int64)
+    rows = np.searchsorted(features, slots)
+    known = rows < len(features)
+    known[known] = features[rows[known]] == slots[known]
+    if not known.any():
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    rows, counts = np.unique(rows[known], return_counts=True)
+    values = counts.astype(np.float32)
+    return rows, values / np.float32(np.sqrt((values * values).sum()))
+
+
+class LinearIntentModel:
+    name = "linear"
+
+    def __init__(self, features, coef, intercept, classes, meta):
+        self.features = features        # slot hash terurut (int64), baris ke-i coef
+        self.coef = coef                # (fitur, kelas) float32 / float16
+        self.intercept = intercept      # (kelas,) float32
+        self.classes = classes          # jawaban per kelas (list / MappedStrings)
+        self.meta = meta
+        self.threshold = meta.get("threshold")
+
+    @classmethod
+    def train(cls, questions, answers, C=30.0, max_iter=300, threshold=None):
+        from scipy import sparse
+        from sklearn.linear_model import LogisticRegression
+
+        slots = [hashed_features(q) for q in questions]
+        features = np.array(sorted({s for row in slots for s in row}), dtype=np.int64)
+        indptr, indices, data = [0], [], []
+        for row in slots:
+            rows, values = _weights(row, features)
+            indices.append(rows)
+            data.append(values)
+            indptr.append(indptr[-1] + len(rows))
+        x = sparse.csr_matrix(
+            (np.concatenate(data), np.concatenate(indices), np.array(indptr)),
+            shape=(len(questions), len(features)),
+        )
+        classes = sorted(set(answers))
+        class_ids = {a: i for i, a in enumerate(classes)}
+        y = np.array([class_ids[a] for a in answers])
+
+        with warnings.catch_warnings():
+            # ratusan jawaban unik dari beberapa ratus baris memicu peringatan "regression problem"
+            warnings.simplefilter("ignore")
+            clf = LogisticRegression(C=C, max_iter=max_iter).fit(x, y)
+        meta = {"backend": "linear", "hash_bits": HASH_BITS, "C": C, "threshold": threshold}
+        return cls(
+            features,
+            np.ascontiguousarray(clf.coef_.T, dtype=np.float32),
+            clf.intercept_.astype(np.float32),
+            classes,
+            meta,
+        )
+
+    def predict(self, questions):
+        scores = np.tile(self.intercept, (len(questions), 1))
+        for i, question in enumerate(questions):
+            rows, values = _weights(hashed_features(question), self.features)
+            if len(rows):
+                scores[i] += values @ self.coef[rows].astype(np.float32, copy=False)
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    def answers(self, label_ids):
+        return [self.classes[i] for i in label_ids]
+
+    def save(self, path, weight_mode="float32"):
+        # int8 tidak dipakai untuk model linear; mode selain float32 → float16
+        coef = self.coef if weight_mode == "float32" else self.coef.astype(np.float16)
+        return save_artifact(
+            path,
+            arrays={"features": self.features, "coef": coef, "intercept": self.intercept},
+            strings={"classes": self.classes},
+            meta=self.meta,
+        )
+
+    @classmethod
+    def load(cls, path):
+        if os.path.isdir(path):
+            artifact = load_artifact(path)
+            return cls(artifact["features"], artifact["coef"], artifact["intercept"],
+                       artifact.strings["classes"], artifact.meta)
+        with np.load(path, allow_pickle=False) as data:  # main_linear.npz versi lama
+            return cls(
+                data["features"], data["coef"], data["intercept"],
+                data["classes"].tolist(), json.loads(str(data["meta"])),
+            )
+
+
+def load_main_backend(model_dir):
+    """Backend model utama sesuai artefak di model_dir, atau None jika belum dilatih."""
+    for name in (MAIN_LINEAR_DIR, MAIN_LINEAR_NPZ):
+        linear_path = os.path.join(model_dir, name)
+        if os.path.exists(linear_path):
+            return LinearIntentModel.load(linear_path)
+    return LstmBackend.load(model_dir)
+
+
+# ==============================================================
+# 🔹 PERBANDINGAN OFFLINE (LSTM vs LINEAR, DATASET YANG SAMA)
+# ==============================================================
+def holdout_split(questions, answers):
+    """Satu parafrase per jawaban (yang punya ≥ 2 pertanyaan) ditahan sebagai data uji."""
+    last = {}
+    for i, answer in enumerate(answers):
+        last.setdefault(answer, []).append(i)
+    test = {ids[-1] for ids in last.values() if len(ids) >= 2}
+    train = [i for i in range(len(questions)) if i not in test]
+    return train, sorted(test)
+
+
+def _evaluate(backend, questions, answers, threshold):
+    probs = backend.predict(questions)
+    predicted = backend.answers(probs.argmax(axis=1))
+    confidence = probs.max(axis=1)
+    correct = np.array([p == a for p, a in zip(predicted, answers)])
+    confident = confidence >= threshold
+    return {
+        "accuracy": float(correct.mean()),
+        "coverage": float(confident.mean()),
+        "accuracy_confident": float(correct[confident].mean()) if confident.any() else None,
+    }
+
+
+def _latency(backend, questions, repeat=3):
+    samples = []
+    for _ in range(repeat):
+        for q in questions:
+            started = time.perf_counter()
+            backend.predict([q])
+            samples.append(time.perf_counter() - started)
+    return {"p50_ms": float(np.percentile(samples, 50) * 1000), "p99_ms": float(np.percentile(samples, 99) * 1000)}
+
+
+def _load_measured(model_dir):
+    import tracemalloc
+    tracemalloc.start()
+    backend = load_main_backend(model_dir)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # artefak mmap tidak tercatat tracemalloc → memori = struktur privat per proses
+    return backend, {"memory_mb": current / 1e6, "artifact_mb": artifact_size(model_dir) / 1e6}
+
+
+def compare(csv_path, epochs=30, backends=("lstm", "linear")):
+    import tempfile
+    from backend.utils.csv_reader import iter_csv_chunks
+    from backend.utils.retrain_model import train_main_backend
+
+    rows = [row for chunk in iter_csv_chunks(csv_path, required=("pertanyaan", "jawaban")) for row in chunk]
+    questions = [r["pertanyaan"] for r in rows]
+    answers = [r["jawaban"] for r in rows]
+    train, test = holdout_split(questions, answers)
+    print(f"🔹 {len(rows)} baris, {len(set(answers))} jawaban | latih {len(train)}, uji {len(test)} parafrase")
+
+    for name in backends:
+        with tempfile.TemporaryDirectory() as out_dir:
+            started = time.perf_counter()
+            train_main_backend(name, [questions[i] for i in train], [answers[i] for i in train], out_dir, epochs=epochs)
+            train_s = time.perf_counter() - started
+            backend, memory = _load_measured(out_dir)
+
+            # evaluasi selagi folder artefak masih ada (bobot di-mmap dari out_dir)
+            threshold = 0.3 if backend.threshold is None else backend.threshold  # default = THRESHOLD di chatbot_routes
+            held = _evaluate(backend, [questions[i] for i in test], [answers[i] for i in test], threshold)
+            seen = _evaluate(backend, [questions[i] for i in train], [answers[i] for i in train], threshold)
+            latency = _latency(backend, [questions[i] for i in test])
+            del backend
+        print(f"📊 {name:<6} | latih {train_s:6.1f}s | akurasi uji {held['accuracy']:.3f} "
+              f"(≥{threshold}: cakupan {held['coverage']:.2f}, akurasi {held['accuracy_confident'] or 0:.3f}) "
+              f"| akurasi latih {seen['accuracy']:.3f} | p50 {latency['p50_ms']:.3f} ms, p99 {latency['p99_ms']:.3f} ms "
+              f"| memori {memory['memory_mb']:.1f} MB, artefak {memory['artifact_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    # 🔹 python -m backend.utils.main_backends compare dataset.csv [epochs]
+    if len(sys.argv) > 2 and sys.argv[1] == "compare":
+        compare(sys.argv[2], epochs=int(sys.argv[3]) if len(sys.argv) > 3 else 30)
+    else:
+        print("usage: python -m backend.utils.main_backends compare dataset.csv [epochs]")
@@ -0,0 +1,307 @@
+import json
+import os
+import shutil
+import sys
+import time
+import uuid
+
+import numpy as np
+
+# ==============================================================
+# 🔹 FORMAT ARTEFAK MEMORY-MAPPED
+# ==============================================================
+# Satu artefak = satu folder berisi array datar yang dibuka dengan
+# np.load(mmap_mode="r"):
+#
+#   <artefak>/meta.json              → format, daftar array & tabel string, meta
+#   <artefak>/<key>.npy              → array numerik (bobot, posting, offset, ...)
+#   <artefak>/<key>.blob.npy         → tabel string: byte UTF-8 digabung (uint8)
+#   <artefak>/<key>.offsets.npy      →   string i = blob[off[i]:off[i+1]] (int64)
+#
+# Dibanding pickle / .npz:
+#   - load hanya membaca header .npy (milidetik), isi dibaca lazy oleh OS
+#   - semua worker gunicorn berbagi halaman page cache yang sama, dan
+#     versi yang dibawa lewat hard link (registry) tetap memakai inode sama
+#   - tidak ada eksekusi kode saat load (aman dari storage bersama)
+#
+# Array hasil load bersifat read-only; struktur turunan per proses (dict
+# vocab, bucket LSH) tetap dibangun oleh masing-masing kelas pemakai.
+
+FORMAT = "mmap-artifact/1"
+META_FILE = "meta.json"
+
+
+def pack_strings(strings):
+    """List string → (blob uint8, offsets int64) tanpa pickle."""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+class MappedStrings:
+    """Tabel string di atas blob + offsets; decode hanya saat item diakses."""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_list(cls, strings):
+        return cls(*pack_strings(strings))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def tolist(self):
+        return list(self)
+
+
+def is_artifact(path):
+    return os.path.isfile(os.path.join(path, META_FILE))
+
+
+def save_artifact(directory, arrays=None, strings=None, meta=None):
+    """
+    Tulis artefak ke `directory` (ditulis ke folder sementara lalu di-rename).
+    arrays  : {key: array numerik}
+    strings : {key: list string / MappedStrings}
+    """
+    arrays = arrays or {}
+    strings = strings or {}
+    tmp = f"{directory}.tmp-{uuid.uuid4().hex[:8]}"
+    os.makedirs(tmp)
+    try:
+        for key, arr in arrays.items():
+            np.save(os.path.join(tmp, f"{key}.npy"), np.ascontiguousarray(arr), allow_pickle=False)
+        for key, values in strings.items():
+            blob, offsets = (values.blob, values.offsets) if isinstance(values, MappedStrings) else pack_strings(values)
+            np.save(os.path.join(tmp, f"{key}.blob.npy"), blob, allow_pickle=False)
+            np.save(os.path.join(tmp, f"{key}.offsets.npy"), offsets, allow_pickle=False)
+        with open(os.path.join(tmp, META_FILE), "w", encoding="utf-8") as f:
+            json.dump({
+                "format": FORMAT,
+                "arrays": sorted(arrays),
+                "strings": sorted(strings),
+                "meta": meta or {},
+            }, f, indent=2)
+        if os.path.isdir(directory):
+            shutil.rmtree(directory)
+        os.replace(tmp, directory)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return directory
+
+
+class MappedArtifact:
+    """Hasil load_artifact: .meta, .arrays {key: memmap}, .strings {key: MappedStrings}."""
+
+    def __init__(self, directory, meta, arrays, strings):
+        self.directory = directory
+        self.meta = meta
+        self.arrays = arrays
+        self.strings = strings
+
+    def __getitem__(self, key):
+        return self.arrays[key]
+
+    def __contains__(self, key):
+        return key in self.arrays or key in self.strings
+
+
+def load_artifact(directory):
+    """Buka artefak tanpa membaca isinya (mmap read-only)."""
+    with open(os.path.join(directory, META_FILE), "r", encoding="utf-8") as f:
+        header = json.load(f)
+    if header.get("format") != FORMAT:
+        raise ValueError(f"❌ Format artefak tidak dikenal di {directory}: {header.get('format')}")
+
+    def _open(name):
+        return np.load(os.path.join(directory, name), mmap_mode="r", allow_pickle=False)
+
+    arrays = {key: _open(f"{key}.npy") for key in header["arrays"]}
+    strings = {
+        key: MappedStrings(_open(f"{key}.blob.npy"), _open(f"{key}.offsets.npy"))
+        for key in header["strings"]
+    }
+    return MappedArtifact(directory, header["meta"], arrays, strings)
+
+
+def artifact_size(directory):
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(directory) for name in files
+    )
+
+
+# ==============================================================
+# 🔹 KONVERSI VERSI LAMA (pickle / .npz → mmap)
+# ==============================================================
+def convert_version(model_dir):
+    """
+    Tulis ulang artefak di model_dir ke format mmap sebagai versi baru.
+    Pickle lama dibaca SEKALI di sini (jalankan hanya pada folder tepercaya);
+    serving setelahnya tidak lagi menyentuh pickle. Fallback TF-IDF lama
+    diganti satu segmen BM25 dari fallback_texts.pkl (tanpa nama file).
+    """
+    import hashlib
+    import pickle
+    from backend.utils import model_registry as registry
+    from backend.utils.bm25_index import BM25Segment, SegmentedBM25, write_segment_manifest
+    from backend.utils.main_backends import LinearIntentModel
+    from backend.utils.numpy_lstm import convert_npz
+    from backend.utils.question_lookup import QuestionLookup
+
+    def _path(name):
+        return os.path.join(model_dir, name)
+
+    def _convert(out_dir):
+        converted = {}  # artefak baru → file sumber yang digantikan
+        if os.path.exists(_path(registry.MAIN_LINEAR_NPZ)):
+            LinearIntentModel.load(_path(registry.MAIN_LINEAR_NPZ)).save(os.path.join(out_dir, registry.MAIN_LINEAR_DIR))
+            converted[registry.MAIN_LINEAR_DIR] = [registry.MAIN_LINEAR_NPZ]
+        elif os.path.exists(_path(registry.MAIN_MODEL_NPZ)) and os.path.exists(_path(registry.LABEL_MAIN)):
+            with open(_path(registry.LABEL_MAIN), "rb") as f:
+                classes = pickle.load(f).classes_
+            convert_npz(_path(registry.MAIN_MODEL_NPZ), os.path.join(out_dir, registry.MAIN_LSTM_DIR), classes)
+            converted[registry.MAIN_LSTM_DIR] = [registry.MAIN_MODEL_NPZ, registry.TOKEN_MAIN, registry.LABEL_MAIN]
+
+        if os.path.exists(_path(registry.QUESTION_LOOKUP_NPZ)):
+            QuestionLookup.load(_path(registry.QUESTION_LOOKUP_NPZ)).save(os.path.join(out_dir, registry.QUESTION_LOOKUP_DIR))
+            converted[registry.QUESTION_LOOKUP_DIR] = [registry.QUESTION_LOOKUP_NPZ]
+
+        seg_dir = os.path.join(out_dir, registry.SEGMENTS_DIR)
+        legacy_fallback = [registry.VEC_FILE, registry.MAT_FILE, registry.TEXT_FILE, registry.BM25_FILE]
+        if os.path.isdir(_path(registry.SEGMENTS_DIR)):
+            index = SegmentedBM25.load(_path(registry.SEGMENTS_DIR))
+            if index is not None:
+                shutil.rmtree(seg_dir)  # hanya hard link milik staging
+                os.makedirs(seg_dir)
+                for segment in index.segments:
+                    segment.save(seg_dir)
+                write_segment_manifest(seg_dir, index.segments)
+                converted[registry.SEGMENTS_DIR] = legacy_fallback
+        elif os.path.exists(_path(registry.TEXT_FILE)):
+            with open(_path(registry.TEXT_FILE), "rb") as f:
+                texts = [str(t) for t in pickle.load(f)]
+            content_hash = hashlib.sha256("\n".join(texts).encode("utf-8")).hexdigest()
+            segment = BM25Segment.build("", content_hash, texts)
+            os.makedirs(seg_dir)
+            segment.save(seg_dir)
+            write_segment_manifest(seg_dir, [segment])
+            converted[registry.SEGMENTS_DIR] = legacy_fallback
+
+        for name, sources in converted.items():
+            for source in sources:
+                path = os.path.join(out_dir, source)
+                if os.path.exists(path):
+                    os.remove(path)
+            print(f"🔁 {name} dikonversi ({artifact_size(os.path.join(out_dir, name)) / 1024:.1f} KB)")
+        return {"converted_from": os.path.basename(os.path.normpath(model_dir)), "artifacts": sorted(converted)}
+
+    staging = registry.create_staging()
+    for name in os.listdir(model_dir):
+        # artefak yang tidak dikonversi (mis. main_model.h5) ikut dibawa lewat hard link
+        if name in registry.ALL_ARTIFACTS:
+            registry.link_tree(_path(name), os.path.join(staging, name))
+    try:
+        info = _convert(staging)
+    except Exception:
+        registry.discard_staging(staging)
+        raise
+    version = registry.publish(staging, {"mmap": info})
+    return dict(info, version=version)
+
+
+# ==============================================================
+# 🔹 BENCHMARK: PICKLE vs MMAP (load, memori privat per worker)
+# ==============================================================
+def _anon_kb():
+    """Memori anonim (heap, tidak bisa dibagi) dari /proc, Linux saja. Halaman file mmap tidak termasuk."""
+    try:
+        with open("/proc/self/smaps_rollup", "r") as f:
+            return sum(int(line.split()[1]) for line in f if line.startswith("Anonymous:"))
+    except OSError:
+        return None
+
+
+def _touch_strings(table):
+    return sum(len(table[i]) for i in range(0, len(table), max(1, len(table) // 1000)))
+
+
+def benchmark(n_strings=200_000, nnz=2_000_000, workers=4):
+    """Tabel jawaban + array CSR sintetis: pickle.load vs load_artifact di beberapa proses."""
+    import pickle
+    import tempfile
+    from multiprocessing import get_context
+
+    rng = np.random.default_rng(0)
+    strings = [f"jawaban {i} " + "x" * int(rng.integers(20, 200)) for i in range(n_strings)]
+    csr = {
+        "data": rng.random(nnz, dtype=np.float32),
+        "indices": rng.integers(0, 50_000, nnz).astype(np.int32),
+        "indptr": np.linspace(0, nnz, n_strings + 1).astype(np.int64),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        pkl_path = os.path.join(tmp, "artefak.pkl")
+        with open(pkl_path, "wb") as f:
+            pickle.dump({"texts": strings, **csr}, f)
+        art_path = save_artifact(os.path.join(tmp, "artefak"), arrays=csr, strings={"texts": strings})
+        print(f"🔹 {n_strings} string, {nnz} nnz | pickle {os.path.getsize(pkl_path) / 1e6:.1f} MB, "
+              f"mmap {artifact_size(art_path) / 1e6:.1f} MB")
+
+        ctx = get_context("fork") if sys.platform != "win32" else get_context()
+        for kind, path in (("pickle", pkl_path), ("mmap", art_path)):
+            with ctx.Pool(workers) as pool:
+                results = pool.map(_bench_worker, [(kind, path)] * workers)
+            load_ms = [r[0] for r in results]
+            heap = [r[1] for r in results if r[1] is not None]
+            print(f"📊 {kind:<6} | load rata-rata {np.mean(load_ms):8.2f} ms | heap / worker "
+                  + (f"{np.mean(heap) / 1024:7.1f} MB" if heap else "n/a")
+                  + f" | {workers} worker")
+
+
+def _bench_worker(args):
+    import pickle
+    kind, path = args
+    before = _anon_kb()
+    started = time.perf_counter()
+    if kind == "pickle":
+        with open(path, "rb") as f:
+            obj = pickle.load(f)
+        texts, data = obj["texts"], obj["data"]
+    else:
+        art = load_artifact(path)
+        texts, data = art.strings["texts"], art["data"]
+    load_ms = (time.perf_counter() - started) * 1000
+    _touch_strings(texts)
+    float(data.sum())  # baca seluruh array (page cache)
+    after = _anon_kb()
+    return load_ms, (after - before) if before is not None and after is not None else None
+
+
+if __name__ == "__main__":
+    # 🔹 python -m backend.utils.mmap_artifacts benchmark
+    #    python -m backend.utils.mmap_artifacts convert [folder_versi]  (default: versi aktif)
+    if len(sys.argv) > 1 and sys.argv[1] == "benchmark":
+        benchmark()
+    elif len(sys.argv) > 1 and sys.argv[1] == "convert":
+        sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+        from backend.utils import model_registry
+        print("✅", convert_version(sys.argv[2] if len(sys.argv) > 2 else model_registry.current_dir()))
+    else:
+        print("usage: python -m backend.utils.mmap_artifacts [benchmark | convert [folder_versi]]")
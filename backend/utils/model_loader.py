@@ -0,0 +1,270 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.utils import model_registry as registry
+from backend.utils.model_registry import (
+    VEC_FILE, MAT_FILE, TEXT_FILE, BM25_FILE, SEGMENTS_DIR, QUESTION_LOOKUP_DIR, QUESTION_LOOKUP_NPZ,
+)
+from backend.utils.bm25_index import BM25Index, SegmentedBM25
+from backend.utils.main_backends import load_main_backend, load_legacy_pickle
+from backend.utils.question_lookup import QuestionLookup
+
+# ==============================================================
+# 🔹 MODEL LOADER (FAST BOOT + HOT SWAP)
+# ==============================================================
+# Semua artefak model dimuat secara paralel di background thread,
+# lalu dilakukan warm-up prediction. Endpoint /api/health/ready baru
+# mengembalikan 200 setelah semuanya siap.
+#
+# Setelah itu watcher memantau pointer model/CURRENT. Jika retrain
+# mempublikasikan versi baru, bundle baru dimuat di background lalu
+# referensinya diganti sekaligus; request yang sedang berjalan tetap
+# memakai bundle lama sampai selesai.
+#
+# Artefak versi baru berupa folder mmap (mmap_artifacts.py): "load" hanya
+# membuka file, isinya dibagi lewat page cache antar worker. Pickle hanya
+# dibaca untuk versi lama (bisa dimatikan dengan MODEL_ALLOW_PICKLE=0).
+
+
+class ModelBundle:
+    """Kumpulan artefak yang dipakai oleh endpoint chat."""
+
+    def __init__(self, main=None, vectorizer=None, matrix=None, texts=None, fallback_index=None, lookup=None):
+        self.main = main  # backend model utama (LstmBackend / LinearIntentModel)
+        self.lookup = lookup  # QuestionLookup (None untuk versi lama)
+        self.vectorizer = vectorizer
+        self.matrix = matrix
+        self.texts = texts
+        self.fallback_index = fallback_index
+
+    @property
+    def has_main(self):
+        return self.main is not None
+
+    @property
+    def has_fallback(self):
+        return bool(self.texts and (self.fallback_index is not None
+                                    or (self.vectorizer and self.matrix is not None)))
+
+
+def _load_bm25(path):
+    return BM25Index.load(path) if os.path.exists(path) else None
+
+
+def _load_lookup(model_dir):
+    for name in (QUESTION_LOOKUP_DIR, QUESTION_LOOKUP_NPZ):
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path):
+            return QuestionLookup.load(path)
+    return None
+
+
+def _load_segments(path, reuse=None):
+    return SegmentedBM25.load(path, reuse=reuse) if os.path.isdir(path) else None
+
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    value = fn(*args)
+    return value, time.perf_counter() - started
+
+
+def load_bundle(model_dir, max_workers=6, previous=None):
+    """
+    Muat semua artefak secara paralel.
+    Mengembalikan (bundle, timings) dengan timings dalam detik per artefak.
+    `previous` (bundle lama) dipakai ulang untuk segmen fallback yang tidak berubah.
+    """
+    segments_dir = os.path.join(model_dir, SEGMENTS_DIR)
+    previous_index = getattr(previous, "fallback_index", None)
+    tasks = {
+        "main_model": (load_main_backend, model_dir),
+        "lookup": (_load_lookup, model_dir),
+    }
+    if os.path.isdir(segments_dir):
+        # BM25 per dokumen: kalimat ikut tersimpan di segmen, TF-IDF lama tidak perlu dimuat
+        reuse = previous_index if isinstance(previous_index, SegmentedBM25) else None
+        tasks["fallback_index"] = (_load_segments, segments_dir, reuse)
+    else:
+        tasks.update({
+            "vectorizer": (load_legacy_pickle, os.path.join(model_dir, VEC_FILE)),
+            "matrix": (load_legacy_pickle, os.path.join(model_dir, MAT_FILE)),
+            "texts": (load_legacy_pickle, os.path.join(model_dir, TEXT_FILE)),
+            "fallback_index": (_load_bm25, os.path.join(model_dir, BM25_FILE)),
+        })
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model-load") as pool:
+        futures = {name: pool.submit(_timed, fn, *args) for name, (fn, *args) in tasks.items()}
+        loaded, timings = {}, {}
+        for name, future in futures.items():
+            loaded[name], timings[name] = future.result()
+
+    fallback_index = loaded["fallback_index"]
+    texts = loaded.get("texts")
+    if isinstance(fallback_index, SegmentedBM25):
+        texts = fallback_index.texts
+
+    bundle = ModelBundle(
+        main=loaded["main_model"],
+        lookup=loaded["lookup"],
+        vectorizer=loaded.get("vectorizer"),
+        matrix=loaded.get("matrix"),
+        texts=texts,
+        fallback_index=fallback_index,
+    )
+    return bundle, timings
+
+
+def _dir_fingerprint(model_dir):
+    """Penanda artefak untuk layout lama (tanpa versi): nama, ukuran, dan mtime file."""
+    h = hashlib.sha1()
+    for name in sorted(os.listdir(model_dir)):
+        path = os.path.join(model_dir, name)
+        if os.path.isfile(path):
+            st = os.stat(path)
+            h.update(f"{name}:{st.st_size}:{st.st_mtime_ns};".encode())
+    return "legacy-" + h.hexdigest()[:12]
+
+
+def warm_up(bundle):
+    """Satu prediksi dummy supaya request pertama tidak menanggung biaya inisialisasi."""
+    if bundle.has_main:
+        bundle.main.predict(["warm up"])
+    if bundle.fallback_index is not None:
+        bundle.fallback_index.search("warm up")
+    elif bundle.has_fallback:
+        bundle.vectorizer.transform(["warm up"])
+
+
+# ==============================================================
+# 🔹 STATUS LOADING (dipakai health check)
+# ==============================================================
+# backoff watcher untuk versi yang gagal dimuat (detik, berlipat dua per kegagalan)
+FAILED_RETRY_MIN = 5.0
+FAILED_RETRY_MAX = 300.0
+
+
+class ModelState:
+    def __init__(self, model_dir=None):
+        # model_dir None → ikuti registry (versi aktif di model/CURRENT)
+        self.model_dir = model_dir
+        self.bundle = None
+        self.version = None
+        self.fingerprint = None
+        self.error = None
+        self.timings = {}
+        self.ready = threading.Event()
+        self._thread = None
+        self._watcher = None
+        self._swap_lock = threading.Lock()
+        self._listeners = []
+        # versi yang gagal dimuat: (version, waktu retry berikutnya, jeda) → watcher tidak memuat ulang tiap 0.5 s
+        self._failed = None
+
+    def _resolve(self):
+        if self.model_dir is not None:
+            return self.model_dir, None
+        version = registry.current_version()
+        return registry.current_dir(), version
+
+    def load(self):
+        """Muat artefak versi aktif + warm-up (blocking) lalu pasang sebagai bundle."""
+        with self._swap_lock:
+            model_dir, version = self._resolve()
+            started = time.perf_counter()
+            try:
+                bundle, timings = load_bundle(model_dir, previous=self.bundle)
+                load_done = time.perf_counter()
+                warm_up(bundle)
+                warm_done = time.perf_counter()
+
+                self.timings = {
+                    "artifacts": {k: round(v, 3) for k, v in timings.items()},
+                    "load_total": round(load_done - started, 3),
+                    "warm_up": round(warm_done - load_done, 3),
+                    "total": round(warm_done - started, 3),
+                }
+                # Swap atomik: satu assignment referensi
+                self.bundle = bundle
+                self.version = version
+                self.fingerprint = version or _dir_fingerprint(model_dir)
+                self.error = None
+                self._failed = None
+                self.ready.set()
+                self._notify()
+
+                per_artifact = ", ".join(f"{k} {v:.2f}s" for k, v in timings.items())
+                print(f"⏱️ Model {version or '(legacy)'} siap dalam {self.timings['total']:.2f}s "
+                      f"(load {self.timings['load_total']:.2f}s [{per_artifact}], "
+                      f"warm-up {self.timings['warm_up']:.2f}s)")
+            except Exception as e:
+                self.error = str(e)
+                delay = FAILED_RETRY_MIN
+                if self._failed and self._failed[0] == version:
+                    delay = min(self._failed[2] * 2, FAILED_RETRY_MAX)
+                self._failed = (version, time.monotonic() + delay, delay)
+                print(f"❌ Gagal memuat model {version or '(legacy)'} (dicoba lagi dalam {delay:.0f}s):", e)
+
+    def add_listener(self, fn):
+        """fn(model_state) dipanggil setiap kali bundle baru dipasang (mis. invalidasi cache)."""
+        self._listeners.append(fn)
+
+    def _notify(self):
+        for fn in self._listeners:
+            try:
+                fn(self)
+            except Exception as e:
+                print("⚠️ Listener model error:", e)
+
+    def start_background(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.load, name="model-boot", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def check_for_update(self):
+        """
+        Muat ulang jika pointer CURRENT menunjuk versi lain. True jika terjadi swap.
+        Juga berlaku saat load pertama gagal (belum ready): versi baru / rollback
+        dicoba lagi dengan backoff _failed, tanpa menunggu restart.
+        """
+        if self.model_dir is not None:
+            return False
+        if self._thread is not None and self._thread.is_alive():
+            return False  # load awal (start_background) masih berjalan
+        latest = registry.current_version()
+        if latest is None or latest == self.version:
+            return False
+        if self._failed and self._failed[0] == latest and time.monotonic() < self._failed[1]:
+            return False  # versi ini baru saja gagal; tunggu backoff atau CURRENT berganti
+        print(f"🔄 Versi model baru terdeteksi: {latest}")
+        self.load()
+        return self.version == latest
+
+    def start_watcher(self, interval=0.5):
+        def _watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.check_for_update()
+                except Exception as e:
+                    print("⚠️ Watcher model error:", e)
+
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=_watch, name="model-watcher", daemon=True)
+            self._watcher.start()
+        return self._watcher
+
+    def status(self):
+        return {
+            "ready": self.ready.is_set(),
+            "version": self.version,
+            "fingerprint": self.fingerprint,
+            "error": self.error,
+            "main_model": bool(self.bundle and self.bundle.has_main),
+            "main_backend": self.bundle.main.name if self.bundle and self.bundle.has_main else None,
+            "fallback": bool(self.bundle and self.bundle.has_fallback),
+            "timings": self.timings,
+        }
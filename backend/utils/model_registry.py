@@ -0,0 +1,283 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: publish hanya diserialkan antar thread dalam satu proses
+    fcntl = None
+
+from backend.config import MODEL_DIR, MODEL_KEEP_VERSIONS
+
+# ==============================================================
+# 🔹 VERSIONED MODEL REGISTRY
+# ==============================================================
+# Setiap retrain menulis artefak ke folder baru:
+#   model/versions/<version_id>/  (+ manifest.json)
+# lalu dipublikasikan dengan mengganti file pointer model/CURRENT secara
+# atomik (os.replace). Worker serving tidak pernah melihat file yang
+# setengah tertulis, dan versi lama tetap ada untuk rollback.
+#
+# Publish / flip CURRENT diserialkan dengan publish_lock() (flock pada
+# versions/.publish.lock), berlaku antar worker gunicorn dan proses
+# retrain. Artefak yang dibawa dari versi aktif dihubungkan ulang di
+# bawah kunci itu tepat sebelum publish (lihat retrain_model).
+
+VERSIONS_DIR = os.path.join(MODEL_DIR, "versions")
+CURRENT_POINTER = os.path.join(MODEL_DIR, "CURRENT")
+MANIFEST_FILE = "manifest.json"
+# Format version_id buatan publish(): 20250101T120000-ab12cd
+VERSION_RE = re.compile(r"^\d{8}T\d{6}-[0-9a-f]{6}$")
+PUBLISH_LOCK_FILE = ".publish.lock"
+
+# Nama artefak. Folder *_DIR memakai format mmap (lihat mmap_artifacts.py);
+# file .pkl / .npz hanya dibaca untuk versi lama.
+MAIN_LSTM_DIR = "main_lstm"  # bobot BiLSTM + vocab tokenizer + tabel jawaban
+MAIN_LINEAR_DIR = "main_linear"  # backend linear (n-gram ter-hash)
+QUESTION_LOOKUP_DIR = "question_lookup"  # tier exact / near-duplicate
+MAIN_MODEL_H5 = "main_model.h5"
+SEGMENTS_DIR = "fallback_segments"  # BM25 per dokumen (folder per segmen)
+
+# Artefak versi lama
+MAIN_MODEL_NPZ = "main_model.npz"
+MAIN_LINEAR_NPZ = "main_linear.npz"
+QUESTION_LOOKUP_NPZ = "question_lookup.npz"
+TOKEN_MAIN = "tokenizer_main.pkl"
+LABEL_MAIN = "label_main.pkl"
+VEC_FILE = "fallback_vectorizer.pkl"
+MAT_FILE = "fallback_matrix.pkl"
+TEXT_FILE = "fallback_texts.pkl"
+BM25_FILE = "fallback_bm25.npz"
+
+ARTIFACT_GROUPS = {
+    "main": [MAIN_LSTM_DIR, MAIN_LINEAR_DIR, QUESTION_LOOKUP_DIR, MAIN_MODEL_H5,
+             MAIN_MODEL_NPZ, MAIN_LINEAR_NPZ, QUESTION_LOOKUP_NPZ, TOKEN_MAIN, LABEL_MAIN],
+    "fallback": [SEGMENTS_DIR, VEC_FILE, MAT_FILE, TEXT_FILE, BM25_FILE],
+}
+ALL_ARTIFACTS = {name for names in ARTIFACT_GROUPS.values() for name in names}
+
+
+def current_version():
+    """Versi yang sedang aktif, atau None jika masih memakai layout lama (flat)."""
+    try:
+        with open(CURRENT_POINTER, "r", encoding="utf-8") as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    if version and VERSION_RE.match(version) and os.path.isdir(os.path.join(VERSIONS_DIR, version)):
+        return version
+    return None
+
+
+def version_dir(version):
+    return os.path.join(VERSIONS_DIR, version)
+
+
+def current_dir():
+    """Folder artefak aktif. Fallback ke model/ (layout lama) jika belum ada versi."""
+    version = current_version()
+    return version_dir(version) if version else MODEL_DIR
+
+
+def read_manifest(version):
+    path = os.path.join(version_dir(version), MANIFEST_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def list_versions():
+    if not os.path.isdir(VERSIONS_DIR):
+        return []
+    versions = [
+        v for v in os.listdir(VERSIONS_DIR)
+        if VERSION_RE.match(v) and os.path.isdir(version_dir(v))
+    ]
+    return sorted(versions, reverse=True)
+
+
+# ==============================================================
+# 🔹 KUNCI PUBLISH (antar proses)
+# ==============================================================
+_publish_rlock = threading.RLock()
+_publish_held = {"depth": 0, "file": None}
+
+
+@contextmanager
+def publish_lock():
+    """
+    Kunci eksklusif untuk publish / set_current. Reentrant dalam satu proses
+    (flock hanya diambil pada level terluar, karena flock kedua dari proses
+    yang sama pada file yang sama akan menunggu dirinya sendiri).
+    """
+    with _publish_rlock:
+        if _publish_held["depth"] == 0:
+            os.makedirs(VERSIONS_DIR, exist_ok=True)
+            f = open(os.path.join(VERSIONS_DIR, PUBLISH_LOCK_FILE), "a")
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            _publish_held["file"] = f
+        _publish_held["depth"] += 1
+        try:
+            yield
+        finally:
+            _publish_held["depth"] -= 1
+            if _publish_held["depth"] == 0:
+                _publish_held["file"].close()  # menutup file melepas flock
+                _publish_held["file"] = None
+
+
+# ==============================================================
+# 🔹 STAGING & PUBLISH
+# ==============================================================
+def create_staging(carry_over=()):
+    """
+    Buat folder staging untuk versi baru.
+    Artefak dari grup di carry_over (mis. "fallback" saat hanya model utama
+    yang dilatih) disalin dari versi aktif lewat hard link.
+    """
+    os.makedirs(VERSIONS_DIR, exist_ok=True)
+    staging = os.path.join(VERSIONS_DIR, f".staging-{uuid.uuid4().hex[:8]}")
+    os.makedirs(staging)
+    link_groups(staging, carry_over)
+    return staging
+
+
+def link_groups(staging, groups):
+    """Ganti artefak grup di staging dengan hard link dari versi aktif saat ini."""
+    source = current_dir()
+    for group in groups:
+        for name in ARTIFACT_GROUPS[group]:
+            dst = os.path.join(staging, name)
+            if os.path.isdir(dst):
+                shutil.rmtree(dst)
+            elif os.path.exists(dst):
+                os.remove(dst)
+            src = os.path.join(source, name)
+            if os.path.exists(src):
+                link_tree(src, dst)
+
+
+def link_tree(src, dst):
+    """Hard link file / folder artefak (rekursif). Inode sama → page cache mmap ikut terbagi."""
+    if not os.path.isdir(src):
+        _link_or_copy(src, dst)
+        return
+    os.makedirs(dst)
+    for child in os.listdir(src):
+        link_tree(os.path.join(src, child), os.path.join(dst, child))
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def discard_staging(staging):
+    shutil.rmtree(staging, ignore_errors=True)
+
+
+def _sha256(path, chunk_size=1024 * 1024):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _write_atomic(path, content):
+    tmp = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def set_current(version):
+    """
+    Flip pointer CURRENT ke versi tertentu (atomik). version bisa datang dari
+    request admin: hanya version_id yang terdaftar di list_versions() yang
+    diterima (bukan "..", path absolut, atau folder staging).
+    """
+    if not isinstance(version, str) or not VERSION_RE.match(version):
+        raise ValueError(f"❌ Format versi model tidak valid: {version!r}")
+    with publish_lock():
+        if version not in list_versions():
+            raise FileNotFoundError(f"❌ Versi model '{version}' tidak ditemukan")
+        _write_atomic(CURRENT_POINTER, version + "\n")
+
+
+def publish(staging, info=None):
+    """
+    Tulis manifest, pindahkan staging menjadi versi final, lalu aktifkan.
+    Mengembalikan version_id yang baru.
+    """
+    with publish_lock():
+        version = datetime.utcnow().strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:6]
+        parent = current_version()
+        parent_artifacts = (read_manifest(parent) or {}).get("artifacts", {}) if parent else {}
+
+        def _entry(rel, path):
+            # file hasil hard link dari versi aktif (inode sama, artefak immutable) → pakai hash lama
+            known = parent_artifacts.get(rel)
+            parent_path = os.path.join(version_dir(parent), rel) if parent else None
+            if known and "sha256" in known and os.path.exists(parent_path) and os.path.samefile(path, parent_path):
+                return known
+            return {"sha256": _sha256(path), "size": os.path.getsize(path)}
+
+        artifacts = {}
+        for name in sorted(os.listdir(staging)):
+            path = os.path.join(staging, name)
+            if os.path.isfile(path) and name != MANIFEST_FILE:
+                artifacts[name] = _entry(name, path)
+            elif os.path.isdir(path):
+                # folder artefak mmap / segmen: hash per file + digest folder dari (path, sha256) terurut
+                entries = {}
+                for root, _, files in os.walk(path):
+                    for child in files:
+                        full = os.path.join(root, child)
+                        rel = os.path.relpath(full, staging).replace(os.sep, "/")
+                        entries[rel] = _entry(rel, full)
+                digest = hashlib.sha256()
+                for rel in sorted(entries):
+                    digest.update(f"{rel}\0{entries[rel]['sha256']}\n".encode("utf-8"))
+                artifacts.update(entries)
+                artifacts[name + "/"] = {
+                    "sha256": digest.hexdigest(),
+                    "size": sum(e["size"] for e in entries.values()),
+                    "files": len(entries),
+                }
+
+        manifest = {
+            "version": version,
+            "created_at": datetime.utcnow().isoformat() + "Z",
+            "parent": parent,
+            "artifacts": artifacts,
+        }
+        manifest.update(info or {})
+        _write_atomic(os.path.join(staging, MANIFEST_FILE), json.dumps(manifest, indent=2))
+
+        os.replace(staging, version_dir(version))
+        set_current(version)
+        prune_versions()
+        print(f"📦 Model versi {version} dipublikasikan")
+        return version
+
+
+def prune_versions(keep=MODEL_KEEP_VERSIONS):
+    """Hapus versi lama, sisakan `keep` versi terbaru (versi aktif tidak pernah dihapus)."""
+    active = current_version()
+    for version in list_versions()[keep:]:
+        if version != active:
+            shutil.rmtree(version_dir(version), ignore_errors=True)
@@ -0,0 +1,390 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+from backend.utils.mmap_artifacts import save_artifact, load_artifact
+
+# ==============================================================
+# 🔹 NUMPY INFERENCE ENGINE UNTUK MODEL UTAMA (BiLSTM)
+# ==============================================================
+# Bobot model Keras hasil retrain_main_from_db diekspor ke folder artefak
+# mmap (main_lstm/, lihat mmap_artifacts.py) bersama vocab tokenizer dan
+# tabel jawaban, lalu forward pass dijalankan murni dengan NumPy. Serving
+# tidak perlu meng-import TensorFlow sama sekali (hemat RAM & waktu cold
+# start). File .npz hasil ekspor lama tetap bisa dimuat.
+#
+# Arsitektur yang didukung (urutan layer Sequential):
+#   Embedding → Bidirectional(LSTM) / LSTM → Dense → Dropout → Dense
+#
+# Mode bobot:
+#   float32 → identik dengan Keras
+#   float16 → ukuran file ~½, selisih output sangat kecil
+#   int8    → ukuran file ~¼, kuantisasi simetris per baris/kolom
+
+WEIGHT_MODES = ("float32", "float16", "int8")
+# selisih maksimum output softmax NumPy vs Keras yang masih diterima per mode
+PARITY_ATOL = {"float32": 1e-4, "float16": 5e-2, "int8": 5e-2}
+
+# Filter default keras Tokenizer
+DEFAULT_FILTERS = '!"#$%&()*+,-./:;<=>?@[\\]^_`{|}~\t\n'
+
+
+# ==============================================================
+# 🔹 TOKENIZER & PADDING (pengganti keras preprocessing)
+# ==============================================================
+class NumpyTokenizer:
+    """Replika texts_to_sequences dari keras Tokenizer (word level)."""
+
+    def __init__(self, word_index, filters=DEFAULT_FILTERS, lower=True, split=" ",
+                 oov_token=None, num_words=None):
+        self.word_index = word_index
+        self.filters = filters
+        self.lower = lower
+        self.split = split
+        self.oov_token = oov_token
+        self.num_words = num_words
+        self._translate = str.maketrans({c: split for c in filters})
+
+    @classmethod
+    def from_keras(cls, tokenizer):
+        return cls(
+            word_index=dict(tokenizer.word_index),
+            filters=tokenizer.filters,
+            lower=tokenizer.lower,
+            split=tokenizer.split,
+            oov_token=tokenizer.oov_token,
+            num_words=tokenizer.num_words,
+        )
+
+    def config(self):
+        return {
+            "filters": self.filters,
+            "lower": self.lower,
+            "split": self.split,
+            "oov_token": self.oov_token,
+            "num_words": self.num_words,
+        }
+
+    def texts_to_sequences(self, texts):
+        oov_index = self.word_index.get(self.oov_token) if self.oov_token is not None else None
+        sequences = []
+        for text in texts:
+            if self.lower:
+                text = text.lower()
+            words = [w for w in text.translate(self._translate).split(self.split) if w]
+            seq = []
+            for w in words:
+                i = self.word_index.get(w)
+                if i is not None:
+                    if self.num_words and i >= self.num_words:
+                        if oov_index is not None:
+                            seq.append(oov_index)
+                    else:
+                        seq.append(i)
+                elif oov_index is not None:
+                    seq.append(oov_index)
+            sequences.append(seq)
+        return sequences
+
+
+def pad_sequences(sequences, maxlen, padding="post", truncating="pre", value=0):
+    """Padding setara keras pad_sequences (default truncating='pre')."""
+    out = np.full((len(sequences), maxlen), value, dtype=np.int32)
+    for row, seq in enumerate(sequences):
+        if not seq:
+            continue
+        trunc = seq[-maxlen:] if truncating == "pre" else seq[:maxlen]
+        if padding == "post":
+            out[row, :len(trunc)] = trunc
+        else:
+            out[row, -len(trunc):] = trunc
+    return out
+
+
+# ==============================================================
+# 🔹 EKSPOR BOBOT KERAS → FOLDER ARTEFAK MMAP
+# ==============================================================
+def _quantize(name, w, mode, arrays, axis):
+    """Simpan array bobot sesuai mode (float32/float16/int8)."""
+    w = np.asarray(w, dtype=np.float32)
+    if mode == "float32" or w.ndim < 2:
+        arrays[name] = w
+    elif mode == "float16":
+        arrays[name] = w.astype(np.float16)
+    else:
+        # skala per baris (axis=1) untuk embedding, per kolom (axis=0) untuk matriks lain
+        scale = np.abs(w).max(axis=axis, keepdims=True) / 127.0
+        scale[scale == 0] = 1.0
+        arrays[name + "__q"] = np.round(w / scale).astype(np.int8)
+        arrays[name + "__scale"] = scale.astype(np.float32)
+
+
+def export_keras_model(model, path, tokenizer=None, weight_mode="float32", classes=None):
+    """
+    Ekspor model Sequential Keras ke folder artefak mmap.
+    tokenizer (opsional) → vocab; classes (opsional) → jawaban per id kelas.
+    """
+    if weight_mode not in WEIGHT_MODES:
+        raise ValueError(f"❌ weight_mode harus salah satu dari {WEIGHT_MODES}")
+
+    arrays = {}
+    layers = []
+
+    for idx, layer in enumerate(model.layers):
+        kind = layer.__class__.__name__
+        prefix = f"l{idx}"
+
+        if kind == "Embedding":
+            _quantize(f"{prefix}_embeddings", layer.get_weights()[0], weight_mode, arrays, axis=1)
+            layers.append({"type": "embedding", "prefix": prefix})
+
+        elif kind == "Bidirectional":
+            for direction, sub in (("fw", layer.forward_layer), ("bw", layer.backward_layer)):
+                kernel, recurrent, bias = sub.get_weights()
+                _quantize(f"{prefix}_{direction}_kernel", kernel, weight_mode, arrays, axis=0)
+                _quantize(f"{prefix}_{direction}_recurrent", recurrent, weight_mode, arrays, axis=0)
+                arrays[f"{prefix}_{direction}_bias"] = np.asarray(bias, dtype=np.float32)
+            layers.append({
+                "type": "bilstm",
+                "prefix": prefix,
+                "merge_mode": layer.merge_mode,
+                "units": int(layer.forward_layer.units),
+            })
+
+        elif kind == "LSTM":
+            kernel, recurrent, bias = layer.get_weights()
+            _quantize(f"{prefix}_fw_kernel", kernel, weight_mode, arrays, axis=0)
+            _quantize(f"{prefix}_fw_recurrent", recurrent, weight_mode, arrays, axis=0)
+            arrays[f"{prefix}_fw_bias"] = np.asarray(bias, dtype=np.float32)
+            layers.append({"type": "lstm", "prefix": prefix, "units": int(layer.units)})
+
+        elif kind == "Dense":
+            kernel, bias = layer.get_weights()
+            _quantize(f"{prefix}_kernel", kernel, weight_mode, arrays, axis=0)
+            arrays[f"{prefix}_bias"] = np.asarray(bias, dtype=np.float32)
+            layers.append({
+                "type": "dense",
+                "prefix": prefix,
+                "activation": layer.get_config().get("activation", "linear"),
+            })
+
+        elif kind in ("Dropout", "InputLayer"):
+            continue  # tidak berpengaruh saat inference
+
+        else:
+            raise ValueError(f"❌ Layer '{kind}' belum didukung oleh NumPy engine")
+
+    meta = {
+        "format": "numpy-lstm/1",
+        "weight_mode": weight_mode,
+        "input_length": int(model.input_shape[1]),
+        "layers": layers,
+    }
+    strings = {}
+    if tokenizer is not None:
+        np_tok = tokenizer if isinstance(tokenizer, NumpyTokenizer) else NumpyTokenizer.from_keras(tokenizer)
+        words = sorted(np_tok.word_index, key=np_tok.word_index.get)
+        strings["tokenizer_words"] = words
+        arrays["tokenizer_ids"] = np.array([np_tok.word_index[w] for w in words], dtype=np.int32)
+        meta["tokenizer"] = np_tok.config()
+    if classes is not None:
+        strings["classes"] = [str(c) for c in classes]
+
+    return save_artifact(path, arrays=arrays, strings=strings, meta=meta)
+
+
+def convert_npz(npz_path, path, classes=None):
+    """Tulis ulang ekspor .npz lama ke folder artefak mmap (bobot disalin apa adanya)."""
+    with np.load(npz_path, allow_pickle=False) as data:
+        meta = json.loads(str(data["meta"]))
+        arrays = {k: data[k] for k in data.files if k not in ("meta", "tokenizer_words")}
+        strings = {"tokenizer_words": data["tokenizer_words"].tolist()} if "tokenizer_words" in data.files else {}
+    if classes is not None:
+        strings["classes"] = [str(c) for c in classes]
+    return save_artifact(path, arrays=arrays, strings=strings, meta=meta)
+
+
+# ==============================================================
+# 🔹 FORWARD PASS NUMPY
+# ==============================================================
+def _sigmoid(x):
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)  # stabil untuk nilai besar
+
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0.0),
+    "tanh": np.tanh,
+    "sigmoid": _sigmoid,
+    "softmax": _softmax,
+}
+
+
+def _lstm_last_state(xw, recurrent, units, reverse=False):
+    """
+    Rekurensi LSTM tervektorisasi per batch.
+    xw: proyeksi input yang sudah dihitung sekaligus (B, T, 4U) termasuk bias.
+    Urutan gate mengikuti Keras: input, forget, cell, output.
+    """
+    batch, steps, _ = xw.shape
+    h = np.zeros((batch, units), dtype=np.float32)
+    c = np.zeros((batch, units), dtype=np.float32)
+    order = range(steps - 1, -1, -1) if reverse else range(steps)
+
+    for t in order:
+        z = xw[:, t, :] + h @ recurrent
+        i = _sigmoid(z[:, :units])
+        f = _sigmoid(z[:, units:2 * units])
+        g = np.tanh(z[:, 2 * units:3 * units])
+        o = _sigmoid(z[:, 3 * units:])
+        c = f * c + i * g
+        h = o * np.tanh(c)
+    return h
+
+
+class NumpyBiLSTM:
+    """Model hasil ekspor (folder mmap / .npz lama) dengan API predict() mirip Keras."""
+
+    def __init__(self, meta, weights, tokenizer=None, classes=None):
+        self.meta = meta
+        self.weights = weights
+        self.tokenizer = tokenizer
+        self.classes = classes  # tabel jawaban (MappedStrings), None untuk .npz lama
+        self.input_shape = (None, meta["input_length"])
+
+    @classmethod
+    def load(cls, path):
+        classes = None
+        if os.path.isdir(path):
+            # bobot float32 / int8 tetap berupa memmap read-only (dibagi antar worker)
+            artifact = load_artifact(path)
+            meta, raw = artifact.meta, dict(artifact.arrays)
+            words = artifact.strings.get("tokenizer_words")
+            classes = artifact.strings.get("classes")
+        else:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                raw = {k: data[k] for k in data.files if k != "meta"}
+            words = raw["tokenizer_words"].tolist() if "tokenizer_words" in raw else None
+
+        weights = {}
+        for name, arr in raw.items():
+            if name.startswith("tokenizer_") or name.endswith("__scale"):
+                continue
+            if name.endswith("__q"):
+                base = name[:-3]
+                if base.endswith("_embeddings"):
+                    # embedding tetap int8 di memori, skala dipakai saat gather
+                    weights[base] = (arr, raw[base + "__scale"])
+                else:
+                    weights[base] = arr.astype(np.float32) * raw[base + "__scale"]
+            elif name.endswith("_embeddings") and arr.dtype == np.float16:
+                weights[name] = arr  # di-cast ke float32 saat gather
+            else:
+                weights[name] = arr.astype(np.float32, copy=False)
+
+        tokenizer = None
+        if "tokenizer" in meta:
+            word_index = dict(zip(words, raw["tokenizer_ids"].tolist()))
+            tokenizer = NumpyTokenizer(word_index, **meta["tokenizer"])
+
+        return cls(meta, weights, tokenizer, classes)
+
+    def _embed(self, name, x):
+        w = self.weights[name]
+        if isinstance(w, tuple):
+            q, scale = w
+            return q[x].astype(np.float32) * scale[x]
+        return w[x].astype(np.float32, copy=False)
+
+    def predict(self, x, verbose=0, batch_size=None):
+        h = np.asarray(x, dtype=np.int64)
+
+        for layer in self.meta["layers"]:
+            p = layer["prefix"]
+
+            if layer["type"] == "embedding":
+                h = self._embed(f"{p}_embeddings", h)
+
+            elif layer["type"] in ("bilstm", "lstm"):
+                units = layer["units"]
+                outputs = []
+                directions = ("fw", "bw") if layer["type"] == "bilstm" else ("fw",)
+                for direction in directions:
+                    xw = h @ self.weights[f"{p}_{direction}_kernel"] + self.weights[f"{p}_{direction}_bias"]
+                    outputs.append(_lstm_last_state(
+                        xw, self.weights[f"{p}_{direction}_recurrent"], units,
+                        reverse=(direction == "bw"),
+                    ))
+                if len(outputs) == 1:
+                    h = outputs[0]
+                elif layer.get("merge_mode", "concat") == "concat":
+                    h = np.concatenate(outputs, axis=-1)
+                elif layer["merge_mode"] == "sum":
+                    h = outputs[0] + outputs[1]
+                elif layer["merge_mode"] == "mul":
+                    h = outputs[0] * outputs[1]
+                else:  # ave
+                    h = (outputs[0] + outputs[1]) / 2.0
+
+            elif layer["type"] == "dense":
+                h = h @ self.weights[f"{p}_kernel"] + self.weights[f"{p}_bias"]
+                h = ACTIVATIONS[layer["activation"]](h)
+
+        return h.astype(np.float32, copy=False)
+
+
+# ==============================================================
+# 🔹 PARITY CHECK KERAS vs NUMPY
+# ==============================================================
+def check_parity(keras_model, numpy_model, x, atol=1e-4):
+    """
+    Bandingkan output Keras dan NumPy untuk input x yang sama.
+    Mengembalikan dict berisi selisih maksimum & kecocokan argmax.
+    """
+    ref = keras_model.predict(x, verbose=0)
+    out = numpy_model.predict(x)
+    max_diff = float(np.abs(ref - out).max()) if len(x) else 0.0
+    argmax_match = float((ref.argmax(axis=1) == out.argmax(axis=1)).mean()) if len(x) else 1.0
+    return {
+        "samples": int(len(x)),
+        "max_abs_diff": max_diff,
+        "argmax_agreement": argmax_match,
+        "ok": max_diff <= atol,
+    }
+
+
+if __name__ == "__main__":
+    # 🔹 Ekspor ulang versi aktif dengan mode bobot lain + parity check:
+    #   python -m backend.utils.numpy_lstm [float32|float16|int8]
+    #   → model/main_lstm-<mode>/ (tokenizer & tabel jawaban dari main_lstm/ versi aktif)
+    from tensorflow.keras.models import load_model
+
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+    from backend.config import MODEL_DIR
+    from backend.utils import model_registry as registry
+    from backend.utils.mmap_artifacts import artifact_size
+
+    mode = sys.argv[1] if len(sys.argv) > 1 else "float32"
+    source_dir = registry.current_dir()
+    keras_model = load_model(os.path.join(source_dir, registry.MAIN_MODEL_H5))
+    current = NumpyBiLSTM.load(os.path.join(source_dir, registry.MAIN_LSTM_DIR))
+
+    out_path = export_keras_model(
+        keras_model, os.path.join(MODEL_DIR, f"{registry.MAIN_LSTM_DIR}-{mode}"),
+        tokenizer=current.tokenizer, weight_mode=mode, classes=current.classes,
+    )
+    np_model = NumpyBiLSTM.load(out_path)
+
+    words = list(current.tokenizer.word_index)[:200]
+    texts = [" ".join(words[i:i + 6]) for i in range(0, len(words), 3)]
+    x = pad_sequences(np_model.tokenizer.texts_to_sequences(texts), np_model.input_shape[1])
+    print(f"✅ Model diekspor ke {out_path} ({artifact_size(out_path) / 1024:.1f} KB, mode {mode})")
+    print("📊 Parity:", check_parity(keras_model, np_model, x))
@@ -1,6 +1,11 @@
 import fitz  # PyMuPDF
+import multiprocessing as mp
 import os
 import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 try:
     from docx import Document  # python-docx untuk .docx
@@ -15,6 +20,8 @@ try:
 except ImportError:
     HAS_ZIP = False
 
+from backend.utils.docx_reader import extract_docx_text, iter_docx_blocks
+
 # ==============================
 # KONFIGURASI FOLDER
 # ==============================
@@ -24,6 +31,15 @@ TEXT_DIR = os.path.join("backend", "uploads", "texts")
 os.makedirs(TEXT_DIR, exist_ok=True)
 os.makedirs(WORD_DIR, exist_ok=True)
 
+# Ekstraksi PDF paralel per halaman (0 = jumlah CPU). Dibaca langsung dari env,
+# bukan backend.config, supaya proses worker tidak ikut membuat app Flask.
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", "0")) or (os.cpu_count() or 1)
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "32"))
+
+_WS_RE = re.compile(r'\s+')
+_SENTENCE_END = ".!?"
+
 
 def split_sentences(text: str) -> list:
     """
@@ -39,15 +55,23 @@ def split_sentences(text: str) -> list:
 
 def extract_text_from_word(file_path: str) -> str:
     """
-    Ekstrak teks dari file Word (.docx atau .doc).
+    Ekstrak teks dari file Word (.docx) lewat pembaca streaming (docx_reader).
+    Paragraf & baris tabel mengikuti urutan di dokumen.
     """
-    if not HAS_DOCX:
-        raise ImportError("python-docx tidak terinstall. Install dengan: pip install python-docx")
-    
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"❌ File Word tidak ditemukan: {file_path}")
-    
+
     print(f"📘 Membaca file Word: {file_path}")
+    return extract_docx_text(file_path)
+
+
+def _legacy_word_text(file_path: str) -> str:
+    """
+    Cara lama lewat python-docx (semua paragraf, lalu semua tabel).
+    Hanya dipakai sebagai pembanding di benchmark docx_reader.
+    """
+    if not HAS_DOCX:
+        raise ImportError("python-docx tidak terinstall. Install dengan: pip install python-docx")
     
     try:
         doc = Document(file_path)
@@ -72,35 +96,151 @@ def extract_text_from_word(file_path: str) -> str:
         raise Exception(f"❌ Gagal membaca file Word: {str(e)}")
 
 
+def iter_word_sentences(word_path: str):
+    """Generator kalimat dari file Word: blok XML langsung dipecah per kalimat."""
+    if not os.path.exists(word_path):
+        raise FileNotFoundError(f"❌ File Word tidak ditemukan: {word_path}")
+    print(f"📘 Membaca file Word: {word_path}")
+    yield from iter_sentences(normalize_text(block.text) for block in iter_docx_blocks(word_path))
+
+
 def save_word_to_txt(word_path: str) -> str:
     """
     Ekstrak teks dari file Word ke file .txt dan pecah per kalimat.
     """
     if not os.path.exists(word_path):
         raise FileNotFoundError(f"❌ File Word tidak ditemukan: {word_path}")
-    
-    full_text = extract_text_from_word(word_path)
-    
-    # Bersihkan teks
-    full_text = re.sub(r'\n+', ' ', full_text)  # Ganti newline dengan spasi
-    full_text = re.sub(r'\s+', ' ', full_text)  # Hapus spasi ganda
-    
-    # Pecah per kalimat
-    sentences_list = split_sentences(full_text)
-    
-    # Simpan hasil ke file teks
+
     txt_filename = os.path.splitext(os.path.basename(word_path))[0] + ".txt"
     txt_path = os.path.join(TEXT_DIR, txt_filename)
+    total = 0
     with open(txt_path, "w", encoding="utf-8") as f:
-        for idx, sentence in enumerate(sentences_list, 1):
-            f.write(f"{idx}. {sentence}\n")
-    
+        for total, sentence in enumerate(iter_word_sentences(word_path), 1):
+            f.write(f"{total}. {sentence}\n")
+
     print(f"✅ File Word berhasil diubah ke teks dan disimpan: {txt_path}")
-    print(f"📄 Total kalimat ditemukan: {len(sentences_list)}")
+    print(f"📄 Total kalimat ditemukan: {total}")
     return txt_path
 
 
 
+# ==============================================================
+# 🔹 EKSTRAKSI PDF PARALEL PER HALAMAN (STREAMING)
+# ==============================================================
+# Halaman dibagi per blok (PDF_PAGES_PER_TASK) ke process pool; tiap
+# worker membuka dokumen sekali dengan PyMuPDF lalu mengembalikan teks
+# halaman yang sudah dinormalisasi. Hasil dikonsumsi berurutan dengan
+# jendela tugas terbatas, jadi memori sebanding beberapa blok halaman,
+# bukan seluruh dokumen. Pemecahan kalimat dilakukan per halaman; potongan
+# terakhir yang belum diakhiri . ! ? dibawa ke halaman berikutnya sehingga
+# kalimat yang terpotong pergantian halaman tetap utuh. Hasilnya identik
+# dengan cara lama (gabung semua halaman → regex → split).
+
+_worker_doc = None
+
+
+def _init_pdf_worker(pdf_path):
+    global _worker_doc
+    _worker_doc = fitz.open(pdf_path)
+
+
+def normalize_text(text: str) -> str:
+    """Newline & spasi beruntun → satu spasi."""
+    return _WS_RE.sub(' ', text)
+
+
+def _extract_pages(start, stop, raw=False):
+    """Dijalankan di worker: teks ternormalisasi (atau mentah per baris) halaman [start, stop)."""
+    clean = (lambda t: t) if raw else normalize_text
+    return [clean(_worker_doc[i].get_text("text")) for i in range(start, stop)]
+
+
+def pdf_page_count(pdf_path):
+    with fitz.open(pdf_path) as doc:
+        return doc.page_count
+
+
+def iter_pdf_pages(pdf_path: str, workers: int = None, pages_per_task: int = PDF_PAGES_PER_TASK, raw: bool = False):
+    """Generator teks ternormalisasi per halaman, berurutan. raw=True → baris asli dipertahankan (chunker)."""
+    workers = workers or PDF_EXTRACT_WORKERS
+    total = pdf_page_count(pdf_path)
+    ranges = [(i, min(i + pages_per_task, total)) for i in range(0, total, pages_per_task)]
+
+    # Dokumen kecil / 1 worker: overhead pool tidak sebanding
+    if workers <= 1 or total < PDF_PARALLEL_MIN_PAGES:
+        with fitz.open(pdf_path) as doc:
+            for page in doc:
+                text = page.get_text("text")
+                yield text if raw else normalize_text(text)
+        return
+
+    # context "spawn" (sama seperti retrain job): aman dipanggil dari proses
+    # server yang sudah punya banyak thread
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(ranges)),
+        mp_context=mp.get_context("spawn"),
+        initializer=_init_pdf_worker,
+        initargs=(pdf_path,),
+    ) as pool:
+        tasks = iter(ranges)
+        pending = deque(pool.submit(_extract_pages, *r, raw) for r in _take(tasks, workers * 2))
+        while pending:
+            pages = pending.popleft().result()
+            for r in _take(tasks, 1):
+                pending.append(pool.submit(_extract_pages, *r, raw))
+            yield from pages
+
+
+def _take(iterator, n):
+    for _, item in zip(range(n), iterator):
+        yield item
+
+
+def iter_sentences(pages):
+    """Pecah kalimat per halaman, kalimat lintas halaman disambung."""
+    carry = ""
+    for text in pages:
+        parts = split_sentences(f"{carry} {text}" if carry else text)
+        if not parts:
+            continue
+        carry = "" if parts[-1][-1] in _SENTENCE_END else parts.pop()
+        yield from parts
+    if carry:
+        yield carry
+
+
+def iter_pdf_sentences(pdf_path: str, workers: int = None):
+    """Generator kalimat dari PDF (ekstraksi halaman paralel)."""
+    if not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"❌ File PDF tidak ditemukan: {pdf_path}")
+    yield from iter_sentences(iter_pdf_pages(pdf_path, workers=workers))
+
+
+def iter_document_sentences(path: str):
+    """Generator kalimat dari PDF / Word sesuai ekstensi file."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".pdf":
+        return iter_pdf_sentences(path)
+    if ext in (".docx", ".doc"):
+        return iter_word_sentences(path)
+    raise ValueError(f"❌ Format dokumen tidak didukung: {ext}")
+
+
+def iter_document_blocks(path: str):
+    """
+    Generator teks blok untuk RegulationChunker: halaman PDF dengan baris
+    asli, atau paragraf / baris tabel docx (satu blok = satu baris).
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".pdf":
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"❌ File PDF tidak ditemukan: {path}")
+        return iter_pdf_pages(path, raw=True)
+    if ext in (".docx", ".doc"):
+        return (block.text for block in iter_docx_blocks(path))
+    raise ValueError(f"❌ Format dokumen tidak didukung: {ext}")
+
+
 def save_pdf_to_txt(pdf_path: str) -> str:
     """
     Ekstrak teks dari PDF ke file .txt dan pecah per kalimat.
@@ -110,36 +250,93 @@ def save_pdf_to_txt(pdf_path: str) -> str:
         raise FileNotFoundError(f"❌ File PDF tidak ditemukan: {pdf_path}")
 
     print(f"📘 Membaca PDF: {pdf_path}")
-    doc = fitz.open(pdf_path)
-    sentences_list = []
+    txt_filename = os.path.splitext(os.path.basename(pdf_path))[0] + ".txt"
+    txt_path = os.path.join(TEXT_DIR, txt_filename)
+
+    # Kalimat langsung ditulis begitu halaman selesai diekstrak
+    total = 0
+    with open(txt_path, "w", encoding="utf-8") as f:
+        for total, sentence in enumerate(iter_pdf_sentences(pdf_path), 1):
+            f.write(f"{total}. {sentence}\n")
 
-    # Gabung teks dari semua halaman
+    print(f"✅ PDF berhasil diubah ke teks dan disimpan: {txt_path}")
+    print(f"📄 Total kalimat ditemukan: {total}")
+    return txt_path
+
+
+# ==============================================================
+# 🔹 BENCHMARK (PDF SINTETIS)
+# ==============================================================
+def _legacy_pdf_sentences(pdf_path):
+    """Cara lama: gabung semua halaman dengan +=, regex global, lalu split."""
+    doc = fitz.open(pdf_path)
     full_text = ""
-    for i, page in enumerate(doc):
+    for page in doc:
         full_text += "\n" + page.get_text("text")
     doc.close()
+    full_text = re.sub(r'\n+', ' ', full_text)
+    full_text = re.sub(r'\s+', ' ', full_text)
+    return split_sentences(full_text)
+
+
+def make_synthetic_pdf(path, pages=300, lines_per_page=45):
+    """PDF peraturan tiruan; sebagian kalimat sengaja terpotong antar halaman."""
+    words = ("mahasiswa wajib mengikuti kegiatan akademik sesuai jadwal yang ditetapkan "
+             "oleh fakultas dan program studi dengan ketentuan berlaku").split()
+    doc = fitz.open()
+    n = 0
+    for p in range(pages):
+        page = doc.new_page()
+        lines = []
+        for i in range(lines_per_page):
+            n += 1
+            line = " ".join(words[(n + k) % len(words)] for k in range(9))
+            # akhir halaman genap dibiarkan tanpa titik → kalimat lintas halaman
+            end = "" if (i == lines_per_page - 1 and p % 2 == 0) else ("." if n % 3 == 0 else "")
+            lines.append(f"Pasal {n} {line}{end}")
+        page.insert_text((36, 40), "\n".join(lines), fontsize=8)
+    doc.save(path)
+    doc.close()
+    return path
 
-    # Bersihkan teks
-    full_text = re.sub(r'\n+', ' ', full_text)  # Ganti newline dengan spasi
-    full_text = re.sub(r'\s+', ' ', full_text)  # Hapus spasi ganda
 
-    # Pecah per kalimat
-    sentences_list = split_sentences(full_text)
+def benchmark(page_counts=(100, 300, 600), workers=None):
+    import tempfile
+    workers = workers or PDF_EXTRACT_WORKERS
+    print(f"🔹 Benchmark ekstraksi PDF (workers={workers}, cpu={os.cpu_count()})")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in page_counts:
+            path = make_synthetic_pdf(os.path.join(tmp, f"synthetic_{pages}.pdf"), pages=pages)
 
-    # Simpan hasil ke file teks
-    txt_filename = os.path.splitext(os.path.basename(pdf_path))[0] + ".txt"
-    txt_path = os.path.join(TEXT_DIR, txt_filename)
-    with open(txt_path, "w", encoding="utf-8") as f:
-        for idx, sentence in enumerate(sentences_list, 1):
-            f.write(f"{idx}. {sentence}\n")
+            t0 = time.perf_counter()
+            legacy = _legacy_pdf_sentences(path)
+            t_legacy = time.perf_counter() - t0
 
-    print(f"✅ PDF berhasil diubah ke teks dan disimpan: {txt_path}")
-    print(f"📄 Total kalimat ditemukan: {len(sentences_list)}")
-    return txt_path
+            t0 = time.perf_counter()
+            sequential = list(iter_sentences(iter_pdf_pages(path, workers=1)))
+            t_seq = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            first = None
+            parallel = []
+            for sentence in iter_pdf_sentences(path, workers=workers):
+                if first is None:
+                    first = time.perf_counter() - t0
+                parallel.append(sentence)
+            t_par = time.perf_counter() - t0
+
+            assert legacy == sequential == parallel, "hasil kalimat berbeda dari cara lama"
+            print(f"  {pages:>4} hal | {len(legacy):>6} kalimat | lama {t_legacy:.2f}s | "
+                  f"streaming {t_seq:.2f}s | paralel {t_par:.2f}s "
+                  f"(kalimat pertama {first * 1000:.0f} ms) ✅ identik")
 
 
 if __name__ == "__main__":
-    # 🔹 Contoh manual testing
-    filename = "Peraturan-Rektor-No-25-Tahun-2020-Tentang-Penyelenggaraan-Kegiatan-Akademik-SEARCHABLE.pdf"
-    full_path = os.path.join(PDF_DIR, filename)
-    save_pdf_to_txt(full_path)
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        # 🔹 python -m backend.utils.pdf_parser bench [workers]
+        benchmark(workers=int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    else:
+        # 🔹 Contoh manual testing
+        filename = "Peraturan-Rektor-No-25-Tahun-2020-Tentang-Penyelenggaraan-Kegiatan-Akademik-SEARCHABLE.pdf"
+        full_path = os.path.join(PDF_DIR, filename)
+        save_pdf_to_txt(full_path)
@@ -0,0 +1,328 @@
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from backend.utils.answer_cache import normalize_question
+from backend.utils.mmap_artifacts import save_artifact, load_artifact
+
+# ==============================================================
+# 🔹 LOOKUP PERTANYAAN DATASET (EXACT + NEAR-DUPLICATE)
+# ==============================================================
+# Banyak pertanyaan masuk sama persis (setelah normalisasi) atau hampir
+# sama dengan Dataset.pertanyaan. Tier ini dibangun saat retrain model
+# utama dan dijalankan SEBELUM model:
+#
+#   1. exact : bentuk kanonik (normalize_question) → id jawaban (dict)
+#   2. near  : MinHash atas shingle 4 karakter bentuk kanonik, di-index
+#              dengan LSH (bands x rows). Kandidat dari bucket yang sama
+#              diverifikasi dengan Jaccard sebenarnya (hash shingle
+#              tersimpan) dan diterima jika ≥ ambang (default 0.8) DAN
+#              lolos penjaga token (near_tokens_compatible): kata yang
+#              berbeda hanya boleh kata fungsi atau typo 1 huruf dari kata
+#              ≥ 5 huruf. Angka / kata isi yang berbeda ("kkp" vs "kkn",
+#              "dua" vs "tiga", "5" vs "4") → miss, biar model yang menjawab.
+#              Saat build, ambang dinaikkan di atas kemiripan tertinggi
+#              antar pasangan dataset berjawaban beda yang lolos penjaga.
+#
+# Hit → jawaban langsung dengan source "dataset-exact" / "dataset-near";
+# miss → lanjut ke model utama. Bentuk kanonik yang dipakai beberapa
+# jawaban berbeda memakai jawaban terbanyak (seri → baris pertama).
+#
+# Artefak: folder mmap question_lookup/ (teks kanonik & jawaban sebagai
+# tabel string); dict exact dan bucket LSH dibangun ulang saat dimuat.
+# question_lookup.npz versi lama tetap bisa dimuat.
+
+SHINGLE_SIZE = 4
+MERSENNE_PRIME = (1 << 31) - 1
+
+# Kata fungsi yang boleh berbeda antara pertanyaan dan kandidat near
+NEAR_TOLERATED = {
+    "apa", "apakah", "yang", "untuk", "di", "ke", "dari", "dan", "atau", "itu", "ini",
+    "saya", "kami", "bisa", "dapat", "adalah", "jika", "kalau", "saja", "ada", "dengan",
+    "pada", "dalam", "nya", "sudah", "akan", "mau", "ingin", "boleh", "harus", "seorang",
+}
+NEAR_TYPO_MIN_LEN = 5
+
+
+def _one_edit(a, b):
+    """True jika a dan b berjarak tepat satu sisip / hapus / ganti / tukar huruf bersebelahan."""
+    if a == b or abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:] or (a[i:i + 2] == b[i:i + 2][::-1] and a[i + 2:] == b[i + 2:])
+    return a[i:] == b[i + 1:]
+
+
+def near_tokens_compatible(query, candidate):
+    """
+    Penjaga tier near: kata yang hanya ada di salah satu bentuk kanonik harus
+    kata fungsi (NEAR_TOLERATED) atau typo 1 huruf dari kata ≥ NEAR_TYPO_MIN_LEN
+    huruf di sisi lain. Token berisi angka tidak pernah ditoleransi.
+    """
+    q, c = set(query.split()), set(candidate.split())
+    only_q = q - c - NEAR_TOLERATED
+    only_c = c - q - NEAR_TOLERATED
+    for token in only_q | only_c:
+        if len(token) < NEAR_TYPO_MIN_LEN or any(ch.isdigit() for ch in token):
+            return False
+    return (all(any(_one_edit(t, u) for u in only_c) for t in only_q)
+            and all(any(_one_edit(u, t) for t in only_q) for u in only_c))
+
+
+def shingle_hashes(canonical, k=SHINGLE_SIZE):
+    """Hash crc32 (unik, terurut) shingle k karakter dari bentuk kanonik."""
+    padded = f" {canonical} "
+    grams = {padded[i:i + k] for i in range(max(1, len(padded) - k + 1))}
+    return np.unique(np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint32, count=len(grams)))
+
+
+class QuestionLookup:
+    def __init__(self, canonical, answer_ids, answers, hashes, hash_offsets, signatures, perm_a, perm_b, meta):
+        self.canonical = canonical          # bentuk kanonik unik (list / MappedStrings)
+        self.answer_ids = answer_ids        # id jawaban per bentuk kanonik
+        self.answers = answers              # teks jawaban unik (list / MappedStrings)
+        self.hashes = hashes                # hash shingle semua entri (uint32, digabung)
+        self.hash_offsets = hash_offsets    # entri i → hashes[off[i]:off[i+1]]
+        self.signatures = signatures        # (entri, num_perm) uint32
+        self.perm_a = perm_a
+        self.perm_b = perm_b
+        self.meta = meta
+        self.threshold = meta["threshold"]
+        self.bands = meta["bands"]
+        self.rows = meta["num_perm"] // meta["bands"]
+        self._exact = {c: i for i, c in enumerate(canonical)}
+        self._buckets = {}
+        for i, sig in enumerate(signatures):
+            for key in self._band_keys(sig):
+                self._buckets.setdefault(key, []).append(i)
+
+    def __len__(self):
+        return len(self.canonical)
+
+    # ------------------------------
+    # Build / simpan / muat
+    # ------------------------------
+    @classmethod
+    def build(cls, questions, answers, threshold=0.8, num_perm=64, bands=16, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm harus kelipatan bands")
+        votes = {}                                   # kanonik → {jawaban: [jumlah, urutan pertama]}
+        for order, (question, answer) in enumerate(zip(questions, answers)):
+            canonical = normalize_question(question)
+            if canonical:
+                count = votes.setdefault(canonical, {}).setdefault(answer, [0, order])
+                count[0] += 1
+
+        answer_list, answer_index = [], {}
+        canonical, answer_ids = [], []
+        for form, options in votes.items():
+            best = min(options.items(), key=lambda kv: (-kv[1][0], kv[1][1]))[0]
+            if best not in answer_index:
+                answer_index[best] = len(answer_list)
+                answer_list.append(best)
+            canonical.append(form)
+            answer_ids.append(answer_index[best])
+
+        rng = np.random.default_rng(seed)
+        perm_a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        perm_b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        shingles = [shingle_hashes(c) for c in canonical]
+        offsets = np.zeros(len(shingles) + 1, dtype=np.int64)
+        np.cumsum([len(s) for s in shingles], out=offsets[1:])
+        signatures = np.array([_signature(s, perm_a, perm_b) for s in shingles], dtype=np.uint32).reshape(-1, num_perm)
+        meta = {"threshold": threshold, "num_perm": num_perm, "bands": bands, "shingle": SHINGLE_SIZE}
+        lookup = cls(
+            canonical, np.array(answer_ids, dtype=np.int32), answer_list,
+            np.concatenate(shingles) if shingles else np.empty(0, dtype=np.uint32), offsets,
+            signatures, perm_a, perm_b, meta,
+        )
+        conflict = lookup.max_conflict_similarity()
+        meta["conflict_similarity"] = conflict
+        if conflict >= threshold:
+            # dua pertanyaan dataset berjawaban beda saling "near" → ambang harus di atasnya
+            meta["threshold"] = lookup.threshold = float(np.nextafter(conflict, 1.0))
+            print(f"⚠️ Ambang near dinaikkan {threshold} → {conflict:.4f}+ (pasangan berjawaban beda)")
+        return lookup
+
+    def save(self, path):
+        return save_artifact(
+            path,
+            arrays={
+                "answer_ids": self.answer_ids,
+                "hashes": self.hashes,
+                "hash_offsets": self.hash_offsets,
+                "signatures": self.signatures,
+                "perm_a": self.perm_a,
+                "perm_b": self.perm_b,
+            },
+            strings={"canonical": self.canonical, "answers": self.answers},
+            meta=self.meta,
+        )
+
+    @classmethod
+    def load(cls, path):
+        if os.path.isdir(path):
+            a = load_artifact(path)
+            return cls(
+                a.strings["canonical"], a["answer_ids"], a.strings["answers"],
+                a["hashes"], a["hash_offsets"], a["signatures"], a["perm_a"], a["perm_b"], a.meta,
+            )
+        with np.load(path, allow_pickle=False) as data:  # question_lookup.npz versi lama
+            return cls(
+                data["canonical"].tolist(), data["answer_ids"], data["answers"].tolist(),
+                data["hashes"], data["hash_offsets"], data["signatures"],
+                data["perm_a"], data["perm_b"], json.loads(str(data["meta"])),
+            )
+
+    # ------------------------------
+    # Query
+    # ------------------------------
+    def match(self, question):
+        """(source, jawaban, kemiripan) atau None jika tidak ada yang cukup mirip."""
+        canonical = normalize_question(question)
+        if not canonical:
+            return None
+        entry = self._exact.get(canonical)
+        if entry is not None:
+            return "dataset-exact", self.answers[self.answer_ids[entry]], 1.0
+
+        shingles = shingle_hashes(canonical)
+        for entry, sim in self._near_candidates(shingles):
+            if sim < self.threshold:
+                break
+            if near_tokens_compatible(canonical, self.canonical[entry]):
+                return "dataset-near", self.answers[self.answer_ids[entry]], float(sim)
+        return None
+
+    def max_conflict_similarity(self):
+        """Kemiripan tertinggi antar bentuk kanonik berjawaban beda yang lolos penjaga token."""
+        worst = 0.0
+        for i in range(len(self.canonical)):
+            stored = self.hashes[self.hash_offsets[i]:self.hash_offsets[i + 1]]
+            for entry, sim in self._near_candidates(stored, self.signatures[i]):
+                if sim <= worst:
+                    break
+                if (entry != i and self.answer_ids[entry] != self.answer_ids[i]
+                        and near_tokens_compatible(self.canonical[i], self.canonical[entry])):
+                    worst = sim
+                    break
+        return float(worst)
+
+    def _near_candidates(self, shingles, signature=None):
+        """(entri, Jaccard) dari bucket LSH yang sama, terurut dari yang paling mirip."""
+        if signature is None:
+            signature = _signature(shingles, self.perm_a, self.perm_b)
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+        scored = []
+        for entry in sorted(candidates):
+            stored = self.hashes[self.hash_offsets[entry]:self.hash_offsets[entry + 1]]
+            common = len(np.intersect1d(shingles, stored, assume_unique=True))
+            scored.append((entry, common / (len(shingles) + len(stored) - common)))
+        scored.sort(key=lambda item: -item[1])
+        return scored
+
+    def _band_keys(self, signature):
+        r = self.rows
+        return [(band, signature[band * r:(band + 1) * r].tobytes()) for band in range(self.bands)]
+
+
+def _signature(hashes, perm_a, perm_b):
+    """MinHash: min_x (a·x + b) mod p untuk setiap permutasi (a, b)."""
+    x = hashes.astype(np.uint64) % np.uint64(MERSENNE_PRIME)
+    return ((perm_a[:, None] * x[None, :] + perm_b[:, None]) % np.uint64(MERSENNE_PRIME)).min(axis=1).astype(np.uint32)
+
+
+# ==============================================================
+# 🔹 METRIK TIER LOOKUP
+# ==============================================================
+class LookupStats:
+    """
+    Hit exact / near / miss + waktu lookup. Latensi yang dihemat =
+    jumlah hit x rata-rata waktu model utama (diukur dari miss) dikurangi
+    waktu lookup milik hit tersebut.
+    """
+
+    def __init__(self, log_every=500):
+        self.log_every = log_every
+        self._lock = threading.Lock()
+        self.exact = 0
+        self.near = 0
+        self.misses = 0
+        self._hit_seconds = 0.0
+        self._miss_seconds = 0.0
+        self._model_seconds = 0.0
+        self._model_calls = 0
+
+    def record(self, source, seconds):
+        with self._lock:
+            if source == "dataset-exact":
+                self.exact += 1
+            elif source == "dataset-near":
+                self.near += 1
+            else:
+                self.misses += 1
+            if source is None:
+                self._miss_seconds += seconds
+            else:
+                self._hit_seconds += seconds
+            total = self.exact + self.near + self.misses
+        if self.log_every and total % self.log_every == 0:
+            s = self.stats()
+            print(f"📈 Lookup dataset: {s['hit_rate'] * 100:.1f}% hit (exact {s['exact']}, near {s['near']}, "
+                  f"miss {s['misses']}), hemat ~{s['saved_ms']:.0f} ms")
+
+    def record_model(self, seconds):
+        with self._lock:
+            self._model_seconds += seconds
+            self._model_calls += 1
+
+    def stats(self):
+        with self._lock:
+            hits = self.exact + self.near
+            lookups = hits + self.misses
+            model_ms = self._model_seconds / self._model_calls * 1000.0 if self._model_calls else 0.0
+            return {
+                "exact": self.exact,
+                "near": self.near,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "avg_lookup_ms": round((self._hit_seconds + self._miss_seconds) / lookups * 1000.0, 4) if lookups else 0.0,
+                "avg_model_ms": round(model_ms, 3),
+                "saved_ms": round(max(0.0, hits * model_ms - self._hit_seconds * 1000.0), 1),
+            }
+
+
+if __name__ == "__main__":
+    # 🔹 python -m backend.utils.question_lookup dataset.csv → hit rate parafrase + latensi
+    from backend.utils.csv_reader import iter_csv_chunks
+
+    rows = [r for chunk in iter_csv_chunks(sys.argv[1], required=("pertanyaan", "jawaban")) for r in chunk]
+    questions, answers = [r["pertanyaan"] for r in rows], [r["jawaban"] for r in rows]
+    started = time.perf_counter()
+    lookup = QuestionLookup.build(questions, answers)
+    print(f"🔹 {len(lookup)} bentuk kanonik, build {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    probes = [(q, a, "asli") for q, a in zip(questions, answers)]
+    probes += [(q.rstrip("?") + " ya kak?", a, "pengisi") for q, a in zip(questions, answers)]
+    probes += [(q[:-3] if len(q) > 20 else q, a, "typo") for q, a in zip(questions, answers)]
+    for kind in ("asli", "pengisi", "typo"):
+        subset = [(q, a) for q, a, k in probes if k == kind]
+        started = time.perf_counter()
+        results = [lookup.match(q) for q, _ in subset]
+        elapsed = (time.perf_counter() - started) / len(subset) * 1000
+        hits = [r for r in results if r]
+        correct = sum(1 for r, (_, a) in zip(results, subset) if r and r[1] == a)
+        print(f"📊 {kind:<8} hit {len(hits) / len(subset):.3f} (exact {sum(r[0] == 'dataset-exact' for r in hits)}, "
+              f"near {sum(r[0] == 'dataset-near' for r in hits)}), benar {correct}/{len(hits)}, {elapsed:.3f} ms/query")
@@ -0,0 +1,409 @@
+import re
+import sys
+import time
+from collections import namedtuple
+
+# ==============================================================
+# 🔹 CHUNKER PERATURAN (BAB / PASAL / AYAT / HURUF)
+# ==============================================================
+# Pengganti split_sentences (regex `(?<=[.!?])\s+`) untuk ingest korpus.
+# Regex naif itu memecah "Pasal 12 ayat (1).", daftar bernomor, dan
+# singkatan seperti "No." menjadi "kalimat" satu-dua kata. Chunker ini
+# membaca teks per baris dan mengenali struktur peraturan:
+#
+#   BAB II / Bagian Kesatu / Paragraf 1  → konteks (judul tidak diindeks)
+#   Pasal 12 (satu baris penuh)          → awal pasal
+#   Pasal 12 Mahasiswa ... (paragraf)    → awal pasal, sisa baris jadi isi
+#   (1) ...  di awal baris               → awal ayat
+#   ... (2) ... di tengah baris          → awal ayat, jika nomornya urutan berikutnya
+#   a. ...   di awal baris               → huruf (dipecah hanya jika ayat terlalu panjang)
+#   PENJELASAN                           → bagian penjelasan
+#
+# Setiap passage punya id hierarkis ("bab-2/pasal-12/ayat-1"), label
+# kutipan ("Pasal 12 ayat (1)"), dan offset BYTE ke blob teks hasil
+# ekstraksi (baris ternormalisasi dipisah "\n", UTF-8). Teks passage bisa
+# diambil ulang dengan slicing memoryview atas blob tanpa salinan
+# (slice_passage). Teks sebelum struktur pertama (konsiderans) dan
+# dokumen tanpa pasal (SOP, panduan) dipecah per kalimat dengan splitter
+# yang paham singkatan, lalu digabung hingga ukuran target.
+#
+# Docx (make_synthetic_docx, SK yang diketik bebas) menulis satu paragraf
+# per pasal: "Pasal 5 (1) ... (2) ...". Heading pasal yang diikuti teks
+# hanya diterima jika bukan rujukan ("Pasal 5 ayat (1)", "Pasal 5 dan
+# Pasal 6", "Pasal 2 Undang-Undang ...") dan nomornya lanjutan pasal
+# sebelumnya — baris PDF yang terpotong bisa diawali rujukan pasal.
+# Penanda ayat di tengah baris juga harus berurutan dan tidak didahului
+# "ayat" / "dan" / "atau" (rujukan "ayat (1) dan (2)").
+
+Passage = namedtuple("Passage", "number passage_id label text start end")
+
+PASSAGE_TARGET_CHARS = 600
+PASSAGE_MAX_CHARS = 1500
+
+_WS_RE = re.compile(r"\s+")
+_PAGE_NUMBER_RE = re.compile(r"^[-–—\s]*(?:hal(?:aman)?\.?\s*)?\d{1,4}[-–—\s]*(?:dari\s+\d+)?$", re.IGNORECASE)
+_BAB_RE = re.compile(r"^BAB\s+([IVXLCDM]+|\d+)\b\.?\s*(.*)$")
+_BAGIAN_RE = re.compile(r"^(Bagian|Paragraf)\s+(Ke\w+|\d+)\s*(.*)$")
+_PASAL_RE = re.compile(r"^Pasal\s+(\d+[A-Z]?)(?:\s+(.*))?$")
+_PASAL_REFERENCE_RE = re.compile(
+    r"^(?:ayat|huruf|angka|butir|jo\b|juncto|sampai|s\.d\.|sebagaimana|tentang|"
+    r"undang|uu\b|peraturan|keputusan|(?:dan|atau)\s+pasal\b|[-,.;:)])",
+    re.IGNORECASE,
+)
+_PENJELASAN_RE = re.compile(r"^PENJELASAN\b")
+_AYAT_RE = re.compile(r"^\((\d+[a-z]?)\)\s*")
+_HURUF_RE = re.compile(r"^([a-z])\.\s+")
+_INLINE_AYAT_RE = re.compile(r"(?<=\s)\((\d+[a-z]?)\)(?=\s)")
+_AYAT_REFERENCE_WORDS = frozenset(("ayat", "dan", "atau", "sampai", "dengan", "s.d.", "jo.", "juncto"))
+_NUMBER_RE = re.compile(r"^(\d+)([A-Za-z]?)$")
+
+# Pemecah kalimat untuk teks bebas: titik/tanya/seru + spasi + awal kalimat baru,
+# kecuali setelah singkatan umum atau penanda daftar ("a.", "1.")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9(\"“])")
+_LAST_TOKEN_RE = re.compile(r"(\S+)\.$")
+ABBREVIATIONS = frozenset("""
+    no nomor dll dsb dst dkk yth sdr bpk ibu dr drs dra prof ir h hj st tgl hlm kep jo
+    a.n u.p s.h m.h s.kom m.kom s.pd m.pd s.e m.m s.t m.t s.si m.si ph.d kab kec kel
+    jl rp pt cv tbk
+""".split())
+
+
+def normalize_line(line):
+    return _WS_RE.sub(" ", line).strip()
+
+
+def _is_sentence_break(piece):
+    match = _LAST_TOKEN_RE.search(piece)
+    if not match:
+        return True
+    token = match.group(1).lower()
+    # singkatan, penanda daftar "a." / "1." / "iv.", atau inisial satu huruf
+    return not (token in ABBREVIATIONS or len(token) == 1 or token.isdigit()
+                or re.fullmatch(r"[ivxlcdm]+", token) is not None)
+
+
+def sentence_spans(text):
+    """Rentang (awal, akhir) karakter tiap kalimat, sadar singkatan."""
+    spans, start = [], 0
+    for match in _SENTENCE_RE.finditer(text):
+        if _is_sentence_break(text[start:match.start()]):
+            spans.append((start, match.start()))
+            start = match.end()
+    if start < len(text):
+        spans.append((start, len(text)))
+    return spans
+
+
+def _follows(current, candidate):
+    """True jika candidate nomor urut berikutnya setelah current ("12" → "13" / "12A")."""
+    cur, cand = _NUMBER_RE.match(current), _NUMBER_RE.match(candidate)
+    if not (cur and cand):
+        return False
+    n, m = int(cur.group(1)), int(cand.group(1))
+    return m == n + 1 or (m == n and cand.group(2).lower() > cur.group(2).lower())
+
+
+def slice_passage(blob, start, end):
+    """Teks passage dari blob (bytes / memoryview / array uint8) tanpa menyalin blob."""
+    return normalize_line(memoryview(blob)[start:end].tobytes().decode("utf-8"))
+
+
+class RegulationChunker:
+    """
+    Dipakai streaming: feed(teks_blok) → passage yang sudah lengkap,
+    close() → passage terakhir. blob() → teks hasil ekstraksi (bytes UTF-8)
+    yang menjadi acuan offset.
+    """
+
+    def __init__(self, target_chars=PASSAGE_TARGET_CHARS, max_chars=PASSAGE_MAX_CHARS):
+        self.target_chars = target_chars
+        self.max_chars = max_chars
+        self._blob = []
+        self._pos = 0
+        self._number = 0
+        self._ids = {}
+        # posisi struktural
+        self.section = None       # None (teks bebas) | "batang" | "penjelasan"
+        self.bab = None
+        self.pasal = None
+        self.ayat = None
+        self.huruf = None
+        self._continued = 0
+        self._title_mode = False
+        # passage yang sedang dikumpulkan: list (teks, awal byte, akhir byte)
+        self._pieces = []
+        self._size = 0
+
+    # ------------------------------
+    # API
+    # ------------------------------
+    def feed(self, text):
+        out = []
+        for raw in text.split("\n"):
+            line = normalize_line(raw)
+            if not line or _PAGE_NUMBER_RE.match(line):
+                continue
+            start = self._append(line)
+            self._line(line, start, out)
+        return out
+
+    def close(self):
+        out = []
+        self._flush(out)
+        return out
+
+    def blob(self):
+        return b"".join(self._blob)
+
+    # ------------------------------
+    # Internal
+    # ------------------------------
+    def _append(self, line):
+        data = line.encode("utf-8")
+        if self._pos:
+            self._blob.append(b"\n")
+            self._pos += 1
+        start = self._pos
+        self._blob.append(data)
+        self._pos += len(data)
+        return start
+
+    def _line(self, line, start, out):
+        bab = _BAB_RE.match(line)
+        if bab and (not bab.group(2) or bab.group(2).isupper()):
+            self._flush(out)
+            self.section = "penjelasan" if self.section == "penjelasan" else "batang"
+            self.bab, self.pasal, self.ayat, self.huruf = bab.group(1), None, None, None
+            self._title_mode = True
+            return
+        if _PENJELASAN_RE.match(line) and line.isupper():
+            self._flush(out)
+            self.section, self.bab, self.pasal, self.ayat, self.huruf = "penjelasan", None, None, None, None
+            self._title_mode = True
+            return
+        if _BAGIAN_RE.match(line) and len(line) < 120:
+            self._flush(out)
+            self.pasal, self.ayat, self.huruf = None, None, None
+            self._title_mode = True
+            return
+        pasal = self._pasal_heading(line)
+        if pasal:
+            number, rest_at = pasal
+            self._flush(out)
+            self.section = self.section or "batang"
+            self.pasal, self.ayat, self.huruf = number, None, None
+            self._title_mode = False
+            if rest_at < len(line):
+                self._body(line[rest_at:], start + len(line[:rest_at].encode("utf-8")), out)
+            return
+        if self._title_mode and self.pasal is None and len(line) < 150 and not line.endswith((".", ";", ":")):
+            return  # judul BAB / Bagian
+        self._title_mode = False
+        self._body(line, start, out)
+
+    def _pasal_heading(self, line):
+        """(nomor pasal, posisi awal isi) jika baris diawali heading pasal, selain itu None."""
+        match = _PASAL_RE.match(line)
+        if not match:
+            return None
+        number, rest = match.group(1), match.group(2)
+        if not rest:
+            return number, len(line)
+        if _PASAL_REFERENCE_RE.match(rest):
+            return None
+        if self.pasal is not None and not _follows(self.pasal, number):
+            return None
+        return number, match.start(2)
+
+    def _inline_ayat_cuts(self, line):
+        """Posisi penanda "(n)" di tengah baris yang membuka ayat berikutnya."""
+        current = self.ayat
+        first = _AYAT_RE.match(line)
+        if first:
+            current = first.group(1)
+        cuts = []
+        for match in _INLINE_AYAT_RE.finditer(line):
+            number = match.group(1)
+            before = line[max(0, match.start() - 40):match.start()].split()
+            if not before or before[-1].lower() in _AYAT_REFERENCE_WORDS or before[-1].endswith(","):
+                continue
+            if (number == "1") if current is None else _follows(current, number):
+                cuts.append(match.start())
+                current = number
+        return cuts
+
+    def _body(self, line, start, out):
+        bounds = [0] + (self._inline_ayat_cuts(line) if self.pasal is not None else []) + [len(line)]
+        for a, b in zip(bounds, bounds[1:]):
+            segment = line[a:b].rstrip()
+            self._segment(segment, start + len(line[:a].encode("utf-8")), out)
+
+    def _segment(self, line, start, out):
+        if self.pasal is not None:
+            ayat = _AYAT_RE.match(line)
+            if ayat:
+                self._flush(out)
+                self.ayat, self.huruf = ayat.group(1), None
+            else:
+                huruf = _HURUF_RE.match(line)
+                if huruf and self._size >= self.target_chars:
+                    self._flush(out)
+                    self.huruf = huruf.group(1)
+
+        if len(line) > self.max_chars:
+            # baris sangat panjang (paragraf docx) → pecah per kalimat
+            encoded_prefix = 0
+            last = 0
+            for s, e in sentence_spans(line):
+                encoded_prefix += len(line[last:s].encode("utf-8"))
+                piece = line[s:e]
+                size = len(piece.encode("utf-8"))
+                self._add(piece, start + encoded_prefix, start + encoded_prefix + size, out)
+                encoded_prefix += size
+                last = e
+        else:
+            self._add(line, start, start + len(line.encode("utf-8")), out)
+
+    def _add(self, text, start, end, out):
+        if self._pieces and self._size + len(text) > self.max_chars:
+            self._flush(out, continued=True)
+        self._pieces.append((text, start, end))
+        self._size += len(text) + 1
+        # teks bebas: tutup passage di akhir kalimat setelah mencapai ukuran target
+        if self.pasal is None and self._size >= self.target_chars and text.endswith((".", "!", "?", ":", ";")):
+            self._flush(out)
+
+    def _flush(self, out, continued=False):
+        if not self._pieces:
+            if not continued:
+                self._continued = 0
+            return
+        text = " ".join(p[0] for p in self._pieces)
+        passage_id, label = self._identity()
+        self._number += 1
+        out.append(Passage(self._number, passage_id, label, text, self._pieces[0][1], self._pieces[-1][2]))
+        self._pieces, self._size = [], 0
+        self._continued = self._continued + 1 if continued else 0
+
+    def _identity(self):
+        parts, label = [], None
+        if self.section == "penjelasan":
+            parts.append("penjelasan")
+        if self.bab:
+            parts.append(f"bab-{self.bab.lower()}")
+        if self.pasal is not None:
+            parts.append(f"pasal-{self.pasal.lower()}")
+            label = f"Pasal {self.pasal}"
+            if self.ayat is not None:
+                parts.append(f"ayat-{self.ayat}")
+                label += f" ayat ({self.ayat})"
+            if self.huruf is not None:
+                parts.append(f"huruf-{self.huruf}")
+                label += f" huruf {self.huruf}"
+        elif self.bab:
+            label = f"BAB {self.bab}"
+        else:
+            parts.append("teks")
+        if self.section == "penjelasan" and label:
+            label = f"Penjelasan {label}"
+        if self._continued:
+            label = f"{label} (lanjutan)" if label else None
+
+        passage_id = "/".join(parts)
+        seen = self._ids.get(passage_id, 0) + 1
+        self._ids[passage_id] = seen
+        if seen > 1 or passage_id.endswith("teks") or passage_id == "penjelasan":
+            passage_id = f"{passage_id}/{seen}"
+        return passage_id, label
+
+
+def iter_passages(blocks, chunker):
+    """Generator passage dari iterable teks blok (halaman PDF / blok docx)."""
+    for text in blocks:
+        yield from chunker.feed(text)
+    yield from chunker.close()
+
+
+# ==============================================================
+# 🔹 PERBANDINGAN vs split_sentences (PERATURAN SINTETIS)
+# ==============================================================
+def make_synthetic_regulation(babs=12, pasal_per_bab=10, ayat_per_pasal=4):
+    words = ("mahasiswa wajib mengikuti kegiatan akademik sesuai jadwal yang ditetapkan "
+             "oleh fakultas dan program studi dengan ketentuan berlaku").split()
+    lines = [
+        "PERATURAN REKTOR UNIVERSITAS",
+        "No. 25 Tahun 2020",
+        "TENTANG PENYELENGGARAAN KEGIATAN AKADEMIK",
+        "Menimbang: a. bahwa untuk meningkatkan mutu akademik perlu ditetapkan peraturan;",
+        "b. bahwa berdasarkan pertimbangan sebagaimana dimaksud dalam huruf a, perlu menetapkan Peraturan Rektor.",
+    ]
+    n = 0
+    for b in range(1, babs + 1):
+        lines += [f"BAB {_roman(b)}", "KETENTUAN " + words[b % len(words)].upper()]
+        for _ in range(pasal_per_bab):
+            n += 1
+            lines.append(f"Pasal {n}")
+            for a in range(1, ayat_per_pasal + 1):
+                body = " ".join(words[(n + a + k) % len(words)] for k in range(14))
+                lines.append(f"({a}) {body.capitalize()} sebagaimana dimaksud dalam Pasal {max(1, n - 1)} ayat (1).")
+                if a == 2:
+                    lines += [f"{h}. {words[(n + i) % len(words)]} dan {words[(n + i + 3) % len(words)]};"
+                              for i, h in enumerate("abc")]
+            lines.append(f"- {n + 1} -")  # nomor halaman
+    return "\n".join(lines)
+
+
+def _roman(n):
+    out = ""
+    for value, numeral in ((10, "X"), (9, "IX"), (5, "V"), (4, "IV"), (1, "I")):
+        while n >= value:
+            out += numeral
+            n -= value
+    return out
+
+
+def compare(text=None, queries=200):
+    from backend.utils.bm25_index import BM25Index
+    from backend.utils.pdf_parser import split_sentences, normalize_text
+
+    text = text or make_synthetic_regulation()
+    started = time.perf_counter()
+    sentences = split_sentences(normalize_text(text))
+    t_split = time.perf_counter() - started
+
+    started = time.perf_counter()
+    chunker = RegulationChunker()
+    passages = list(iter_passages([text], chunker))
+    t_chunk = time.perf_counter() - started
+    blob = chunker.blob()
+    assert all(slice_passage(blob, p.start, p.end) == p.text for p in passages), "offset passage tidak cocok"
+
+    def fragments(units):
+        return sum(1 for u in units if len(u.split()) <= 3)
+
+    words = sorted({w for p in passages for w in p.text.lower().split()})
+    qs = [" ".join(words[(i * 7 + k * 13) % len(words)] for k in range(4)) for i in range(queries)]
+    timings = {}
+    for name, units in (("kalimat", sentences), ("passage", [f"{p.label or ''} {p.text}" for p in passages])):
+        index = BM25Index.build(units)
+        t0 = time.perf_counter()
+        for q in qs:
+            index.search(q)
+        timings[name] = (time.perf_counter() - t0) / queries * 1000
+
+    print(f"📊 split_sentences: {len(sentences)} unit ({fragments(sentences)} fragmen ≤3 kata) "
+          f"dalam {t_split * 1000:.1f} ms, query {timings['kalimat']:.3f} ms")
+    print(f"📊 chunker        : {len(passages)} passage ({fragments([p.text for p in passages])} fragmen ≤3 kata) "
+          f"dalam {t_chunk * 1000:.1f} ms, query {timings['passage']:.3f} ms ✅ offset cocok")
+    print("   contoh:", [(p.passage_id, p.label) for p in passages[3:7]])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] != "compare":
+        # 🔹 python -m backend.utils.regulation_chunker dokumen.pdf|docx → daftar passage
+        from backend.utils.pdf_parser import iter_document_blocks
+        for p in iter_passages(iter_document_blocks(sys.argv[1]), RegulationChunker()):
+            print(f"{p.number:>4} {p.passage_id:<32} {p.label or '-':<28} {p.text[:80]}")
+    else:
+        # 🔹 python -m backend.utils.regulation_chunker compare
+        compare()
@@ -0,0 +1,147 @@
+import hashlib
+import threading
+import time
+from functools import wraps
+
+from flask import make_response, request
+
+# ==============================================================
+# 🔹 RESPONSE CACHE UNTUK ENDPOINT BACA ADMIN
+# ==============================================================
+# Endpoint seperti dashboard_stats / daftar user / dataset dibuka oleh
+# beberapa admin sekaligus dan hasilnya jarang berubah dalam hitungan
+# detik. Cache ini menyimpan body response yang sudah jadi per key
+# (endpoint + query string) dengan TTL per endpoint:
+#
+# - single-flight: jika beberapa request miss bersamaan, hanya satu yang
+#   menghitung; sisanya menunggu dan memakai hasil yang sama
+# - ETag kuat (sha256 body) + If-None-Match → 304 tanpa body
+# - invalidate(group) dipanggil oleh endpoint tulis (tambah/hapus user,
+#   upload/hapus dataset, ...). Setiap grup punya nomor generasi supaya
+#   hasil hitungan yang dimulai SEBELUM invalidasi tidak ikut disimpan.
+#
+# Cache bersifat per proses; TTL yang pendek membatasi data basi jika
+# ada beberapa worker.
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.entry = None
+
+
+class ResponseCache:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries = {}      # key → (body, etag, mimetype, expires_at, group)
+        self._flights = {}      # key → _Flight yang sedang menghitung
+        self._generations = {}  # group → int
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.not_modified = 0
+        self.invalidations = 0
+
+    # ------------------------------
+    # Decorator untuk view Flask
+    # ------------------------------
+    def cached(self, group, ttl):
+        """Cache response GET berstatus 200 milik view di bawah `group`."""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled or request.method != "GET":
+                    return view(*args, **kwargs)
+
+                key = f"{group}:{request.path}?{request.query_string.decode('utf-8', 'replace')}"
+                entry = self._get(key)
+                if entry is None:
+                    entry, rv = self._compute(key, group, ttl, view, args, kwargs)
+                    if entry is None:
+                        return rv  # bukan 200 → tidak di-cache
+                return self._respond(entry)
+            return wrapper
+        return decorator
+
+    def invalidate(self, *groups):
+        with self._lock:
+            for group in groups:
+                self._generations[group] = self._generations.get(group, 0) + 1
+                for key in [k for k, e in self._entries.items() if e[4] == group]:
+                    del self._entries[key]
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "not_modified": self.not_modified,
+                "invalidations": self.invalidations,
+            }
+
+    # ------------------------------
+    # Internal
+    # ------------------------------
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[3] > time.time():
+                self.hits += 1
+                return entry
+            self._entries.pop(key, None)
+            return None
+
+    def _compute(self, key, group, ttl, view, args, kwargs):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                generation = self._generations.get(group, 0)
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.entry is not None:
+                return flight.entry, None
+            # leader gagal / bukan 200 → hitung sendiri
+            rv = view(*args, **kwargs)
+            return None, rv
+
+        entry, rv = None, None
+        try:
+            rv = make_response(view(*args, **kwargs))
+            if rv.status_code == 200 and not rv.is_streamed:  # ekspor streaming tidak di-cache
+                body = rv.get_data()
+                etag = hashlib.sha256(body).hexdigest()[:32]
+                entry = (body, etag, rv.mimetype, time.time() + ttl, group)
+                with self._lock:
+                    if self._generations.get(group, 0) == generation:
+                        self._entries[key] = entry
+            return entry, rv
+        finally:
+            flight.entry = entry
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _respond(self, entry):
+        body, etag, mimetype, _, _ = entry
+        if request.if_none_match.contains(etag):
+            with self._lock:
+                self.not_modified += 1
+            response = make_response("", 304)
+        else:
+            response = make_response(body)
+            response.mimetype = mimetype
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
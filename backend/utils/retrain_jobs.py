@@ -0,0 +1,251 @@
+import multiprocessing as mp
+import queue
+import threading
+import traceback
+import uuid
+from datetime import datetime
+
+from backend.config import MAIN_MODEL_BACKEND
+
+# ==============================================================
+# 🔹 ASYNC RETRAIN JOB RUNNER
+# ==============================================================
+# Retrain dijalankan di proses terpisah (context "spawn") supaya training
+# TensorFlow tidak memakan GIL worker yang melayani chat. Proses anak
+# mengirim progres per-epoch lewat Queue; thread monitor di proses
+# induk memperbarui status job yang bisa dibaca lewat
+# GET /api/admin/retrain/<job_id>.
+#
+# Aturan:
+#   - hanya satu job training berjalan pada satu waktu
+#   - submit saat job sedang berjalan → dibuat SATU job lanjutan (queued)
+#   - submit saat sudah ada job queued → digabung ke job queued tersebut,
+#     asalkan epochs / backend sama; jika beda → RetrainConflict (409)
+#   - cancel hanya berlaku sampai versi baru dipublikasikan; setelah
+#     CURRENT pindah job tetap selesai sebagai succeeded
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+MAX_FINISHED_JOBS = 20
+
+
+class RetrainCancelled(Exception):
+    pass
+
+
+class RetrainConflict(Exception):
+    """Sudah ada job antre dengan parameter berbeda; job tersebut ada di .job."""
+
+    def __init__(self, job):
+        super().__init__(f"Job retrain {job['job_id']} sudah antre dengan epochs={job['epochs']}, "
+                         f"backend={job['backend'] or MAIN_MODEL_BACKEND}")
+        self.job = job
+
+
+# ==============================================================
+# 🔹 PROSES ANAK
+# ==============================================================
+def _run_retrain_child(epochs, events, cancel_event, backend=None):
+    """Entry point proses training (dijalankan di proses baru)."""
+    try:
+        from backend.utils.retrain_model import retrain_all
+
+        callbacks = []
+        if (backend or MAIN_MODEL_BACKEND) == "lstm":
+            # backend linear tidak butuh TensorFlow sama sekali
+            import tensorflow as tf
+
+            class ProgressCallback(tf.keras.callbacks.Callback):
+                def on_epoch_end(self, epoch, logs=None):
+                    logs = logs or {}
+                    events.put({
+                        "type": "epoch",
+                        "epoch": epoch + 1,
+                        "epochs": epochs,
+                        "loss": float(logs.get("loss", 0.0)),
+                        "accuracy": float(logs.get("accuracy", 0.0)),
+                    })
+                    if cancel_event.is_set():
+                        raise RetrainCancelled()
+
+            callbacks.append(ProgressCallback())
+
+        def progress(phase):
+            # "published" dikirim setelah CURRENT dipindah: versi baru sudah aktif, tidak bisa dibatalkan
+            if phase != "published" and cancel_event.is_set():
+                raise RetrainCancelled()
+            events.put({"type": "phase", "phase": phase})
+
+        info = retrain_all(epochs=epochs, callbacks=callbacks, progress=progress, backend=backend)
+        events.put({"type": "done", "result": info})
+    except RetrainCancelled:
+        events.put({"type": "cancelled"})
+    except Exception as e:
+        events.put({"type": "error", "error": str(e), "traceback": traceback.format_exc()})
+
+
+# ==============================================================
+# 🔹 JOB MANAGER (proses induk)
+# ==============================================================
+class RetrainJobManager:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._running = None   # job_id yang sedang berjalan
+        self._pending = None   # job_id yang menunggu giliran
+        self._ctx = mp.get_context("spawn")
+
+    # ------------------------------
+    # API publik
+    # ------------------------------
+    def submit(self, epochs=30, backend=None):
+        """
+        Ajukan retrain. Mengembalikan (job_snapshot, coalesced). backend None → MAIN_MODEL_BACKEND.
+        RetrainConflict jika job yang antre memakai epochs / backend lain.
+        """
+        with self._lock:
+            if self._pending is not None:
+                pending = self._jobs[self._pending]
+                if (pending["epochs"], pending["backend"] or MAIN_MODEL_BACKEND) != (epochs, backend or MAIN_MODEL_BACKEND):
+                    raise RetrainConflict(self._snapshot(self._pending))
+                return self._snapshot(self._pending), True
+
+            job_id = uuid.uuid4().hex[:12]
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "status": JOB_QUEUED,
+                "epochs": epochs,
+                "backend": backend,
+                "phase": None,
+                "progress": {"epoch": 0, "epochs": epochs, "loss": None, "accuracy": None},
+                "history": [],
+                "result": None,
+                "error": None,
+                "submitted_at": _now(),
+                "started_at": None,
+                "finished_at": None,
+                "_cancel": None,
+            }
+
+            if self._running is None:
+                self._start(job_id)
+            else:
+                self._pending = job_id
+            self._trim()
+            return self._snapshot(job_id), False
+
+    def get(self, job_id):
+        with self._lock:
+            if job_id not in self._jobs:
+                return None
+            return self._snapshot(job_id)
+
+    def list(self):
+        with self._lock:
+            return [self._snapshot(j) for j in reversed(list(self._jobs))]
+
+    def cancel(self, job_id):
+        """Batalkan job. Job running berhenti di akhir epoch berikutnya."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job["status"] == JOB_QUEUED:
+                job["status"] = JOB_CANCELLED
+                job["finished_at"] = _now()
+                if self._pending == job_id:
+                    self._pending = None
+            elif job["status"] == JOB_RUNNING and job["_cancel"] is not None:
+                job["_cancel"].set()
+                job["phase"] = "cancelling"
+            return self._snapshot(job_id)
+
+    # ------------------------------
+    # Internal
+    # ------------------------------
+    def _start(self, job_id):
+        # dipanggil dengan self._lock terkunci
+        job = self._jobs[job_id]
+        events = self._ctx.Queue()
+        cancel_event = self._ctx.Event()
+        process = self._ctx.Process(
+            target=_run_retrain_child,
+            args=(job["epochs"], events, cancel_event, job["backend"]),
+            name=f"retrain-{job_id}",
+            daemon=True,
+        )
+        job.update(status=JOB_RUNNING, started_at=_now(), _cancel=cancel_event)
+        self._running = job_id
+        process.start()
+
+        threading.Thread(
+            target=self._monitor, args=(job_id, process, events),
+            name=f"retrain-monitor-{job_id}", daemon=True,
+        ).start()
+
+    def _monitor(self, job_id, process, events):
+        final = None
+        while final is None:
+            try:
+                event = events.get(timeout=1.0)
+            except queue.Empty:
+                if not process.is_alive():
+                    final = {"type": "error", "error": f"Proses training berhenti (exit code {process.exitcode})"}
+                continue
+
+            with self._lock:
+                job = self._jobs[job_id]
+                if event["type"] == "epoch":
+                    progress = {k: event[k] for k in ("epoch", "epochs", "loss", "accuracy")}
+                    job["progress"] = progress
+                    job["history"].append({"epoch": event["epoch"], "loss": event["loss"], "accuracy": event["accuracy"]})
+                elif event["type"] == "phase":
+                    job["phase"] = event["phase"]
+                else:
+                    final = event
+
+        process.join(timeout=10)
+
+        with self._lock:
+            job = self._jobs[job_id]
+            if final["type"] == "done":
+                job.update(status=JOB_SUCCEEDED, result=final["result"], phase="done")
+                print(f"✅ Retrain job {job_id} selesai (versi {final['result'].get('version')})")
+            elif final["type"] == "cancelled":
+                job.update(status=JOB_CANCELLED, phase=None)
+                print(f"⏹️ Retrain job {job_id} dibatalkan")
+            else:
+                job.update(status=JOB_FAILED, error=final["error"])
+                print(f"❌ Retrain job {job_id} gagal:", final["error"])
+                if final.get("traceback"):
+                    print(final["traceback"])
+            job["finished_at"] = _now()
+            job["_cancel"] = None
+
+            self._running = None
+            if self._pending is not None:
+                next_id, self._pending = self._pending, None
+                self._start(next_id)
+
+    def _snapshot(self, job_id):
+        job = self._jobs[job_id]
+        snap = {k: v for k, v in job.items() if not k.startswith("_")}
+        snap["history"] = list(job["history"])
+        return snap
+
+    def _trim(self):
+        finished = [j for j, job in self._jobs.items() if job["status"] in FINISHED_STATES]
+        for job_id in finished[:-MAX_FINISHED_JOBS]:
+            del self._jobs[job_id]
+
+
+def _now():
+    return datetime.utcnow().isoformat() + "Z"
+
+
+retrain_jobs = RetrainJobManager()
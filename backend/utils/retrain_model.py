@@ -1,26 +1,85 @@
+import hashlib
 import os
+import shutil
 import sys
-import pickle
-from sklearn.feature_extraction.text import TfidfVectorizer
-from tensorflow.keras.preprocessing.text import Tokenizer
-from tensorflow.keras.preprocessing.sequence import pad_sequences
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Embedding, LSTM, Dense, Dropout, Bidirectional
+from itertools import groupby
 from sklearn.preprocessing import LabelEncoder
+from sqlalchemy import select
 
 # ===== FIX IMPORT PATHS =====
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
-from backend.config import app
-from backend.db.models import Dataset, Peraturan
+from backend.config import (
+    app, db, MAIN_MODEL_WEIGHT_MODE, MAIN_MODEL_BACKEND, MAIN_LINEAR_C, MAIN_LINEAR_THRESHOLD,
+    QUESTION_LOOKUP_NEAR_THRESHOLD, QUESTION_LOOKUP_NUM_PERM, QUESTION_LOOKUP_BANDS,
+)
+from backend.db.models import Dataset, Peraturan, PeraturanDocument
+from backend.utils.numpy_lstm import export_keras_model, NumpyBiLSTM, check_parity, PARITY_ATOL
+from backend.utils import model_registry as registry
+from backend.utils.main_backends import LinearIntentModel
+from backend.utils.question_lookup import QuestionLookup
+from backend.utils.bm25_index import BM25Segment, read_segment_manifest, write_segment_manifest, segment_path
+
+
+# ==============================================================
+# 🔹 VERSIONED OUTPUT
+# ==============================================================
+# Grup yang dibangun dari state terbaru (tabel Peraturan + segmen versi
+# aktif): fungsi training-nya dijalankan di bawah registry.publish_lock()
+# sampai publish selesai, supaya update dokumen dari proses lain tidak hilang.
+SERIALIZED_GROUPS = ("fallback",)
+
+
+def _train_and_publish(train_fns, carry_over=()):
+    """
+    Jalankan fungsi training ke folder staging, lalu publikasikan sebagai
+    versi baru (pointer CURRENT diganti secara atomik). Jika training gagal,
+    staging dibuang dan versi aktif tidak berubah.
+
+    Training model utama (lama) berjalan tanpa kunci. Sesudahnya, di bawah
+    publish_lock: grup carry_over dihubungkan ulang dari versi aktif jika
+    CURRENT berganti selama training (mis. dokumen baru lewat
+    update_fallback_documents), grup SERIALIZED_GROUPS dibangun, lalu publish.
+    """
+    parent = registry.current_version()
+    staging = registry.create_staging(carry_over=carry_over)
+    info = {}
+    try:
+        for key, fn in train_fns:
+            if key not in SERIALIZED_GROUPS:
+                info[key] = fn(staging)
+        with registry.publish_lock():
+            current = registry.current_version()
+            if current != parent:
+                registry.link_groups(staging, carry_over)
+            # statistik artefak yang dibawa dari versi aktif ikut dicatat
+            current_manifest = (registry.read_manifest(current) or {}) if current else {}
+            for group in carry_over:
+                info.setdefault(group, current_manifest.get(group))
+            for key, fn in train_fns:
+                if key in SERIALIZED_GROUPS:
+                    info[key] = fn(staging)
+            version = registry.publish(staging, info)
+    except Exception:
+        registry.discard_staging(staging)
+        raise
+    info["version"] = version
+    return info
 
-# ===== MODEL FOLDER =====
-MODEL_DIR = os.path.join(os.path.dirname(__file__), "../model")
-os.makedirs(MODEL_DIR, exist_ok=True)
 
 # ==============================================================  
 # 🔹 TRAIN MAIN MODEL (Dataset Q&A)
 # ==============================================================
-def retrain_main_from_db(epochs=30):
+# Backend dipilih lewat MAIN_MODEL_BACKEND (lstm | linear) atau argumen
+# `backend`. Satu versi hanya berisi artefak satu backend; loader
+# mendeteksinya dari nama file (lihat main_backends.load_main_backend).
+def retrain_main_from_db(epochs=30, out_dir=None, callbacks=None, backend=None):
+    if out_dir is None:
+        info = _train_and_publish(
+            [("main", lambda d: retrain_main_from_db(epochs, out_dir=d, callbacks=callbacks, backend=backend))],
+            carry_over=("fallback",),
+        )
+        return dict(info["main"], version=info["version"])
+
     with app.app_context():
         data = Dataset.query.all()
         if not data:
@@ -28,6 +87,52 @@ def retrain_main_from_db(epochs=30):
         questions = [d.pertanyaan for d in data]
         answers = [d.jawaban for d in data]
 
+    stats = train_main_backend(backend or MAIN_MODEL_BACKEND, questions, answers, out_dir,
+                               epochs=epochs, callbacks=callbacks)
+    stats["lookup"] = build_question_lookup(questions, answers, out_dir)
+    return stats
+
+
+def build_question_lookup(questions, answers, out_dir):
+    """Tier lookup exact / near-duplicate yang dijalankan sebelum model utama."""
+    lookup = QuestionLookup.build(
+        questions, answers, threshold=QUESTION_LOOKUP_NEAR_THRESHOLD,
+        num_perm=QUESTION_LOOKUP_NUM_PERM, bands=QUESTION_LOOKUP_BANDS,
+    )
+    lookup.save(os.path.join(out_dir, registry.QUESTION_LOOKUP_DIR))
+    print(f"✅ Lookup pertanyaan dibangun ({len(lookup)} bentuk kanonik)")
+    return {"questions": len(lookup), "answers": len(lookup.answers)}
+
+
+def train_main_backend(backend, questions, answers, out_dir, epochs=30, callbacks=None):
+    """Latih backend model utama ke out_dir. Mengembalikan statistik untuk manifest."""
+    if backend == "linear":
+        return _train_linear(questions, answers, out_dir)
+    if backend == "lstm":
+        return _train_lstm(questions, answers, out_dir, epochs, callbacks)
+    raise ValueError(f"❌ Backend model utama tidak dikenal: {backend}")
+
+
+def _train_linear(questions, answers, out_dir):
+    model = LinearIntentModel.train(questions, answers, C=MAIN_LINEAR_C, threshold=MAIN_LINEAR_THRESHOLD)
+    model.save(os.path.join(out_dir, registry.MAIN_LINEAR_DIR), weight_mode=MAIN_MODEL_WEIGHT_MODE)
+    print(f"✅ Model utama (linear) selesai dilatih ({len(questions)} data, {len(model.features)} fitur)")
+    return {
+        "backend": "linear",
+        "samples": len(questions),
+        "features": int(len(model.features)),
+        "classes": len(model.classes),
+    }
+
+
+def _train_lstm(questions, answers, out_dir, epochs, callbacks):
+    # TensorFlow di-import di sini saja supaya worker yang hanya melayani
+    # chat/admin tidak menanggung waktu import TF saat startup
+    from tensorflow.keras.preprocessing.text import Tokenizer
+    from tensorflow.keras.preprocessing.sequence import pad_sequences
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Embedding, LSTM, Dense, Dropout, Bidirectional
+
     # Tokenize input
     tokenizer = Tokenizer(oov_token="<OOV>")
     tokenizer.fit_on_texts(questions)
@@ -53,51 +158,201 @@ def retrain_main_from_db(epochs=30):
         metrics=['accuracy']
     )
 
-    model.fit(X, y, epochs=epochs, verbose=1)
+    model.fit(X, y, epochs=epochs, verbose=1, callbacks=callbacks or [])
 
-    # Save
-    model.save(os.path.join(MODEL_DIR, "main_model.h5"))
-    pickle.dump(tokenizer, open(os.path.join(MODEL_DIR, "tokenizer_main.pkl"), "wb"))
-    pickle.dump(le, open(os.path.join(MODEL_DIR, "label_main.pkl"), "wb"))
+    # Save: .h5 hanya untuk ekspor ulang / parity; serving memakai folder mmap
+    # main_lstm/ (bobot + vocab tokenizer + tabel jawaban, tanpa pickle)
+    model.save(os.path.join(out_dir, registry.MAIN_MODEL_H5))
+    lstm_dir = export_keras_model(
+        model, os.path.join(out_dir, registry.MAIN_LSTM_DIR),
+        tokenizer=tokenizer, weight_mode=MAIN_MODEL_WEIGHT_MODE, classes=le.classes_,
+    )
+    parity = check_parity(model, NumpyBiLSTM.load(lstm_dir), X, atol=PARITY_ATOL[MAIN_MODEL_WEIGHT_MODE])
+    if not parity["ok"]:
+        # serving memakai NumPy engine → versi dengan output berbeda dari Keras tidak boleh dipublikasikan
+        raise ValueError(f"❌ Parity NumPy vs Keras melebihi toleransi ({MAIN_MODEL_WEIGHT_MODE}): {parity}")
+    print(f"✅ Parity NumPy vs Keras OK (max diff {parity['max_abs_diff']:.2e})")
 
     print(f"✅ Model utama selesai dilatih ({len(questions)} data, vocab {len(tokenizer.word_index)})")
-    return {"samples": len(questions), "vocab": len(tokenizer.word_index)}
+    return {
+        "backend": "lstm",
+        "samples": len(questions),
+        "vocab": len(tokenizer.word_index),
+        "classes": int(len(le.classes_)),
+        "epochs": epochs,
+    }
 
 
 # ==============================================================  
-# 🔹 TRAIN FALLBACK MODEL (TF-IDF Semantic Search)
+# 🔹 TRAIN FALLBACK MODEL (BM25 per dokumen)
 # ==============================================================
-def retrain_fallback_from_db():
+# Artefak fallback = folder segmen BM25, satu segmen per dokumen
+# peraturan (lihat SegmentedBM25). Retrain penuh membangun semua segmen;
+# upload satu dokumen cukup memanggil update_fallback_documents() yang
+# hanya membangun segmen dokumen tersebut. Artefak lama (TF-IDF pickle /
+# fallback_bm25.npz) tidak lagi ditulis; versi lama yang masih memakainya
+# tetap bisa dimuat.
+
+LEGACY_FALLBACK_FILES = (registry.VEC_FILE, registry.MAT_FILE, registry.TEXT_FILE, registry.BM25_FILE)
+
+
+def _document_hashes():
+    # hanya kolom kecil; text_blob dibaca per dokumen saat membangun segmen
+    return dict(db.session.execute(select(PeraturanDocument.filename, PeraturanDocument.content_hash)).all())
+
+
+def _document_blob(filename):
+    return db.session.execute(
+        select(PeraturanDocument.text_blob).where(PeraturanDocument.filename == filename)
+    ).scalar_one_or_none()
+
+
+def _build_segments(filenames=None):
+    """Bangun segmen dari tabel Peraturan (semua dokumen atau hanya `filenames`)."""
     with app.app_context():
-        regs = Peraturan.query.all()
-        if not regs:
-            raise ValueError("❌ Tabel Peraturan kosong — upload PDF dulu.")
+        query = Peraturan.query
+        if filenames is not None:
+            query = query.filter(Peraturan.filename.in_(list(filenames)))
+        regs = query.order_by(Peraturan.filename, Peraturan.sentence_number, Peraturan.id).all()
+        hashes = _document_hashes()
+
+        segments = []
+        for filename, rows in groupby(regs, key=lambda r: r.filename):
+            rows = list(rows)
+            sentences = [r.sentence for r in rows]
+            # dokumen lama tanpa baris peraturan_documents → hash dari isi kalimat
+            content_hash = hashes.get(filename) or hashlib.sha256("\n".join(sentences).encode("utf-8")).hexdigest()
+            # passage hasil chunker → teks diiris dari blob dokumen; kalimat lama → dikemas
+            blob, spans = None, None
+            if all(r.start_offset is not None for r in rows):
+                blob = _document_blob(filename)
+                spans = [(r.start_offset, r.end_offset) for r in rows] if blob else None
+            segments.append(BM25Segment.build(
+                filename or "", content_hash, sentences, [r.sentence_number for r in rows],
+                labels=[r.label for r in rows], text_blob=blob, spans=spans,
+            ))
+    return segments
+
+
+def _fallback_stats(segments):
+    return {
+        "documents": len(segments),
+        "pasal": sum(len(s) for s in segments),
+        "postings": sum(int(len(s.post_docs)) for s in segments),
+    }
+
+
+def retrain_fallback_from_db(out_dir=None):
+    if out_dir is None:
+        info = _train_and_publish(
+            [("fallback", lambda d: retrain_fallback_from_db(out_dir=d))],
+            carry_over=("main",),
+        )
+        return dict(info["fallback"], version=info["version"])
+
+    segments = _build_segments()
+    if not segments:
+        raise ValueError("❌ Tabel Peraturan kosong — upload PDF dulu.")
+
+    seg_dir = os.path.join(out_dir, registry.SEGMENTS_DIR)
+    os.makedirs(seg_dir, exist_ok=True)
+    for segment in segments:
+        segment.save(seg_dir)
+    write_segment_manifest(seg_dir, segments)
 
-        # Ambil seluruh isi pasal
-        contents = [r.sentence for r in regs]
+    stats = _fallback_stats(segments)
+    print(f"✅ Semantic fallback selesai dilatih ({stats['pasal']} pasal, {stats['documents']} dokumen).")
+    return stats
 
-    vectorizer = TfidfVectorizer()
-    matrix = vectorizer.fit_transform(contents)
 
-    pickle.dump(contents, open(os.path.join(MODEL_DIR, "fallback_texts.pkl"), "wb"))
-    pickle.dump(vectorizer, open(os.path.join(MODEL_DIR, "fallback_vectorizer.pkl"), "wb"))
-    pickle.dump(matrix, open(os.path.join(MODEL_DIR, "fallback_matrix.pkl"), "wb"))
+def update_fallback_documents(filenames):
+    """
+    Perbarui index fallback HANYA untuk dokumen `filenames` (baru / berubah /
+    dihapus dari tabel Peraturan), lalu publikasikan sebagai versi baru.
+    Segmen dokumen lain dibawa dari versi aktif lewat hard link.
+    """
+    filenames = set(filenames)
 
-    print(f"✅ Semantic fallback selesai dilatih ({len(contents)} pasal).")
-    return {"pasal": len(contents)}
+    def _update(out_dir):
+        seg_dir = os.path.join(out_dir, registry.SEGMENTS_DIR)
+        manifest = read_segment_manifest(seg_dir)
+        if manifest is None:
+            # versi aktif belum punya segmen → bangun semua sekali
+            return retrain_fallback_from_db(out_dir=out_dir)
+
+        for name in LEGACY_FALLBACK_FILES:
+            path = os.path.join(out_dir, name)
+            if os.path.exists(path):
+                os.remove(path)
+
+        kept = []
+        for entry in manifest["segments"]:
+            if entry["filename"] in filenames:
+                path = segment_path(seg_dir, entry["id"])  # hard link milik staging saja
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            else:
+                kept.append(entry)
+
+        fresh = _build_segments(filenames)
+        for segment in fresh:
+            segment.save(seg_dir)
+        entries = write_segment_manifest(seg_dir, [_SegmentEntry(e) for e in kept] + fresh)
+
+        print(f"✅ Index fallback diperbarui untuk {len(filenames)} dokumen "
+              f"({sum(len(s) for s in fresh)} pasal dibangun ulang).")
+        return {
+            "documents": len(entries),
+            "pasal": sum(e["sentences"] for e in entries),
+            "updated": sorted(filenames),
+        }
+
+    # _update berjalan di bawah publish_lock (SERIALIZED_GROUPS): dua upload paralel,
+    # juga dari worker / proses lain, tidak saling menimpa versi
+    info = _train_and_publish([("fallback", _update)], carry_over=("main", "fallback"))
+    return dict(info["fallback"], version=info["version"])
+
+
+class _SegmentEntry:
+    """Metadata segmen dari manifest (tanpa membuka folder segmen)."""
+
+    def __init__(self, entry):
+        self.id = entry["id"]
+        self.filename = entry["filename"]
+        self.content_hash = entry["content_hash"]
+        self.sentences = entry["sentences"]
+
+    def __len__(self):
+        return self.sentences
 
 
 # ==============================================================  
 # 🔹 TRAIN ALL
 # ==============================================================
-def retrain_all():
-    print("\n🧠 Melatih ulang model utama (Dataset)...")
-    retrain_main_from_db()
+def retrain_all(epochs=30, callbacks=None, progress=None, backend=None):
+    """
+    Latih ulang model utama + fallback lalu publikasikan sebagai satu versi.
+    progress(phase) dipanggil di awal setiap fase (dipakai oleh job runner).
+    backend: lstm | linear (default MAIN_MODEL_BACKEND).
+    """
+    report = progress or (lambda phase: None)
+
+    def _main(out_dir):
+        report("main")
+        print("\n🧠 Melatih ulang model utama (Dataset)...")
+        return retrain_main_from_db(epochs, out_dir=out_dir, callbacks=callbacks, backend=backend)
 
-    print("\n📘 Melatih ulang semantic-fallback (Peraturan)...")
-    retrain_fallback_from_db()
+    def _fallback(out_dir):
+        report("fallback")
+        print("\n📘 Melatih ulang semantic-fallback (Peraturan)...")
+        return retrain_fallback_from_db(out_dir=out_dir)
 
-    print("\n🎉 Semua model selesai dilatih dan disimpan di folder model/")
+    info = _train_and_publish([("main", _main), ("fallback", _fallback)])
+    report("published")
+    print(f"\n🎉 Semua model selesai dilatih, versi aktif: {info['version']}")
+    return info
 
 
 if __name__ == "__main__":
@@ -0,0 +1,278 @@
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import delete, select, update
+
+from backend.config import app, db, ROLLUP_INTERVAL, ROLLUP_LAG, ROLLUP_BATCH_SIZE
+from backend.db.models import (
+    ChatMessage, ChatHistory, LoginHistory,
+    StatsDaily, StatsHourly, StatsSourceDaily, RollupWatermark,
+)
+from backend.db.upsert import upsert
+
+# ==============================================================
+# 🔹 ROLLUP HARIAN & PER JAM UNTUK DASHBOARD ADMIN
+# ==============================================================
+# Dashboard tidak lagi menghitung COUNT/AVG atas seluruh chat_messages,
+# chat_history, dan login_history. Compactor membaca HANYA baris baru
+# (id > watermark) dari tiap tabel sumber, menjumlahkannya per hari/jam,
+# lalu menambahkannya ke tabel rollup lewat upsert:
+#
+#   stats_daily / stats_hourly → questions, logins, answers,
+#                                confidence_sum, confidence_count
+#   stats_source_daily         → jumlah jawaban per sumber (dataset/peraturan/...)
+#
+# Watermark dan increment di-commit dalam transaksi yang sama. Jika
+# beberapa worker menjalankan compactor bersamaan, hanya satu yang
+# berhasil memajukan watermark (UPDATE ... WHERE last_id = lama); yang
+# lain rollback sehingga tidak ada baris yang terhitung dua kali.
+#
+# Watermark hanya maju melewati id yang sudah TERLIHAT berurutan. Celah
+# id (transaksi yang belum commit: writer chat, replay journal, giliran
+# chat) menahan watermark sampai barisnya muncul; celah yang tetap kosong
+# selama ROLLUP_LAG detik dianggap rollback / baris terhapus lalu
+# dilewati. Waktu pertama celah terlihat disimpan per proses. Kolom
+# waktu baris (bisa jauh di masa lalu untuk replay) tidak dipakai untuk
+# memutuskan apa yang aman dilewati.
+#
+#   python -m backend.utils.rollups backfill   → hitung ulang seluruh riwayat
+#   python -m backend.utils.rollups compact    → proses baris baru saja
+
+COUNTERS = ("questions", "logins", "answers", "confidence_sum", "confidence_count")
+
+# (sumber, id pertama celah) → time.monotonic() saat celah pertama kali terlihat
+_gaps_seen = {}
+
+
+class _Delta:
+    """Akumulator increment per hari / jam / sumber untuk satu batch."""
+
+    def __init__(self):
+        self.daily = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        self.hourly = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        self.sources = defaultdict(int)
+
+    def add(self, ts, **values):
+        hour = ts.replace(minute=0, second=0, microsecond=0)
+        for bucket, key in ((self.daily, ts.date()), (self.hourly, hour)):
+            row = bucket[key]
+            for name, value in values.items():
+                row[name] += value
+
+    def add_source(self, ts, source):
+        self.sources[(ts.date(), source or "unknown")] += 1
+
+    def flush(self):
+        upsert(
+            StatsDaily,
+            [dict(day=k, **v) for k, v in sorted(self.daily.items())],
+            key_columns=["day"], increment=COUNTERS,
+        )
+        upsert(
+            StatsHourly,
+            [dict(hour=k, **v) for k, v in sorted(self.hourly.items())],
+            key_columns=["hour"], increment=COUNTERS,
+        )
+        upsert(
+            StatsSourceDaily,
+            [{"day": d, "source": s, "answers": n} for (d, s), n in sorted(self.sources.items())],
+            key_columns=["day", "source"], increment=["answers"],
+        )
+
+
+def _fold_message(delta, row):
+    if row.sender == "user":
+        delta.add(row.ts, questions=1)
+
+
+def _fold_login(delta, row):
+    delta.add(row.ts, logins=1)
+
+
+def _fold_answer(delta, row):
+    has_conf = row.confidence is not None
+    delta.add(
+        row.ts,
+        answers=1,
+        confidence_sum=float(row.confidence) if has_conf else 0.0,
+        confidence_count=1 if has_conf else 0,
+    )
+    delta.add_source(row.ts, row.source)
+
+
+# nama watermark → (model, kolom waktu, kolom tambahan, fungsi fold)
+SOURCES = {
+    "chat_messages": (ChatMessage, ChatMessage.timestamp, (ChatMessage.sender,), _fold_message),
+    "login_history": (LoginHistory, LoginHistory.login_time, (), _fold_login),
+    "chat_history": (ChatHistory, ChatHistory.created_at, (ChatHistory.confidence, ChatHistory.source), _fold_answer),
+}
+
+
+# ==============================================================
+# 🔹 COMPACTION
+# ==============================================================
+def _watermark(name):
+    upsert(RollupWatermark, [{"name": name, "last_id": 0}], key_columns=["name"], maximum=["last_id"])
+    return db.session.execute(
+        select(RollupWatermark.last_id).where(RollupWatermark.name == name)
+    ).scalar_one()
+
+
+def _visible_prefix(name, after, rows, lag):
+    """Baris dengan id berurutan sejak after + 1; celah ditunggu `lag` detik sebelum dilewati."""
+    now = time.monotonic()
+    expected = after + 1
+    for i, row in enumerate(rows):
+        if row.id != expected:
+            first_seen = _gaps_seen.setdefault((name, expected), now)
+            if now - first_seen < lag:
+                return rows[:i]
+        expected = row.id + 1
+    return rows
+
+
+def _compact_source(name, lag, batch_size):
+    """Satu batch dari satu tabel sumber. Mengembalikan (jumlah baris, masih ada sisa)."""
+    model, ts_col, extra, fold = SOURCES[name]
+    try:
+        after = _watermark(name)
+        db.session.commit()
+
+        rows = db.session.execute(
+            select(model.id, ts_col.label("ts"), *extra)
+            .where(model.id > after)
+            .order_by(model.id)
+            .limit(batch_size)
+        ).all()
+
+        visible = _visible_prefix(name, after, rows, lag)
+        processed = len(visible)
+        if not processed:
+            db.session.rollback()
+            return 0, False
+
+        delta = _Delta()
+        for row in visible:
+            if row.ts is not None:
+                fold(delta, row)
+        last_id = visible[-1].id
+        for key in [k for k in _gaps_seen if k[0] == name and k[1] <= last_id]:
+            _gaps_seen.pop(key, None)
+
+        claimed = db.session.execute(
+            update(RollupWatermark)
+            .where(RollupWatermark.name == name, RollupWatermark.last_id == after)
+            .values(last_id=last_id, updated_at=datetime.utcnow())
+        ).rowcount
+        if claimed != 1:
+            # worker lain sudah memproses batch yang sama
+            db.session.rollback()
+            return 0, False
+
+        delta.flush()
+        db.session.commit()
+        return processed, processed == len(rows) == batch_size
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def compact_once(batch_size=ROLLUP_BATCH_SIZE, lag=ROLLUP_LAG):
+    """Proses semua baris baru yang sudah terlihat (butuh app context). Mengembalikan jumlah baris."""
+    total = 0
+    for name in SOURCES:
+        more = True
+        while more:
+            processed, more = _compact_source(name, lag, batch_size)
+            total += processed
+    return total
+
+
+def backfill(batch_size=ROLLUP_BATCH_SIZE):
+    """Kosongkan tabel rollup + watermark, lalu hitung ulang dari seluruh riwayat."""
+    started = time.perf_counter()
+    for model in (StatsDaily, StatsHourly, StatsSourceDaily, RollupWatermark):
+        db.session.execute(delete(model))
+    db.session.commit()
+    _gaps_seen.clear()
+    # riwayat lama: celah id berasal dari baris yang sudah dihapus, tidak perlu ditunggu
+    total = compact_once(batch_size=batch_size, lag=0)
+    print(f"✅ Backfill rollup selesai: {total} baris diproses dalam {time.perf_counter() - started:.2f}s")
+    return total
+
+
+class RollupCompactor:
+    """Thread background yang menjalankan compact_once() secara berkala."""
+
+    def __init__(self, interval=ROLLUP_INTERVAL):
+        self.interval = interval
+        self._thread = None
+        self._stopping = threading.Event()
+        self.runs = 0
+        self.rows = 0
+        self.last_error = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="rollup-compactor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                with app.app_context():
+                    self.rows += compact_once()
+                self.runs += 1
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print("❌ Rollup compaction gagal:", e)
+
+
+# ==============================================================
+# 🔹 PEMBACAAN UNTUK DASHBOARD (O(hari), bukan O(pesan))
+# ==============================================================
+def daily_rows(start_day, end_day):
+    return (
+        StatsDaily.query
+        .filter(StatsDaily.day >= start_day, StatsDaily.day <= end_day)
+        .order_by(StatsDaily.day)
+        .all()
+    )
+
+
+def hourly_rows(start_hour, end_hour):
+    return (
+        StatsHourly.query
+        .filter(StatsHourly.hour >= start_hour, StatsHourly.hour <= end_hour)
+        .order_by(StatsHourly.hour)
+        .all()
+    )
+
+
+def source_totals(start_day, end_day):
+    rows = (
+        db.session.query(StatsSourceDaily.source, db.func.sum(StatsSourceDaily.answers))
+        .filter(StatsSourceDaily.day >= start_day, StatsSourceDaily.day <= end_day)
+        .group_by(StatsSourceDaily.source)
+        .all()
+    )
+    return {source: int(n or 0) for source, n in rows}
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "compact"
+    with app.app_context():
+        db.create_all()
+        if command == "backfill":
+            backfill()
+        elif command == "compact":
+            print(f"✅ {compact_once()} baris baru diproses")
+        else:
+            print("Pemakaian: python -m backend.utils.rollups [backfill|compact]")
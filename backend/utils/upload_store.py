@@ -0,0 +1,162 @@
+import hashlib
+import os
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import select
+
+from backend.config import db, UPLOADS_DIR
+from backend.db.models import Dataset, UploadedFile, PeraturanDocument
+
+# ==============================================================
+# 🔹 CONTENT-ADDRESSED UPLOAD STORE
+# ==============================================================
+# File upload tidak lagi disimpan memakai file.filename dari klien.
+# Isi file di-stream ke disk sambil dihitung SHA-256, lalu disimpan di:
+#
+#   uploads/store/<sha[:2]>/<sha256><ext>
+#
+# sehingga file yang sama hanya tersimpan sekali. Setiap upload dicatat
+# di tabel uploaded_files (hash, nama asli, ukuran, jumlah halaman/baris,
+# status proses, timing) dan listing admin cukup satu query ber-index.
+#
+# Upload dengan hash yang isinya sudah aktif di database dilewati tanpa
+# parsing ulang (status "skipped"):
+#   dataset → hash sama dengan upload dataset terakhir yang berhasil DAN
+#             isi tabel masih sama seperti setelah upload itu (table_hash);
+#             hapus / edit baris sesudahnya → upload ulang diproses lagi
+#   pdf/word → hash sudah terdaftar di peraturan_documents
+
+STORE_DIR = os.path.join(UPLOADS_DIR, "store")
+CHUNK_SIZE = 1024 * 1024
+
+
+def _now():
+    return datetime.utcnow()
+
+
+def store_path(sha, ext):
+    return os.path.join(STORE_DIR, sha[:2], sha + ext)
+
+
+def save_upload(file, kind):
+    """
+    Stream FileStorage ke store sambil menghitung SHA-256.
+    Mengembalikan baris UploadedFile baru (status "received", sudah di-commit).
+    """
+    ext = os.path.splitext(file.filename or "")[1].lower()
+    started = time.perf_counter()
+    os.makedirs(STORE_DIR, exist_ok=True)
+    tmp = os.path.join(STORE_DIR, f".upload-{uuid.uuid4().hex}")
+
+    h, size = hashlib.sha256(), 0
+    try:
+        with open(tmp, "wb") as out:
+            for chunk in iter(lambda: file.stream.read(CHUNK_SIZE), b""):
+                h.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        sha = h.hexdigest()
+        final = store_path(sha, ext)
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        if os.path.exists(final):
+            os.remove(tmp)  # isi yang sama sudah tersimpan
+        else:
+            os.replace(tmp, final)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+    record = UploadedFile(
+        kind=kind,
+        sha256=sha,
+        original_name=os.path.basename(file.filename or sha + ext),
+        stored_path=os.path.relpath(final, UPLOADS_DIR),
+        size=size,
+        status="received",
+        timings={"store": round(time.perf_counter() - started, 3)},
+    )
+    db.session.add(record)
+    db.session.commit()
+    return record
+
+
+def absolute_path(record):
+    return os.path.join(UPLOADS_DIR, record.stored_path)
+
+
+def is_current(record):
+    """True jika isi file ini sudah aktif di database (tidak perlu diproses ulang)."""
+    if record.kind == "dataset":
+        last = (
+            UploadedFile.query
+            .filter(UploadedFile.kind == "dataset", UploadedFile.status == "done")
+            .order_by(UploadedFile.created_at.desc(), UploadedFile.id.desc())
+            .first()
+        )
+        if last is None or last.sha256 != record.sha256 or last.table_hash is None:
+            return False
+        return last.table_hash == dataset_table_hash()
+    return db.session.query(
+        PeraturanDocument.query.filter(PeraturanDocument.content_hash == record.sha256).exists()
+    ).scalar()
+
+
+def dataset_table_hash():
+    """
+    Sidik isi tabel dataset: sha256 atas content_hash terurut (multiset baris).
+    None jika ada baris tanpa content_hash (database belum dimigrasi).
+    """
+    h = hashlib.sha256()
+    rows = db.session.execute(
+        select(Dataset.content_hash).order_by(Dataset.content_hash).execution_options(yield_per=5000)
+    ).scalars()
+    for content_hash in rows:
+        if content_hash is None:
+            return None
+        h.update(content_hash.encode("ascii") + b"\n")
+    return h.hexdigest()
+
+
+def mark(record, status, error=None, timings=None, **counts):
+    """Perbarui status + timing + jumlah halaman/baris lalu commit."""
+    record.status = status
+    record.error = error
+    if timings:
+        record.timings = dict(record.timings or {}, **{k: round(v, 3) for k, v in timings.items()})
+    for name, value in counts.items():
+        setattr(record, name, value)
+    if status in ("done", "skipped", "failed"):
+        record.processed_at = _now()
+    db.session.commit()
+    return record
+
+
+def list_uploads(kinds, limit=200):
+    """Riwayat upload terbaru untuk jenis tertentu (pakai ix_uploaded_files_kind_created)."""
+    return (
+        UploadedFile.query
+        .filter(UploadedFile.kind.in_(kinds))
+        .order_by(UploadedFile.created_at.desc(), UploadedFile.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def serialize(record):
+    return {
+        "id": record.id,
+        "filename": record.original_name,
+        "kind": record.kind,
+        "sha256": record.sha256,
+        "size": record.size,
+        "page_count": record.page_count,
+        "row_count": record.row_count,
+        "status": record.status,
+        "error": record.error,
+        "timings": record.timings or {},
+        "uploaded_at": record.created_at.strftime("%Y-%m-%d %H:%M:%S") if record.created_at else None,
+        "processed_at": record.processed_at.strftime("%Y-%m-%d %H:%M:%S") if record.processed_at else None,
+    }
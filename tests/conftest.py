@@ -0,0 +1,32 @@
+import os
+import tempfile
+
+import pytest
+
+# backend.config membaca MYSQL_URL saat import; tes memakai SQLite sementara
+_DB_DIR = tempfile.mkdtemp(prefix="chatbot-tests-")
+os.environ["MYSQL_URL"] = "sqlite:///" + os.path.join(_DB_DIR, "test.db")
+
+
+def _enable_foreign_keys(dbapi_conn, _record):
+    # SQLite baru menegakkan FOREIGN KEY jika diminta (MySQL selalu)
+    dbapi_conn.execute("PRAGMA foreign_keys=ON")
+
+
+@pytest.fixture
+def database():
+    """Skema lengkap di SQLite kosong, dengan FK aktif; dihapus setelah tes."""
+    from sqlalchemy import event
+
+    from backend.config import app, db
+    import backend.db.models  # noqa: F401 (mendaftarkan tabel)
+
+    with app.app_context():
+        if not event.contains(db.engine, "connect", _enable_foreign_keys):
+            event.listen(db.engine, "connect", _enable_foreign_keys)
+            db.engine.dispose()
+        db.create_all()
+    yield db
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
@@ -0,0 +1,88 @@
+import pytest
+
+from backend.utils import answer_cache
+from backend.utils.answer_cache import AnswerCache, normalize_question
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("Gmn cara isi KRS??", "bagaimana cara isi krs"),
+    ("min, kapan jadwal UAS dong", "kapan jadwal uas"),
+    ("syarat ipk min 3 utk cumlaude", "syarat ipk min 3 untuk cumlaude"),
+    ("Tolong,   dosbing   sy siapa ya kak", "dosen pembimbing saya siapa"),
+    ("   ", ""),
+])
+def test_normalize_question(raw, expected):
+    assert normalize_question(raw) == expected
+
+
+def test_variants_share_one_key():
+    assert normalize_question("Gimana cara isi KRS?") == normalize_question("gmn cara isi krs dong")
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(answer_cache.time, "time", clock)
+    return clock
+
+
+def test_entry_expires_after_ttl(clock):
+    cache = AnswerCache(ttl=60)
+    cache.put("krs", {"answer": "A"}, "v1")
+    clock.now += 59
+    assert cache.get("krs", "v1") == {"answer": "A"}
+    clock.now += 2
+    assert cache.get("krs", "v1") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"], stats["entries"]) == (1, 1, 1, 0)
+
+
+def test_version_change_misses_without_counting_expiry(clock):
+    cache = AnswerCache(ttl=60)
+    cache.put("krs", "A", "v1")
+    assert cache.get("krs", "v2") is None
+    assert cache.stats()["expirations"] == 0
+
+
+def test_lru_evicts_least_recently_used():
+    cache = AnswerCache(max_entries=2)
+    cache.put("a", 1, "v")
+    cache.put("b", 2, "v")
+    assert cache.get("a", "v") == 1
+    cache.put("c", 3, "v")
+    assert cache.get("b", "v") is None
+    assert (cache.get("a", "v"), cache.get("c", "v")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_shared_backend_serves_other_workers(tmp_path, clock):
+    path = str(tmp_path / "cache.db")
+    first, second = AnswerCache(ttl=60, shared_path=path), AnswerCache(ttl=60, shared_path=path)
+    first.put("krs", {"answer": "A"}, "v1")
+
+    assert second.get("krs", "v1") == {"answer": "A"}
+    assert second.stats()["shared_hits"] == 1
+    assert second.get("krs", "v2") is None
+
+    clock.now += 61
+    assert AnswerCache(ttl=60, shared_path=path).get("krs", "v1") is None
+
+
+def test_invalidate_keeps_current_version_in_shared_backend(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = AnswerCache(shared_path=path)
+    cache.put("lama", "A", "v1")
+    cache.put("baru", "B", "v2")
+    cache.invalidate(keep_version="v2")
+
+    other = AnswerCache(shared_path=path)
+    assert other.get("lama", "v1") is None
+    assert other.get("baru", "v2") == "B"
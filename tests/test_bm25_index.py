@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from backend.utils import bm25_index
+from backend.utils.bm25_index import (
+    BM25Index,
+    BM25Segment,
+    SegmentedBM25,
+    _synthetic_corpus,
+    write_segment_manifest,
+)
+
+N_FILES = 12
+PER_FILE = 150
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    docs, words, probs, rng = _synthetic_corpus(N_FILES * PER_FILE, vocab_size=3000)
+    files = [f"peraturan_{i:04d}.pdf" for i in range(N_FILES)]
+    per_file = [docs[i * PER_FILE:(i + 1) * PER_FILE] for i in range(N_FILES)]
+    queries = [" ".join(rng.choice(words, size=5, p=probs)) for _ in range(100)]
+    return files, per_file, queries
+
+
+def _full(files, per_file):
+    return BM25Index.build(
+        [d for group in per_file for d in group],
+        [f for f in files for _ in range(PER_FILE)],
+        [n for _ in files for n in range(1, PER_FILE + 1)],
+    )
+
+
+def _assert_same(full, segmented, queries, k=3):
+    # versi assert dari cek parity di benchmark_segments
+    for q in queries:
+        a, b = full.search(q, k=k), segmented.search(q, k=k)
+        assert [h["doc"] for h in a] == [h["doc"] for h in b], q
+        np.testing.assert_allclose([h["score"] for h in a], [h["score"] for h in b], rtol=1e-4)
+        assert [h["filename"] for h in a] == [h["filename"] for h in b]
+        assert [h["sentence_number"] for h in a] == [h["sentence_number"] for h in b]
+
+
+def test_segments_match_full_rebuild(corpus):
+    files, per_file, queries = corpus
+    segments = [BM25Segment.build(f, "v1", s) for f, s in zip(files, per_file)]
+    _assert_same(_full(files, per_file), SegmentedBM25(segments), queries)
+
+
+def test_replacing_one_segment_matches_full_rebuild(corpus):
+    files, per_file, queries = corpus
+    segments = [BM25Segment.build(f, "v1", s) for f, s in zip(files, per_file)]
+    per_file = list(per_file)
+    per_file[7] = [d + " revisi" for d in per_file[7]]
+    segments[7] = BM25Segment.build(files[7], "v2", per_file[7])
+    _assert_same(_full(files, per_file), SegmentedBM25(segments), queries + ["revisi"])
+
+
+def test_sparse_and_dense_accumulation_agree(corpus, monkeypatch):
+    files, per_file, queries = corpus
+    segmented = SegmentedBM25([BM25Segment.build(f, "v1", s) for f, s in zip(files, per_file)])
+    monkeypatch.setattr(bm25_index, "DENSE_ACCUMULATE_RATIO", 0)
+    sparse = [segmented.search(q, k=5) for q in queries]
+    monkeypatch.setattr(bm25_index, "DENSE_ACCUMULATE_RATIO", 10 ** 9)
+    dense = [segmented.search(q, k=5) for q in queries]
+    for a, b in zip(sparse, dense):
+        assert [h["doc"] for h in a] == [h["doc"] for h in b]
+        np.testing.assert_allclose([h["score"] for h in a], [h["score"] for h in b], rtol=1e-5)
+
+
+def test_saved_segments_load_and_reuse(corpus, tmp_path):
+    files, per_file, queries = corpus
+    segments = [BM25Segment.build(f, "v1", s) for f, s in zip(files[:4], per_file[:4])]
+    for seg in segments:
+        seg.save(str(tmp_path))
+    write_segment_manifest(str(tmp_path), segments)
+
+    loaded = SegmentedBM25.load(str(tmp_path))
+    _assert_same(SegmentedBM25(segments), loaded, queries)
+    assert loaded.texts[PER_FILE + 2] == per_file[1][2]
+
+    reused = SegmentedBM25.load(str(tmp_path), reuse=loaded)
+    assert all(a is b for a, b in zip(reused.segments, loaded.segments))
+
+
+def test_unknown_query_returns_nothing(corpus):
+    files, per_file, _ = corpus
+    segmented = SegmentedBM25([BM25Segment.build(files[0], "v1", per_file[0])])
+    assert segmented.search("tidakadadikorpus") == []
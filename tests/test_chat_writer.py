@@ -0,0 +1,96 @@
+import json
+import os
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from backend.config import app
+from backend.db.models import ChatHistory, TopicStats, User
+from backend.utils import chat_writer
+from backend.utils.chat_writer import ChatWriter, chat_record
+
+
+@pytest.fixture
+def writer(database, tmp_path):
+    with app.app_context():
+        database.session.add(User(npm="G1A001", name="Mahasiswa", password="x"))
+        database.session.commit()
+    return ChatWriter(batch_size=3, flush_interval=0.01, journal_path=str(tmp_path / "chat_history.jsonl"))
+
+
+def _records(*npms):
+    return [chat_record(npm, f"pertanyaan {i}", "jawaban", "model", 0.9) for i, npm in enumerate(npms)]
+
+
+def _stored():
+    with app.app_context():
+        return sorted(q for (q,) in ChatHistory.query.with_entities(ChatHistory.question))
+
+
+def _rejected(writer):
+    with open(writer._rejected_file(), encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_flush_writes_batch_and_topics(writer):
+    writer._flush(_records("G1A001", None, "G1A001"))
+    assert _stored() == ["pertanyaan 0", "pertanyaan 1", "pertanyaan 2"]
+    with app.app_context():
+        assert TopicStats.query.count() == 3
+    assert writer.stats()["written"] == 3
+    assert not writer._journal_has_data()
+
+
+def test_unknown_npm_is_quarantined_not_the_batch(writer):
+    writer._flush(_records("G1A001", "TIDAKADA", None))
+
+    assert _stored() == ["pertanyaan 0", "pertanyaan 2"]
+    rejected = _rejected(writer)
+    assert [r["npm"] for r in rejected] == ["TIDAKADA"]
+    assert rejected[0]["error"]
+    stats = writer.stats()
+    assert (stats["written"], stats["rejected"], stats["spilled_to_journal"]) == (2, 1, 0)
+    assert not writer._journal_has_data()
+
+
+def test_replay_quarantines_bad_record_and_finishes(writer):
+    writer._spill(_records("G1A001", "TIDAKADA", "G1A001", None))
+    assert writer._journal_has_data()
+
+    writer._replay_journal()
+
+    assert _stored() == ["pertanyaan 0", "pertanyaan 2", "pertanyaan 3"]
+    assert [r["npm"] for r in _rejected(writer)] == ["TIDAKADA"]
+    assert not writer._journal_has_data()
+    assert not os.path.exists(writer._journal_file(replay=True))
+    assert writer.stats()["replayed_from_journal"] == 3
+
+
+def test_database_down_spills_then_replays(writer, monkeypatch):
+    original = chat_writer.persist_chat_records
+
+    def down(records):
+        raise OperationalError("INSERT", {}, Exception("server has gone away"))
+
+    monkeypatch.setattr(chat_writer, "persist_chat_records", down)
+    writer._flush(_records("G1A001", None))
+    assert _stored() == []
+    assert writer.stats()["spilled_to_journal"] == 2
+    assert not os.path.exists(writer._rejected_file())
+
+    writer._replay_journal()  # masih mati: record tetap di file .replay
+    assert os.path.exists(writer._journal_file(replay=True))
+
+    monkeypatch.setattr(chat_writer, "persist_chat_records", original)
+    writer._replay_journal()
+    assert _stored() == ["pertanyaan 0", "pertanyaan 1"]
+    assert not writer._journal_has_data()
+
+
+def test_rejected_and_live_journals_are_not_claimed(writer, tmp_path):
+    writer._reject(_records("TIDAKADA")[0], ValueError("fk"))
+    live = tmp_path / f"chat_history.{os.getppid()}.jsonl"
+    live.write_text("{}\n", encoding="utf-8")
+    dead = tmp_path / "chat_history.999999999.jsonl"
+    dead.write_text("{}\n", encoding="utf-8")
+    assert writer._claimable_journals() == [str(dead)]
@@ -0,0 +1,87 @@
+import codecs
+
+import pytest
+
+from backend.utils.csv_reader import CsvReport, iter_csv_chunks, sniff_csv
+
+HEADER = "pertanyaan,jawaban\n"
+
+
+def _write(tmp_path, data, name="dataset.csv"):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def _read(path, **kwargs):
+    encoding, delimiter = sniff_csv(path)
+    report = CsvReport(encoding, delimiter)
+    rows = [row for chunk in iter_csv_chunks(path, required=("pertanyaan", "jawaban"), report=report, **kwargs)
+            for row in chunk]
+    return rows, report
+
+
+def _filler(n):
+    return "".join(f"apa itu krs {i},kartu rencana studi nomor {i}\n" for i in range(n))
+
+
+@pytest.mark.parametrize("data, encoding", [
+    ((HEADER + "apa itu ipk,indeks prestasi kumulatif\n").encode("utf-8"), "utf-8"),
+    (codecs.BOM_UTF8 + (HEADER + "kapan wisuda,dua kali setahun\n").encode("utf-8"), "utf-8-sig"),
+    ((HEADER + "“jadwal” uas,sesuai kalender\n").encode("cp1252"), "cp1252"),
+])
+def test_sniff_small_files(tmp_path, data, encoding):
+    path = _write(tmp_path, data)
+    assert sniff_csv(path) == (encoding, ",")
+    rows, report = _read(path)
+    assert len(rows) == 1 and report.malformed == 0
+    assert set(rows[0]) == {"pertanyaan", "jawaban"}
+
+
+def test_sniff_semicolon_delimiter(tmp_path):
+    path = _write(tmp_path, b"pertanyaan;jawaban\napa itu sks;satuan kredit semester\nkrs;kartu rencana studi\n")
+    assert sniff_csv(path)[1] == ";"
+
+
+@pytest.mark.parametrize("bom", [b"", codecs.BOM_UTF8])
+def test_cp1252_byte_after_sample_switches_encoding(tmp_path, bom):
+    late = "“SKPI” itu apa,surat keterangan pendamping ijazah – café\n"
+    data = bom + (HEADER + _filler(3000)).encode("utf-8") + late.encode("cp1252")
+    assert len(data) > 64 * 1024
+    path = _write(tmp_path, data)
+
+    assert sniff_csv(path)[0] == "cp1252"
+    rows, report = _read(path)
+    assert report.malformed == 0 and len(rows) == 3001
+    assert report.header == ["pertanyaan", "jawaban"]
+    assert rows[-1]["pertanyaan"] == "“SKPI” itu apa"
+    assert rows[-1]["jawaban"].endswith("– café")
+
+
+def test_large_utf8_file_stays_utf8(tmp_path):
+    data = (HEADER + _filler(3000) + "ipk minimal,≥ 2.75\n").encode("utf-8")
+    path = _write(tmp_path, data)
+    assert sniff_csv(path)[0] == "utf-8"
+    rows, _ = _read(path)
+    assert rows[-1]["jawaban"] == "≥ 2.75"
+
+
+def test_malformed_rows_reported_with_line_numbers(tmp_path):
+    path = _write(tmp_path, (HEADER + "a,b\n\nhanya satu kolom\n,jawaban tanpa pertanyaan\nc,d,e\nf,g\n").encode("utf-8"))
+    rows, report = _read(path, chunk_size=1)
+    assert [r["pertanyaan"] for r in rows] == ["a", "f"]
+    assert [(e["line"], e["reason"].split(":")[0]) for e in report.errors] == [
+        (4, "jumlah kolom 1, seharusnya 2"), (5, "kolom kosong"), (6, "jumlah kolom 3, seharusnya 2"),
+    ]
+
+
+def test_missing_required_column(tmp_path):
+    path = _write(tmp_path, b"question,answer\na,b\n")
+    with pytest.raises(ValueError):
+        _read(path)
+
+
+def test_chunks_have_fixed_size(tmp_path):
+    path = _write(tmp_path, (HEADER + _filler(25)).encode("utf-8"))
+    sizes = [len(c) for c in iter_csv_chunks(path, required=("pertanyaan",), chunk_size=10)]
+    assert sizes == [10, 10, 5]
@@ -0,0 +1,74 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from backend.config import app
+from backend.db.models import Dataset, dataset_hash
+from backend.utils.dataset_sync import sync_dataset
+
+
+@pytest.fixture
+def ctx(database):
+    with app.app_context():
+        yield database
+
+
+def _rows():
+    return {row.id: (row.pertanyaan, row.jawaban, row.content_hash)
+            for row in Dataset.query.order_by(Dataset.id)}
+
+
+def test_first_upload_inserts_everything(ctx):
+    report = sync_dataset([("apa itu krs", "kartu rencana studi"), ("kapan uas", "minggu ke-16")])
+    assert (report["added"], report["removed"], report["changed"], report["unchanged"]) == (2, 0, 0, 0)
+    assert sorted(q for q, _, _ in _rows().values()) == ["apa itu krs", "kapan uas"]
+    assert all(h == dataset_hash(q, a) for q, a, h in _rows().values())
+
+
+def test_sync_writes_only_the_difference(ctx):
+    sync_dataset([("apa itu krs", "kartu rencana studi"), ("kapan uas", "minggu ke-16"), ("cuti", "ke BAAK")])
+    before = {q: row_id for row_id, (q, _, _) in _rows().items()}
+
+    report = sync_dataset([("apa itu krs", "kartu rencana studi"), ("kapan uas", "minggu ke-17"),
+                           ("siapa dosbing", "lihat SIAKAD")])
+    assert (report["added"], report["removed"], report["changed"], report["unchanged"]) == (1, 1, 1, 1)
+    assert report["samples"] == {"added": ["siapa dosbing"], "changed": ["kapan uas"]}
+
+    after = {q: (row_id, a) for row_id, (q, a, _) in _rows().items()}
+    assert set(after) == {"apa itu krs", "kapan uas", "siapa dosbing"}
+    # baris yang tetap / berubah jawaban mempertahankan id
+    assert after["apa itu krs"][0] == before["apa itu krs"]
+    assert after["kapan uas"] == (before["kapan uas"], "minggu ke-17")
+
+
+def test_duplicates_are_a_multiset(ctx):
+    sync_dataset([("krs", "a"), ("krs", "a"), ("krs", "a")])
+    report = sync_dataset([("krs", "a"), ("krs", "a")])
+    assert (report["unchanged"], report["removed"]) == (2, 1)
+    assert len(_rows()) == 2
+
+
+def test_same_upload_twice_is_a_no_op(ctx):
+    pairs = [("krs", "a"), ("uas", "b")]
+    sync_dataset(pairs)
+    ids = set(_rows())
+    report = sync_dataset(pairs)
+    assert (report["added"], report["removed"], report["changed"], report["unchanged"]) == (0, 0, 0, 2)
+    assert set(_rows()) == ids
+
+
+def test_replace_mode_rewrites_the_table(ctx):
+    sync_dataset([("krs", "a"), ("uas", "b")])
+    report = sync_dataset([("krs", "a")], mode="replace")
+    assert (report["added"], report["removed"]) == (1, 2)
+    assert [q for q, _, _ in _rows().values()] == ["krs"]
+
+
+def test_failed_sync_rolls_back(ctx, monkeypatch):
+    from backend.utils import dataset_sync
+
+    sync_dataset([("krs", "a"), ("uas", "b")])
+    before = _rows()
+    monkeypatch.setattr(dataset_sync, "CHUNK_SIZE", 1)
+    with pytest.raises(IntegrityError):
+        sync_dataset([("krs", "baru"), ("uas", None)])
+    assert _rows() == before
@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+from backend.utils.inference_batcher import InferenceBatcher
+
+
+def _submit_all(batcher, items, timeout=5):
+    results, errors = [None] * len(items), [None] * len(items)
+
+    def run(i):
+        try:
+            results[i] = batcher.submit(items[i], timeout=timeout)
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(items))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_concurrent_items_are_batched_and_answered_in_order():
+    calls = []
+
+    def handler(items):
+        calls.append(list(items))
+        return [x * 10 for x in items]
+
+    batcher = InferenceBatcher(handler, max_batch_size=4, max_wait_ms=200)
+    results, errors = _submit_all(batcher, list(range(8)))
+
+    assert results == [x * 10 for x in range(8)]
+    assert errors == [None] * 8
+    assert all(len(c) <= 4 for c in calls)
+    assert len(calls) < 8
+    stats = batcher.stats()
+    assert (stats["items"], stats["batches"], stats["errors"]) == (8, len(calls), 0)
+
+
+def test_single_item_waits_at_most_max_wait():
+    batcher = InferenceBatcher(lambda items: items, max_batch_size=32, max_wait_ms=20)
+    started = time.perf_counter()
+    assert batcher.submit("x", timeout=5) == "x"
+    assert time.perf_counter() - started < 1.0
+    assert batcher.stats()["batch_size_histogram"] == {1: 1}
+
+
+def test_handler_error_reaches_every_caller_and_worker_survives():
+    fail = [True]
+
+    def handler(items):
+        if fail[0]:
+            raise ValueError("model rusak")
+        return items
+
+    batcher = InferenceBatcher(handler, max_batch_size=4, max_wait_ms=50)
+    _, errors = _submit_all(batcher, [1, 2, 3])
+    assert all(isinstance(e, ValueError) for e in errors)
+
+    fail[0] = False
+    assert batcher.submit(4, timeout=5) == 4
+    assert batcher.stats()["errors"] >= 1
+
+
+def test_wrong_result_count_is_an_error():
+    batcher = InferenceBatcher(lambda items: items[:-1] if len(items) > 1 else [], max_batch_size=2, max_wait_ms=1)
+    with pytest.raises(RuntimeError, match="hasil"):
+        batcher.submit("a", timeout=5)
+
+
+def test_timeout_raises():
+    release = threading.Event()
+
+    def handler(items):
+        release.wait(5)
+        return items
+
+    batcher = InferenceBatcher(handler, max_wait_ms=0)
+    with pytest.raises(TimeoutError):
+        batcher.submit("a", timeout=0.05)
+    release.set()
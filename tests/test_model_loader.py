@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+from backend.utils import model_loader
+from backend.utils import model_registry as registry
+
+BROKEN = "20250101T120000-aaaaaa"
+GOOD = "20250102T120000-bbbbbb"
+
+
+class FakeBundle:
+    has_main = has_fallback = False
+    fallback_index = None
+
+
+@pytest.fixture
+def state(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "VERSIONS_DIR", str(tmp_path / "versions"))
+    monkeypatch.setattr(registry, "CURRENT_POINTER", str(tmp_path / "CURRENT"))
+    for version in (BROKEN, GOOD):
+        os.makedirs(tmp_path / "versions" / version)
+    registry.set_current(BROKEN)
+
+    calls = []
+
+    def load_bundle(model_dir, previous=None):
+        calls.append(os.path.basename(model_dir))
+        if model_dir.endswith(BROKEN):
+            raise RuntimeError("artefak rusak")
+        return FakeBundle(), {}
+
+    monkeypatch.setattr(model_loader, "load_bundle", load_bundle)
+    state = model_loader.ModelState()
+    state.calls = calls
+    return state
+
+
+def test_failed_first_load_recovers_after_publish(state):
+    state.load()
+    assert not state.ready.is_set() and state.error
+
+    for _ in range(10):
+        assert state.check_for_update() is False  # versi rusak menunggu backoff
+    assert state.calls == [BROKEN]
+
+    registry.set_current(GOOD)  # versi baru / rollback tanpa restart
+    assert state.check_for_update() is True
+    assert state.ready.is_set() and state.version == GOOD and state.error is None
+
+
+def test_failed_first_load_retries_after_backoff(state):
+    state.load()
+    version, _, delay = state._failed
+    assert (version, delay) == (BROKEN, model_loader.FAILED_RETRY_MIN)
+
+    state._failed = (version, 0.0, delay)  # backoff habis
+    assert state.check_for_update() is False
+    assert state.calls == [BROKEN, BROKEN]
+    assert state._failed[2] == delay * 2
@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+from backend.utils import model_registry as registry
+
+V1 = "20250101T120000-aaaaaa"
+V2 = "20250102T120000-bbbbbb"
+
+
+@pytest.fixture
+def versions(tmp_path, monkeypatch):
+    versions_dir = tmp_path / "model" / "versions"
+    monkeypatch.setattr(registry, "VERSIONS_DIR", str(versions_dir))
+    monkeypatch.setattr(registry, "CURRENT_POINTER", str(tmp_path / "model" / "CURRENT"))
+    for name in (V1, V2, ".staging-12345678"):
+        os.makedirs(versions_dir / name)
+    registry.set_current(V2)
+    return versions_dir
+
+
+def test_list_versions_skips_staging(versions):
+    assert registry.list_versions() == [V2, V1]
+
+
+def test_rollback_to_listed_version(versions):
+    registry.set_current(V1)
+    assert registry.current_version() == V1
+
+
+@pytest.mark.parametrize("version", ["..", "../..", "../../model", "/tmp", ".staging-12345678", "", None, ["x"]])
+def test_set_current_rejects_paths(versions, version):
+    with pytest.raises(ValueError):
+        registry.set_current(version)
+    assert registry.current_version() == V2
+
+
+def test_set_current_unknown_version(versions):
+    with pytest.raises(FileNotFoundError):
+        registry.set_current("20990101T000000-cccccc")
+    assert registry.current_version() == V2
+
+
+def test_tampered_pointer_is_ignored(versions):
+    with open(registry.CURRENT_POINTER, "w", encoding="utf-8") as f:
+        f.write("..\n")
+    assert registry.current_version() is None
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from backend.utils.numpy_lstm import (
+    NumpyBiLSTM, NumpyTokenizer, PARITY_ATOL, WEIGHT_MODES, check_parity, export_keras_model,
+)
+
+keras = pytest.importorskip("tensorflow").keras
+
+VOCAB, LENGTH, CLASSES = 30, 7, 5
+
+
+@pytest.fixture(scope="module")
+def keras_model():
+    """Model kecil dengan arsitektur yang sama seperti retrain (bobot acak, tanpa training)."""
+    keras.utils.set_random_seed(0)
+    model = keras.Sequential([
+        keras.Input(shape=(LENGTH,)),
+        keras.layers.Embedding(VOCAB, 8),
+        keras.layers.Bidirectional(keras.layers.LSTM(6)),
+        keras.layers.Dense(8, activation="relu"),
+        keras.layers.Dropout(0.3),
+        keras.layers.Dense(CLASSES, activation="softmax"),
+    ])
+    return model
+
+
+@pytest.fixture(scope="module")
+def inputs():
+    x = np.random.default_rng(1).integers(0, VOCAB, size=(64, LENGTH))
+    x[:8, 4:] = 0  # padding post seperti data training
+    return x
+
+
+@pytest.mark.parametrize("mode", WEIGHT_MODES)
+def test_parity_per_weight_mode(keras_model, inputs, tmp_path, mode):
+    path = export_keras_model(keras_model, str(tmp_path / f"main_lstm-{mode}"), weight_mode=mode)
+    parity = check_parity(keras_model, NumpyBiLSTM.load(path), inputs, atol=PARITY_ATOL[mode])
+    assert parity["ok"], parity
+    if mode == "float32":
+        assert parity["argmax_agreement"] == 1.0
+
+
+def test_export_keeps_tokenizer_and_classes(keras_model, tmp_path):
+    tokenizer = NumpyTokenizer({"<OOV>": 1, "cuti": 2, "akademik": 3}, oov_token="<OOV>")
+    path = export_keras_model(
+        keras_model, str(tmp_path / "main_lstm"), tokenizer=tokenizer,
+        classes=[f"jawaban {i}" for i in range(CLASSES)],
+    )
+    model = NumpyBiLSTM.load(path)
+    assert model.tokenizer.texts_to_sequences(["Cuti akademik, semester?"]) == [[2, 3, 1]]
+    assert [model.classes[i] for i in range(CLASSES)] == [f"jawaban {i}" for i in range(CLASSES)]
+
+
+def test_parity_detects_broken_weights(keras_model, inputs, tmp_path):
+    model = NumpyBiLSTM.load(export_keras_model(keras_model, str(tmp_path / "main_lstm")))
+    # urutan gate salah (input ↔ forget) harus tertangkap oleh parity check
+    units = 6
+    for direction in ("fw", "bw"):
+        name = f"l1_{direction}_kernel"
+        w = np.array(model.weights[name])
+        w[:, :units], w[:, units:2 * units] = w[:, units:2 * units].copy(), w[:, :units].copy()
+        model.weights[name] = w
+    assert not check_parity(keras_model, model, inputs, atol=PARITY_ATOL["float32"])["ok"]
@@ -0,0 +1,83 @@
+import pytest
+
+from backend.utils.question_lookup import QuestionLookup, near_tokens_compatible
+
+KKN = "Mahasiswa dapat mengikuti KKN setelah menempuh minimal 100 SKS."
+KAS = "Mahasiswa dapat mengikuti KAS setelah menempuh minimal 60 SKS."
+D3 = "Program vokasi Diploma Tiga ditempuh minimal dalam 5 semester."
+D4 = "Program vokasi Diploma Empat ditempuh minimal dalam 7 semester."
+PINDAH_4 = "Minimal 60 SKS dengan IPK 2.50."
+PINDAH_6 = "Minimal 80 SKS dengan IPK 2.50."
+CUTI = "Cuti akademik diajukan paling lambat dua minggu sebelum semester dimulai."
+
+DATASET = [
+    ("Apa syarat untuk bisa mengikuti KKN?", KKN),
+    ("Apa syarat untuk bisa mengikuti KAS?", KAS),
+    ("Berapa lama masa kuliah untuk program vokasi diploma tiga?", D3),
+    ("Berapa lama masa kuliah untuk program vokasi diploma empat?", D4),
+    ("Berapa syarat SKS dan IPK jika pindah setelah 4 semester?", PINDAH_4),
+    ("Berapa syarat SKS dan IPK jika pindah setelah 6 semester?", PINDAH_6),
+    ("Bagaimana prosedur pengajuan cuti akademik mahasiswa?", CUTI),
+]
+
+
+@pytest.fixture(scope="module")
+def lookup():
+    questions, answers = zip(*DATASET)
+    return QuestionLookup.build(list(questions), list(answers))
+
+
+def test_exact_after_normalization(lookup):
+    assert lookup.match("gmn prosedur pengajuan cuti akademik mhs dong?") == ("dataset-exact", CUTI, 1.0)
+
+
+def test_near_tolerates_typo_and_function_words(lookup):
+    source, answer, sim = lookup.match("Bagaimana prosedur pengajuan cuti akademk mahasiswa?")
+    assert (source, answer) == ("dataset-near", CUTI)
+    assert lookup.threshold <= sim < 1.0
+    assert lookup.match("Bagaimana prosedur untuk pengajuan cuti akademik mahasiswa")[1] == CUTI
+
+
+@pytest.mark.parametrize("question", [
+    "apa syarat untuk bisa mengikuti kkp",                              # akronim lain
+    "Berapa lama masa kuliah untuk program vokasi diploma dua?",        # kata isi lain
+    "Berapa syarat SKS dan IPK jika pindah setelah 5 semester?",        # angka lain
+])
+def test_near_rejects_different_content(lookup, question):
+    assert lookup.match(question) is None
+
+
+def test_dataset_conflicts_do_not_answer_each_other(lookup):
+    # pasangan berjawaban beda saling mirip ≥ 0.8 tetapi ditolak penjaga token
+    assert lookup.meta["conflict_similarity"] < lookup.threshold
+    for question, answer in DATASET:
+        assert lookup.match(question) == ("dataset-exact", answer, 1.0)
+
+
+def test_threshold_raised_above_conflicting_pairs():
+    lookup = QuestionLookup.build(
+        ["bagaimana prosedur pengajuan cuti akademik", "bagaimana prosedur pengajuan cuti akademis"],
+        [CUTI, KKN],
+    )
+    assert lookup.meta["conflict_similarity"] >= 0.8
+    assert lookup.threshold > lookup.meta["conflict_similarity"]
+    assert lookup.match("bagaimana prosedur pengajuan cuti akademic") is None
+
+
+@pytest.mark.parametrize("query, candidate, ok", [
+    ("syarat ikut wisuda", "apa syarat ikut wisuda", True),
+    ("prosedur pengajuan cuti akademk", "prosedur pengajuan cuti akademik", True),
+    ("syarat mengikuti kkp", "syarat mengikuti kkn", False),
+    ("pindah setelah 5 semester", "pindah setelah 4 semester", False),
+    ("syarat mengikuti wisuda", "syarat mengikuti yudisium", False),
+])
+def test_near_tokens_compatible(query, candidate, ok):
+    assert near_tokens_compatible(query, candidate) is ok
+
+
+def test_save_and_load_roundtrip(lookup, tmp_path):
+    lookup.save(str(tmp_path / "question_lookup"))
+    loaded = QuestionLookup.load(str(tmp_path / "question_lookup"))
+    assert loaded.threshold == lookup.threshold
+    assert loaded.match("Berapa syarat SKS dan IPK jika pindah setelah 5 semester?") is None
+    assert loaded.match("Bagaimana prosedur pengajuan cuti akademk mahasiswa?")[1] == CUTI
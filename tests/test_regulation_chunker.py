@@ -0,0 +1,95 @@
+import pytest
+
+from backend.utils.regulation_chunker import (
+    RegulationChunker,
+    iter_passages,
+    make_synthetic_regulation,
+    slice_passage,
+)
+
+
+def _chunk(*blocks):
+    chunker = RegulationChunker()
+    passages = list(iter_passages(blocks, chunker))
+    blob = chunker.blob()
+    assert all(slice_passage(blob, p.start, p.end) == p.text for p in passages)
+    return passages
+
+
+def _ids(passages):
+    return [p.passage_id for p in passages]
+
+
+def test_standalone_headings_split_per_ayat():
+    passages = _chunk("\n".join([
+        "BAB I",
+        "KETENTUAN UMUM",
+        "Pasal 1",
+        "(1) Mahasiswa wajib hadir sebagaimana dimaksud dalam Pasal 2 ayat (1).",
+        "(2) Kehadiran dicatat oleh dosen.",
+        "Pasal 2",
+        "Cuti akademik diajukan kepada dekan.",
+    ]))
+    assert _ids(passages) == ["bab-i/pasal-1/ayat-1", "bab-i/pasal-1/ayat-2", "bab-i/pasal-2"]
+    assert passages[0].label == "Pasal 1 ayat (1)"
+    assert passages[2].text == "Cuti akademik diajukan kepada dekan."
+
+
+def test_inline_pasal_paragraphs_are_separate_passages():
+    # tata letak docx: satu paragraf per pasal
+    passages = _chunk("\n".join([
+        "BAB 1",
+        "Pasal 22 Mahasiswa wajib mengikuti kegiatan akademik.",
+        "Pasal 23 Dosen menilai hasil ujian.",
+    ]))
+    assert _ids(passages) == ["bab-1/pasal-22", "bab-1/pasal-23"]
+    assert [p.text for p in passages] == ["Mahasiswa wajib mengikuti kegiatan akademik.",
+                                          "Dosen menilai hasil ujian."]
+
+
+def test_inline_ayat_markers_split_the_paragraph():
+    passages = _chunk(
+        "Pasal 5 (1) Mahasiswa mengajukan cuti. (2) Cuti sebagaimana dimaksud pada ayat (1) "
+        "dan (3) paling lama dua semester. (3) Cuti tidak dihitung masa studi."
+    )
+    assert _ids(passages) == ["pasal-5/ayat-1", "pasal-5/ayat-2", "pasal-5/ayat-3"]
+    assert passages[1].text == "(2) Cuti sebagaimana dimaksud pada ayat (1) dan (3) paling lama dua semester."
+    assert passages[2].label == "Pasal 5 ayat (3)"
+
+
+def test_out_of_sequence_inline_marker_is_not_an_ayat():
+    passages = _chunk("Pasal 1 (1) Biaya kuliah dibayar per semester (3) kali angsuran.")
+    assert _ids(passages) == ["pasal-1/ayat-1"]
+
+
+@pytest.mark.parametrize("line", [
+    "Pasal 3 ayat (2) berlaku bagi mahasiswa baru.",
+    "Pasal 3 dan Pasal 4 berlaku bagi mahasiswa baru.",
+    "Pasal 9 mahasiswa yang melanggar dikenai sanksi.",  # nomor tidak berurutan
+])
+def test_references_at_line_start_stay_in_the_current_pasal(line):
+    passages = _chunk("\n".join(["Pasal 7", "(1) Mahasiswa wajib tertib; ketentuan dalam", line]))
+    assert _ids(passages) == ["pasal-7/ayat-1"]
+    assert passages[0].text.endswith(line)
+
+
+def test_free_text_before_structure_is_kept():
+    passages = _chunk("Menimbang bahwa perlu ditetapkan peraturan.\nPasal 1\nIsi pasal.")
+    assert _ids(passages) == ["teks/1", "pasal-1"]
+
+
+def test_synthetic_regulation_has_no_fragments():
+    passages = _chunk(make_synthetic_regulation(babs=2, pasal_per_bab=3, ayat_per_pasal=3))
+    assert sum(1 for p in passages if p.passage_id.endswith("/ayat-1")) == 6
+    assert all(len(p.text.split()) > 3 for p in passages)
+
+
+def test_synthetic_docx_splits_every_pasal(tmp_path):
+    pytest.importorskip("docx")
+    from backend.utils.docx_reader import make_synthetic_docx
+    from backend.utils.pdf_parser import iter_document_blocks
+
+    path = make_synthetic_docx(str(tmp_path / "sk.docx"), sections=2, paragraphs_per_section=4, table_rows=0)
+    passages = _chunk(*iter_document_blocks(path))
+    assert [p.label for p in passages] == [f"Pasal {n}" for n in range(1, 9)]
+    assert not any("Pasal" in p.text for p in passages)
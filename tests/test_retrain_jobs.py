@@ -0,0 +1,55 @@
+import queue
+import threading
+
+import pytest
+
+import backend.utils.retrain_model as retrain_model
+from backend.utils.retrain_jobs import RetrainConflict, RetrainJobManager, _run_retrain_child
+
+
+def _run_child(monkeypatch, fake_retrain):
+    events, cancel = queue.Queue(), threading.Event()
+    monkeypatch.setattr(retrain_model, "retrain_all", lambda **kw: fake_retrain(cancel, kw["progress"]))
+    _run_retrain_child(1, events, cancel, backend="linear")
+    out = []
+    while not events.empty():
+        out.append(events.get())
+    return out
+
+
+def test_cancel_after_publish_still_succeeds(monkeypatch):
+    def fake(cancel, progress):
+        progress("main")
+        progress("fallback")
+        cancel.set()  # pembatalan tiba saat CURRENT sudah dipindah
+        progress("published")
+        return {"version": "v2"}
+
+    events = _run_child(monkeypatch, fake)
+    assert events[-1] == {"type": "done", "result": {"version": "v2"}}
+
+
+def test_cancel_before_publish_cancels(monkeypatch):
+    def fake(cancel, progress):
+        progress("main")
+        cancel.set()
+        progress("fallback")
+        pytest.fail("fase berikutnya tidak boleh jalan")
+
+    events = _run_child(monkeypatch, fake)
+    assert events[-1] == {"type": "cancelled"}
+
+
+def test_submit_coalesces_only_same_parameters():
+    manager = RetrainJobManager()
+    manager._running = "berjalan"  # tanpa spawn proses: job baru langsung antre
+
+    job, coalesced = manager.submit(epochs=5, backend="linear")
+    assert (job["status"], coalesced) == ("queued", False)
+    assert manager.submit(epochs=5, backend="linear") == (job, True)
+
+    with pytest.raises(RetrainConflict) as conflict:
+        manager.submit(epochs=10, backend="linear")
+    assert conflict.value.job["job_id"] == job["job_id"]
+    with pytest.raises(RetrainConflict):
+        manager.submit(epochs=5, backend="lstm")
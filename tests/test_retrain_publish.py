@@ -0,0 +1,81 @@
+import json
+import multiprocessing as mp
+import os
+import time
+
+import pytest
+
+from backend.config import app
+from backend.db.models import Dataset, Peraturan
+from backend.utils import model_registry as registry
+from backend.utils import retrain_model
+from backend.utils.retrain_model import retrain_fallback_from_db, retrain_main_from_db, update_fallback_documents
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "MODEL_DIR", str(tmp_path / "model"))
+    monkeypatch.setattr(registry, "VERSIONS_DIR", str(tmp_path / "model" / "versions"))
+    monkeypatch.setattr(registry, "CURRENT_POINTER", str(tmp_path / "model" / "CURRENT"))
+    os.makedirs(tmp_path / "model")
+    return tmp_path / "model"
+
+
+def _add_document(db, filename, sentences):
+    db.session.add_all(Peraturan(filename=filename, sentence_number=i + 1, sentence=s) for i, s in enumerate(sentences))
+    db.session.commit()
+
+
+def _current_documents():
+    path = os.path.join(registry.current_dir(), registry.SEGMENTS_DIR, "segments.json")
+    with open(path, encoding="utf-8") as f:
+        return sorted(e["filename"] for e in json.load(f)["segments"])
+
+
+def test_main_retrain_keeps_documents_published_meanwhile(database, model_dir, monkeypatch):
+    with app.app_context():
+        database.session.add_all([
+            Dataset(pertanyaan="cara isi krs", jawaban="Isi KRS lewat portal akademik."),
+            Dataset(pertanyaan="jadwal uas kapan", jawaban="UAS sesuai kalender akademik."),
+            Dataset(pertanyaan="syarat cuti akademik", jawaban="Cuti diajukan ke fakultas."),
+        ])
+        _add_document(database, "lama.pdf", ["Pasal 1 mahasiswa wajib mengisi KRS.", "Pasal 2 cuti akademik."])
+    retrain_fallback_from_db()
+
+    original = retrain_model.train_main_backend
+
+    def slow_training(*args, **kwargs):
+        # selama model utama dilatih, admin mengunggah dokumen baru
+        with app.app_context():
+            _add_document(database, "baru.pdf", ["Pasal 3 wisuda dilaksanakan dua kali setahun."])
+        update_fallback_documents(["baru.pdf"])
+        assert _current_documents() == ["baru.pdf", "lama.pdf"]
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(retrain_model, "train_main_backend", slow_training)
+    info = retrain_main_from_db(backend="linear")
+
+    assert registry.current_version() == info["version"]
+    assert _current_documents() == ["baru.pdf", "lama.pdf"]
+    assert registry.read_manifest(info["version"])["fallback"]["documents"] == 2
+
+
+def _hold_lock(ready, seconds):
+    with registry.publish_lock():
+        ready.set()
+        time.sleep(seconds)
+
+
+@pytest.mark.skipif(registry.fcntl is None or "fork" not in mp.get_all_start_methods(), reason="butuh flock + fork")
+def test_publish_lock_is_exclusive_across_processes(model_dir):
+    ctx = mp.get_context("fork")
+    ready = ctx.Event()
+    holder = ctx.Process(target=_hold_lock, args=(ready, 0.5))
+    holder.start()
+    assert ready.wait(10)
+    started = time.monotonic()
+    with registry.publish_lock():
+        with registry.publish_lock():  # reentrant dalam satu proses
+            waited = time.monotonic() - started
+    holder.join(10)
+    assert waited >= 0.3
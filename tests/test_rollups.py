@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from backend.config import app
+from backend.db.models import ChatHistory, RollupWatermark, StatsDaily
+from backend.utils import rollups
+
+DAY = datetime(2026, 1, 5, 9, 0)
+
+
+@pytest.fixture
+def ctx(database):
+    rollups._gaps_seen.clear()
+    with app.app_context():
+        yield database
+    rollups._gaps_seen.clear()
+
+
+def _answers(db, *ids, ts=DAY):
+    for i in ids:
+        db.session.add(ChatHistory(id=i, question=f"q{i}", answer="a", source="model",
+                                   confidence=0.5, created_at=ts))
+    db.session.commit()
+
+
+def _counted(db):
+    return db.session.execute(select(func.coalesce(func.sum(StatsDaily.answers), 0))).scalar_one()
+
+
+def _watermark(db):
+    return db.session.execute(
+        select(RollupWatermark.last_id).where(RollupWatermark.name == "chat_history")
+    ).scalar_one()
+
+
+def test_watermark_waits_for_uncommitted_lower_id(ctx):
+    # id 3 dialokasikan tapi transaksinya belum commit
+    _answers(ctx, 1, 2, 4)
+    assert rollups.compact_once(lag=60) == 2
+    assert _watermark(ctx) == 2
+
+    # commit terlambat, dengan created_at jauh di masa lalu (mis. replay journal)
+    _answers(ctx, 3, ts=DAY - timedelta(days=3))
+    assert rollups.compact_once(lag=60) == 2
+    assert _watermark(ctx) == 4
+    assert _counted(ctx) == 4
+    assert not rollups._gaps_seen
+
+
+def test_permanent_gap_is_skipped_after_lag(ctx, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(rollups.time, "monotonic", lambda: clock[0])
+
+    _answers(ctx, 1, 3)  # id 2 di-rollback
+    assert rollups.compact_once(lag=60) == 1
+    clock[0] += 30
+    assert rollups.compact_once(lag=60) == 0
+    assert _watermark(ctx) == 1
+
+    clock[0] += 31
+    assert rollups.compact_once(lag=60) == 1
+    assert _watermark(ctx) == 3
+    assert _counted(ctx) == 2
+    assert not rollups._gaps_seen
+
+
+def test_backfill_does_not_wait_on_old_gaps(ctx):
+    _answers(ctx, 1, 5, 9)
+    assert rollups.backfill() == 3
+    assert _watermark(ctx) == 9
+    assert _counted(ctx) == 3
+
+
+def test_batches_continue_across_batch_size(ctx):
+    _answers(ctx, *range(1, 8))
+    assert rollups.compact_once(batch_size=3, lag=60) == 7
+    assert _watermark(ctx) == 7
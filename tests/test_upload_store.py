@@ -0,0 +1,54 @@
+import pytest
+
+from backend.config import app
+from backend.db.models import Dataset, UploadedFile
+from backend.utils import upload_store
+from backend.utils.dataset_sync import sync_dataset
+
+PAIRS = [("cara isi krs", "Lewat portal akademik."), ("jadwal uas", "Sesuai kalender akademik.")]
+SHA = "a" * 64
+
+
+def _upload(db, status="received", table_hash=None):
+    record = UploadedFile(kind="dataset", sha256=SHA, original_name="dataset.csv", stored_path="store/x.csv",
+                          status=status, table_hash=table_hash)
+    db.session.add(record)
+    db.session.commit()
+    return record
+
+
+@pytest.fixture
+def ctx(database):
+    with app.app_context():
+        sync_dataset(PAIRS)
+        _upload(database, "done", upload_store.dataset_table_hash())
+        yield database
+
+
+def test_same_file_and_table_is_current(ctx):
+    assert upload_store.is_current(_upload(ctx))
+
+
+def test_deleted_row_makes_reupload_not_current(ctx):
+    ctx.session.delete(Dataset.query.first())
+    ctx.session.commit()
+    assert not upload_store.is_current(_upload(ctx))
+
+    sync_dataset(PAIRS)  # upload ulang memulihkan tabel
+    assert upload_store.is_current(_upload(ctx))
+
+
+def test_edited_row_makes_reupload_not_current(ctx):
+    sync_dataset([PAIRS[0], (PAIRS[1][0], "Jawaban yang diedit.")])
+    assert not upload_store.is_current(_upload(ctx))
+
+
+def test_table_hash_is_order_independent(ctx):
+    before = upload_store.dataset_table_hash()
+    sync_dataset(list(reversed(PAIRS)), mode="replace")
+    assert upload_store.dataset_table_hash() == before
+
+
+def test_upload_without_table_hash_is_not_current(ctx):
+    _upload(ctx, "done", None)  # upload lama sebelum kolom table_hash
+    assert not upload_store.is_current(_upload(ctx))